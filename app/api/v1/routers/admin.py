@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from typing import List
+from datetime import datetime, timezone
 import logging
-from app.models.user import User as UserModel
+from app.models.user import User as UserModel, LISTING_SORT
 from app.models.role import Role
-from app.schemas.admin import ListUsers
+from app.schemas.admin import ListUsers, Pagination
 from app.schemas.user import User, UserResponse, UserUpdate
 from app.dependencies import require_admin, require_permission
-from app.utils.formatter import ApiResponse
+from app.utils.formatter import ApiResponse, api_response
+from app.utils.etag import compute_etag, etag_matches, not_modified, set_etag_headers
 from beanie.operators import Eq, And
 
 from app.services.session_service import SessionService
+from app.core.db import READ_ADMIN_LISTING, routed_collection
+from app.core.timing import span
 
 
 logger = logging.getLogger(__name__)
@@ -19,6 +23,7 @@ router = APIRouter(prefix="/admin", tags=["admin"])
 
 @router.get("/users", response_model=ApiResponse[ListUsers])
 async def list_all_users(
+    request: Request,
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, le=100, description="Items per page"),
     current_user: UserModel = Depends(require_admin)
@@ -26,23 +31,41 @@ async def list_all_users(
     logger.info(f"List all users requested by: {current_user.username} (page: {page}, page_size: {size})")
     
     skip = (page - 1) * size
-    
-    total_count = await UserModel.find_all().count()
-    
-    users = await UserModel.find_all().skip(skip).limit(size).to_list()
+    # Listing reads tolerate replication lag; MONGO_READ_PREFERENCES decides where they go
+    users_collection = routed_collection(UserModel, READ_ADMIN_LISTING)
+    
+    with span("users.count"):
+        total_count = await users_collection.count_documents({})
+    
+    # Unchanged polls stop here: the version query is index-covered
+    with span("users.versions"):
+        versions = await UserModel.listing_versions(skip, size, collection=users_collection)
+    etag = compute_etag(total_count, page, size, versions)
+    if etag_matches(request, etag):
+        logger.debug(f"User listing not modified for {current_user.username} (page {page})")
+        return not_modified(etag)
+    
+    with span("users.find"):
+        cursor = users_collection.find({}, sort=LISTING_SORT, skip=skip, limit=size)
+        docs = [doc async for doc in cursor]
+    # Each read may be served by a different member: the ETag sent describes this body, not the
+    # version query, or a body older than its ETag would be revalidated as fresh
+    etag = compute_etag(total_count, page, size, [(doc["_id"], doc.get("updated_at")) for doc in docs])
+    users = [UserModel.model_validate(doc) for doc in docs]
+    
+    # Resolve all role links with one query instead of one fetch per user
+    role_ids = {user.role.ref.id for user in users}
+    with span("roles.find"):
+        roles = []
+        if role_ids:
+            cursor = routed_collection(Role, READ_ADMIN_LISTING).find({"_id": {"$in": list(role_ids)}})
+            roles = [Role.model_validate(doc) async for doc in cursor]
+    roles_by_id = {role.id: role for role in roles}
     
     users_data = []
     for user in users:
-        await user.fetch_link("role")
-        users_data.append({
-            "id": str(user.id),
-            "username": user.username,
-            "email": user.email,
-            "full_name": user.full_name,
-            "role": user.role,
-            "is_active": user.is_active,
-            "created_at": user.created_at
-        })
+        user.role = roles_by_id.get(user.role.ref.id, user.role)
+        users_data.append(UserResponse.from_document(user))
     
     total_pages = (total_count + size - 1) // size
     has_next = page < total_pages
@@ -50,21 +73,21 @@ async def list_all_users(
     
     logger.info(f"Returned {len(users_data)} users to {current_user.username} (page {page}/{total_pages})")
     
-    return ApiResponse(
-        code=0,
-        message=f"Retrieved {len(users_data)} users successfully",
-        data={
-            "users": users_data,
-            "pagination": {
-                "total_items": total_count,
-                "total_pages": total_pages,
-                "current_page": page,
-                "page_size": size,
-                "has_next": has_next,
-                "has_previous": has_previous
-            }
-        }
+    response = api_response(
+        ListUsers.model_construct(
+            users=users_data,
+            pagination=Pagination.model_construct(
+                total_items=total_count,
+                total_pages=total_pages,
+                current_page=page,
+                page_size=size,
+                has_next=has_next,
+                has_previous=has_previous
+            )
+        ),
+        message=f"Retrieved {len(users_data)} users successfully"
     )
+    return set_etag_headers(response, etag)
 
 
 @router.put("/{user_id}", response_model=ApiResponse[User])
@@ -103,17 +126,14 @@ async def update_any_user(
         logger.info(f"Admin {current_user.username} changing password for {user.username}")
         update_data["password"] = update_data.pop("password")
     
+    update_data["updated_at"] = datetime.now(timezone.utc)
     await user.set(update_data)
     await user.fetch_link("role")
     
     logger.info(
         f"User {user.username} updated by admin {current_user.username} (ID: {user.id})"
     )
-    return ApiResponse(
-        code=0, 
-        message="User updated successfully", 
-        data=user
-    )
+    return api_response(User.from_document(user), message="User updated successfully")
 
 
 @router.delete("/{user_id}", response_model=ApiResponse[None])
@@ -140,15 +160,11 @@ async def delete_any_user(
     if not user.is_active:
         raise HTTPException(status_code=400, detail="User already deactivated")
     
-    await user.set({"is_active": False})
+    await user.set({"is_active": False, "updated_at": datetime.now(timezone.utc)})
     revoked_count = await SessionService.revoke_all_user_sessions(str(user.id))
     
     logger.info(
         f"User {user.username} soft-deleted by admin {current_user.username}, "
         f"{revoked_count} sessions revoked"
     )
-    return ApiResponse(
-        code=0, 
-        message=f"User deleted successfully, {revoked_count} sessions revoked", 
-        data=None
-    )
+    return api_response(message=f"User deleted successfully, {revoked_count} sessions revoked")
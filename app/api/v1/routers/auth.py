@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Header, Request, Response, Cookie
 from typing import List, Optional
+import asyncio
 import logging
 
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
@@ -14,12 +15,15 @@ from app.schemas.auth import (
 from app.schemas.user import UserCreate, UserResponse
 from app.services.session_service import session_service
 from app.core.config import get_settings
-from app.utils.formatter import ApiResponse
+from app.core.rate_limit import rate_limits, too_many_requests
+from app.utils.formatter import ApiResponse, api_response
 from jose import jwt
 from app.utils.auth import decode_jwt
 from beanie.operators import Eq, Or, And
+from pymongo.errors import PyMongoError
 
 from app.utils.user_agent import get_client_ip
+from app.core.timing import span
 
 
 logger = logging.getLogger(__name__)
@@ -57,11 +61,15 @@ async def create_user(user_in: UserCreate):
         password=user_in.password,
         role=role
     )
-    await db_user.insert()
+    with span("user.insert"):
+        await db_user.insert()
     logger.info(f"User created: ID={db_user.id} ({db_user.username}, role={role.name})")
 
-    user_dict = db_user.dict(exclude={"password"})
-    return ApiResponse(code=0, message="User registered successfully", data=user_dict)
+    return api_response(
+        UserResponse.from_document(db_user),
+        message="User registered successfully",
+        status_code=201
+    )
 
 
 @router.post("/login", response_model=ApiResponse[TokenResponse])
@@ -71,21 +79,31 @@ async def login(
     response: Response,
     _: None = Depends(get_beanie_session)
 ):    
-    client_ip = request.client.host
+    client_ip = get_client_ip(request)
     logger.info(f"Login attempt: {form_data.email} from {client_ip}")
     
     login_identifier = form_data.email
-    user = await User.find_one(
-        And(
-            Or(
-                Eq(User.email, login_identifier),
-                Eq(User.username, login_identifier)
-            ),
-            Eq(User.is_active, True)
+    # Failed attempts per account and client IP, checked before the user lookup and argon2. Keyed on the
+    # account alone, anyone knowing an email could keep its owner locked out
+    account = f"{login_identifier.lower()}|{client_ip}"
+    retry_after = rate_limits.hit("account", account, cost=0)
+    if retry_after:
+        logger.warning(f"Login THROTTLED: too many failed attempts for {form_data.email} from {client_ip}")
+        raise too_many_requests("account", retry_after)
+    
+    with span("user"):
+        user = await User.find_one(
+            And(
+                Or(
+                    Eq(User.email, login_identifier),
+                    Eq(User.username, login_identifier)
+                ),
+                Eq(User.is_active, True)
+            )
         )
-    )
 
     if not user:
+        rate_limits.hit("account", account)
         logger.warning(f"Login FAILED: User not found - {form_data.email} from {client_ip}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -93,7 +111,14 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if not await user.verify_and_rehash_password(form_data.password):
+    with span("argon2"):
+        # The role lookup rides along with the hash verification instead of after it
+        password_ok, _ = await asyncio.gather(
+            user.verify_and_rehash_password(form_data.password),
+            user.fetch_link("role"),
+        )
+    if not password_ok:
+        rate_limits.hit("account", account)
         logger.warning(f"Login FAILED: Invalid password - {form_data.email} from {client_ip}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -101,11 +126,9 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    await user.fetch_link("role")
-
+    # Audit log, device parsing and password rehash run as background jobs after the response
     token_response = await session_service.create_session(user, request, response)
-    logger.info(f"Login SUCCESS: {user.username} (ID: {user.id}) from {client_ip}")
-    return ApiResponse(code=0, message="Login successful", data=token_response)
+    return api_response(token_response, message="Login successful", response=response)
 
 
 @router.post("/refresh", response_model=ApiResponse[TokenRefreshResponse])
@@ -131,7 +154,7 @@ async def refresh_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    return ApiResponse(code=0, message="Token refreshed successfully", data=token_data)
+    return api_response(token_data, message="Token refreshed successfully")
 
 
 @router.post("/logout", response_model=ApiResponse[LogoutResponse])
@@ -190,13 +213,9 @@ async def logout(
             revoked_sessions=1
         )
         
-        return ApiResponse(
-            code=0, 
-            message="Logged out successfully", 
-            data=logout_data
-        )
+        return api_response(logout_data, message="Logged out successfully", response=response)
     
-    except HTTPException:
+    except (HTTPException, PyMongoError):
         raise
     except Exception as e:
         logger.error(f"Logout ERROR from {client_ip}: {str(e)}", exc_info=True)
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from typing import List
+from datetime import datetime, timezone
 import logging
 from app.schemas.user import User, UserCreate, UserUpdate
 from app.models.user import User as UserModel
 from app.models.role import Role
 from app.dependencies import get_current_user
 from app.services.session_service import SessionService
-from app.utils.formatter import ApiResponse, ErrorResponse
+from app.utils.formatter import ApiResponse, ErrorResponse, api_response
+from app.utils.etag import compute_etag, etag_matches, not_modified, set_etag_headers
 from beanie.operators import Eq, Or
 
 
@@ -17,9 +19,16 @@ router = APIRouter(prefix="/user", tags=["user"])
 
 
 @router.get("/", response_model=ApiResponse[User])
-async def read_own_profile(current_user: UserModel = Depends(get_current_user)):
+async def read_own_profile(request: Request, current_user: UserModel = Depends(get_current_user)):
     logger.debug(f"Profile read by: {current_user.username} (role: {current_user.role.name})")
-    return ApiResponse(code=0, message="success", data=current_user)
+    
+    etag = compute_etag(
+        current_user.id, current_user.version_stamp, current_user.role.id, current_user.role.name
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    return set_etag_headers(api_response(User.from_document(current_user)), etag)
 
 
 @router.put("/", response_model=ApiResponse[User])
@@ -51,11 +60,12 @@ async def update_own_profile(
         logger.info(f"Password change by: {current_user.username}")
         update_data["password"] = update_data.pop("password")
     
+    update_data["updated_at"] = datetime.now(timezone.utc)
     await user.set(update_data)
     await user.fetch_link("role")
     
     logger.info(f"User self-updated: {current_user.username} (ID: {user.id})")
-    return ApiResponse(code=0, message="Profile updated successfully", data=user)
+    return api_response(User.from_document(user), message="Profile updated successfully")
 
 
 @router.delete("/", response_model=ApiResponse[None])
@@ -67,11 +77,11 @@ async def delete_own_account(current_user: UserModel = Depends(get_current_user)
         logger.warning(f"User not found for delete: ID={current_user.id}")
         raise HTTPException(status_code=404, detail="User not found")
     
-    await user.set({"is_active": False})
+    await user.set({"is_active": False, "updated_at": datetime.now(timezone.utc)})
     revoked_count = await SessionService.revoke_all_user_sessions(str(current_user.id))
     
     logger.info(
         f"User soft-deleted: {current_user.username} (ID: {current_user.id}), "
         f"{revoked_count} sessions revoked"
     )
-    return ApiResponse(code=0, message="Account deleted successfully", data=None)
+    return api_response(message="Account deleted successfully")
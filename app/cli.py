@@ -0,0 +1,531 @@
+"""Management commands: python -m app.cli <command>."""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional
+
+import bson
+from beanie.operators import In
+from bson import DBRef
+
+from app.core.config import get_settings
+from app.core.db import (
+    READ_ADMIN_LISTING,
+    READ_EXPORT,
+    create_default_roles,
+    init_beanie_models,
+    read_preference_name,
+    routed_collection,
+)
+from app.models.role import Role
+from app.models.session import Session
+from app.models.user import User
+from app.models.user_agent import UserAgent
+from app.services.session_service import REFRESH_TOKEN_EXPIRE_DAYS
+from app.utils import password as pw
+from app.utils.auth import ASYMMETRIC_ALGORITHMS, KeyRing, generate_private_key_pem
+from app.utils.logging import setup_logging
+from app.utils.user_agent import describe_user_agent, user_agent_id
+
+logger = logging.getLogger("app.cli")
+
+
+async def build_indexes(args: argparse.Namespace) -> None:
+    start = time.perf_counter()
+    await init_beanie_models(sync_indexes=True)
+    indexes_done = time.perf_counter()
+    created = await create_default_roles()
+    logger.info(
+        f"Indexes synced in {(indexes_done - start) * 1000:.0f}ms, "
+        f"{created} default roles created"
+    )
+
+
+async def check_read_routing(args: argparse.Namespace) -> None:
+    # Run one read per query class and report which replica set member served it
+    await init_beanie_models(sync_indexes=False)
+    query_classes = {READ_ADMIN_LISTING, READ_EXPORT, *get_settings().MONGO_READ_PREFERENCES}
+    primary = User.get_motor_collection().find({}, limit=1)
+    await primary.to_list(1)
+    logger.info(f"{'(beanie default)':<20} {'primary':<20} -> {primary.address}")
+    for query_class in sorted(query_classes):
+        cursor = routed_collection(User, query_class).find({}, limit=1)
+        await cursor.to_list(1)
+        logger.info(f"{query_class:<20} {read_preference_name(query_class):<20} -> {cursor.address}")
+
+
+SESSION_STATES = ("active", "expired", "revoked")
+SYNTHETIC_CLIENTS = [
+    ("Chrome | 120.0.0 | Windows | 10", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"),
+    ("Mobile Safari | 17.1 | iOS | 17.1 | iPhone", "Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Mobile/15E148 Safari/604.1"),
+    ("Firefox | 121.0 | Ubuntu", "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0"),
+    ("Chrome Mobile | 119.0.0 | Android | 14 | Pixel 8", "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Mobile Safari/537.36"),
+    ("Edge | 120.0.0 | Mac OS X | 10.15.7 | Mac", "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0"),
+]
+
+
+def weights(spec: str) -> Dict[str, float]:
+    # "USER=0.97,ADMIN=0.03" -> {"USER": 0.97, "ADMIN": 0.03}
+    try:
+        parsed = {name.strip(): float(value) for name, value in (item.split("=") for item in spec.split(","))}
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected NAME=WEIGHT[,NAME=WEIGHT...], got {spec!r}")
+    if any(value < 0 for value in parsed.values()) or not sum(parsed.values()):
+        raise argparse.ArgumentTypeError(f"weights must be >= 0 and not all zero: {spec!r}")
+    return parsed
+
+
+def utc_datetime(value: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an ISO 8601 timestamp, got {value!r}")
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def synthetic_id(seed: int, kind: str, index: int) -> str:
+    # Derived, not stored: sessions find their user's id without keeping millions of ids in memory
+    digest = hashlib.blake2b(f"{seed}:{kind}:{index}".encode(), digest_size=16).digest()
+    return str(uuid.UUID(bytes=digest, version=4))
+
+
+def synthetic_password_hash(password: str, seed: int, index: int) -> str:
+    # Salted from the seed, so the same seed and --now give byte-identical documents
+    salt = hashlib.blake2b(f"{seed}:salt:{index}".encode(), digest_size=16).digest()
+    return pw.get_password_hasher().hash(password, salt=salt)
+
+
+def synthetic_users(args, role_ids: Dict[str, str], password_hashes: List[str], now: datetime) -> Iterator[List[dict]]:
+    rng = random.Random(args.seed)
+    roles, role_weights = list(args.roles), list(args.roles.values())
+    span_seconds = args.days * 86400
+    batch = []
+    for i in range(args.users):
+        username = f"{args.prefix}{i}"
+        created_at = now - timedelta(seconds=rng.uniform(0, span_seconds))
+        updated = rng.random() < 0.2
+        batch.append({
+            "_id": synthetic_id(args.seed, "user", i),
+            "username": username,
+            "email": f"{username}@example.test",
+            "full_name": f"Synthetic User {i}",
+            "password": password_hashes[i % len(password_hashes)],
+            "role": DBRef(Role.Settings.name, role_ids[rng.choices(roles, role_weights)[0]]),
+            "is_active": rng.random() >= args.inactive,
+            "created_at": created_at,
+            "updated_at": created_at + (now - created_at) * rng.random() if updated else None,
+        })
+        if len(batch) == args.batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def synthetic_sessions(args, now: datetime) -> Iterator[List[dict]]:
+    rng = random.Random(args.seed + 1)
+    states, state_weights = list(args.session_states), list(args.session_states.values())
+    lifetime = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    batch = []
+    for i in range(args.sessions):
+        # Skewed: a minority of users hold most of the sessions
+        user_index = int(rng.random() ** 2 * args.users)
+        state = rng.choices(states, state_weights)[0]
+        if state == "expired":
+            expires_at = now - timedelta(seconds=rng.uniform(0, args.days * 86400))
+            created_at = expires_at - lifetime
+        else:
+            created_at = now - lifetime * rng.random()
+            expires_at = created_at + lifetime
+        device_info, user_agent = SYNTHETIC_CLIENTS[rng.randrange(len(SYNTHETIC_CLIENTS))]
+        if args.inline_user_agents:
+            client = {"device_info": device_info, "user_agent": user_agent}
+        else:
+            client = {"ua_id": user_agent_id(user_agent)}
+        batch.append({
+            "_id": synthetic_id(args.seed, "session", i),
+            "user_id": synthetic_id(args.seed, "user", user_index),
+            "refresh_jti": f"{args.prefix}{synthetic_id(args.seed, 'jti', i)}",
+            **client,
+            "ip_address": f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+            "expires_at": expires_at,
+            "is_active": state != "revoked",
+            "created_at": created_at,
+            "last_activity": created_at + (min(expires_at, now) - created_at) * rng.random(),
+        })
+        if len(batch) == args.batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def insert_batches(collection, batches: Iterator[List[dict]], total: int, concurrency: int) -> int:
+    inserted, next_report = 0, total // 10
+    start = time.perf_counter()
+    pending = set()
+
+    def collect(done) -> None:
+        nonlocal inserted, next_report
+        for task in done:
+            inserted += len(task.result().inserted_ids)
+        if inserted >= next_report:
+            rate = inserted / (time.perf_counter() - start)
+            logger.info(f"{collection.name}: {inserted:,}/{total:,} ({rate:,.0f} docs/s)")
+            next_report = inserted + max(total // 10, 1)
+
+    try:
+        for batch in batches:
+            if len(pending) >= concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                collect(done)
+            pending.add(asyncio.create_task(collection.insert_many(batch, ordered=False)))
+        if pending:
+            done, pending = await asyncio.wait(pending)
+            collect(done)
+    except BaseException:
+        # One failed batch stops the run: don't leave the others writing in the background
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        raise
+    return inserted
+
+
+async def generate_data(args: argparse.Namespace) -> None:
+    settings = get_settings()
+    if settings.ENVIRONMENT == "production":
+        sys.exit("generate-data refuses to run with ENVIRONMENT=production")
+    unknown = set(args.session_states) - set(SESSION_STATES)
+    if unknown:
+        sys.exit(f"Unknown session states {sorted(unknown)}; expected {', '.join(SESSION_STATES)}")
+
+    await init_beanie_models(sync_indexes=False)
+    await create_default_roles()
+    roles = {role.name: role.id for role in await Role.find_all().to_list()}
+    missing = set(args.roles) - set(roles)
+    if missing:
+        sys.exit(f"Unknown roles {sorted(missing)}; existing roles: {', '.join(sorted(roles))}")
+
+    users, sessions = User.get_motor_collection(), Session.get_motor_collection()
+    prefix = {"$regex": f"^{re.escape(args.prefix)}"}
+    if args.drop:
+        deleted_users = (await users.delete_many({"username": prefix})).deleted_count
+        deleted_sessions = (await sessions.delete_many({"refresh_jti": prefix})).deleted_count
+        logger.info(f"Dropped {deleted_users:,} synthetic users and {deleted_sessions:,} sessions")
+    # Ids come from the seed and names from the prefix: either one already taken fails the first insert_many
+    existing = await users.find_one(
+        {"$or": [{"username": prefix}, {"_id": synthetic_id(args.seed, "user", 0)}]}, {"_id": 1}
+    ) or await sessions.find_one(
+        {"$or": [{"refresh_jti": prefix}, {"_id": synthetic_id(args.seed, "session", 0)}]}, {"_id": 1}
+    )
+    if existing:
+        sys.exit(
+            f"{settings.MONGODB_NAME} already holds synthetic data with prefix {args.prefix!r} or seed {args.seed}; "
+            f"pass --drop to replace a previous run with this prefix, or pick another --prefix and --seed"
+        )
+
+    # A handful of real hashes shared by all users keeps generation I/O bound instead of argon2 bound
+    start = time.perf_counter()
+    password_hashes = await asyncio.gather(*(
+        pw.hash_pool.run(synthetic_password_hash, f"{args.prefix}password-{k}", args.seed, k)
+        for k in range(args.password_pool)
+    ))
+    pw.hash_pool.shutdown()
+    logger.info(
+        f"{len(password_hashes)} password hashes in {time.perf_counter() - start:.1f}s; "
+        f"user {args.prefix}N has password {args.prefix}password-<N % {args.password_pool}>"
+    )
+
+    now = args.now or datetime.now(timezone.utc)
+    if not args.inline_user_agents:
+        for device_info, user_agent in SYNTHETIC_CLIENTS:
+            await UserAgent.get_motor_collection().update_one(
+                {"_id": user_agent_id(user_agent)},
+                {"$setOnInsert": {"user_agent": user_agent, "device_info": device_info, "created_at": now}},
+                upsert=True,
+            )
+    start = time.perf_counter()
+    inserted_users = await insert_batches(
+        users, synthetic_users(args, roles, password_hashes, now), args.users, args.concurrency
+    )
+    inserted_sessions = await insert_batches(
+        sessions, synthetic_sessions(args, now), args.sessions, args.concurrency
+    )
+    logger.info(
+        f"Inserted {inserted_users:,} users and {inserted_sessions:,} sessions "
+        f"in {time.perf_counter() - start:.1f}s (seed {args.seed}, now {now.isoformat()})"
+    )
+
+
+async def session_user_agent_counts(top: Optional[int] = None) -> Dict[str, int]:
+    # Sessions per User-Agent string: ua_id references resolved through user_agents, plus legacy inline strings
+    sessions = Session.get_motor_collection()
+    counts: Dict[str, int] = {}
+    for field in ("ua_id", "user_agent"):
+        pipeline = [
+            {"$match": {field: {"$ne": None}}},
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}},
+        ]
+        if top:
+            pipeline.append({"$limit": top})
+        rows = await sessions.aggregate(pipeline, allowDiskUse=True).to_list(None)
+        if field == "ua_id":
+            records = await UserAgent.find(In(UserAgent.id, [row["_id"] for row in rows])).to_list()
+            names = {record.id: record.user_agent for record in records}
+            rows = [{"_id": names[row["_id"]], "count": row["count"]} for row in rows if row["_id"] in names]
+        for row in rows:
+            counts[row["_id"]] = counts.get(row["_id"], 0) + row["count"]
+    return dict(sorted(counts.items(), key=lambda item: -item[1])[:top])
+
+
+async def export_user_agents(args: argparse.Namespace) -> None:
+    # The most frequent User-Agents in sessions, parsed once here instead of by every worker
+    await init_beanie_models(sync_indexes=False)
+    counts = await session_user_agent_counts(args.top)
+    table = {user_agent: describe_user_agent(user_agent) for user_agent in counts}
+    with open(args.output, "w") as f:
+        json.dump(table, f, indent=1)
+    covered = sum(counts.values())
+    total = await Session.get_motor_collection().count_documents(
+        {"$or": [{"ua_id": {"$ne": None}}, {"user_agent": {"$ne": None}}]}
+    )
+    logger.info(
+        f"Wrote {len(table)} User-Agents to {args.output}, covering {covered:,} of {total:,} sessions; "
+        f"set USER_AGENT_TABLE={args.output}"
+    )
+
+
+async def generate_jwt_key(args: argparse.Namespace) -> None:
+    # Rotation: point JWT_PRIVATE_KEY_FILE at the new key and keep the old one in JWT_VERIFICATION_KEY_FILES
+    if os.path.exists(args.output):
+        sys.exit(f"{args.output} exists; rotate to a new file so the old key stays available for verification")
+    pem = generate_private_key_pem(args.algorithm, args.rsa_bits)
+    fd = os.open(args.output, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(pem)
+    ring = KeyRing()
+    ring.load(args.algorithm, "", pem)
+    logger.info(f"Wrote {args.algorithm} key {ring.kid} to {args.output}")
+    print(f"ALGORITHM={args.algorithm}")
+    print(f"JWT_PRIVATE_KEY_FILE={args.output}")
+
+
+def bson_element_bytes(name: str, value: str) -> int:
+    # type byte + cstring name + int32 length + utf-8 + NUL
+    return 1 + len(name) + 1 + 4 + len(value.encode()) + 1
+
+
+async def collection_bytes(collection) -> Dict[str, Optional[int]]:
+    # Uncompressed data size (what the cache holds) and on-disk size; without collStats, encode every document
+    try:
+        stats = await collection.database.command("collStats", collection.name)
+        return {"count": stats["count"], "size": stats["size"], "storage": stats.get("storageSize")}
+    except Exception:
+        count = size = 0
+        async for document in collection.find({}):
+            count += 1
+            size += len(bson.encode(document))
+        return {"count": count, "size": size, "storage": None}
+
+
+async def storage_report(args: argparse.Namespace) -> None:
+    await init_beanie_models(sync_indexes=False)
+    sessions = await collection_bytes(Session.get_motor_collection())
+    user_agents = await collection_bytes(UserAgent.get_motor_collection())
+
+    # What the ua_id sessions would weigh with user_agent and device_info stored inline instead
+    rows = await Session.get_motor_collection().aggregate([
+        {"$match": {"ua_id": {"$ne": None}}},
+        {"$group": {"_id": "$ua_id", "count": {"$sum": 1}}},
+    ], allowDiskUse=True).to_list(None)
+    records = {r.id: r for r in await UserAgent.find(In(UserAgent.id, [row["_id"] for row in rows])).to_list()}
+    inline_extra = unresolved = 0
+    for row in rows:
+        record = records.get(row["_id"])
+        if record is None:
+            unresolved += row["count"]
+            continue
+        per_session = bson_element_bytes("user_agent", record.user_agent) \
+            + bson_element_bytes("device_info", record.device_info or "") - bson_element_bytes("ua_id", row["_id"])
+        inline_extra += row["count"] * per_session
+
+    normalized = sessions["size"] + user_agents["size"]
+    inline = sessions["size"] + inline_extra
+    referencing = sum(row["count"] for row in rows)
+    logger.info(
+        f"sessions: {sessions['count']:,} docs, {sessions['size']:,} B "
+        f"({sessions['size'] / max(sessions['count'], 1):.0f} B/doc), {referencing:,} reference a User-Agent by ua_id"
+    )
+    logger.info(f"user_agents: {user_agents['count']:,} docs, {user_agents['size']:,} B")
+    logger.info(
+        f"inline layout (estimated): {inline:,} B ({inline / max(sessions['count'], 1):.0f} B/session); "
+        f"normalized: {normalized:,} B; saved {inline - normalized:,} B ({1 - normalized / max(inline, 1):.1%})"
+    )
+    if sessions["storage"] is not None:
+        logger.info(
+            f"on disk (compressed): sessions {sessions['storage']:,} B, user_agents {user_agents['storage']:,} B; "
+            f"compression hides part of the saving on disk, not in the cache"
+        )
+    if unresolved:
+        logger.warning(f"{unresolved:,} sessions reference a ua_id missing from user_agents")
+
+# OWASP argon2id minimums: the least memory (KiB) acceptable for each time cost
+ARGON2_MIN_MEMORY_KIB = {1: 47104, 2: 19456, 3: 12288, 4: 9216}
+ARGON2_MIN_MEMORY_KIB_DEFAULT = 7168
+ARGON2_MEMORY_STEPS_MIB = (19, 32, 46, 64, 96, 128, 256, 512)
+
+
+def measure_argon2(time_cost: int, memory_kib: int, parallelism: int, samples: int) -> Dict[str, float]:
+    from argon2 import PasswordHasher
+    hasher = PasswordHasher(time_cost=time_cost, memory_cost=memory_kib, parallelism=parallelism)
+    password_hash = hasher.hash("calibration password")
+    wall, cpu = [], []
+    for _ in range(samples):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        hasher.verify(password_hash, "calibration password")
+        wall.append(time.perf_counter() - wall_start)
+        # process_time adds up every lane's thread: the CPU one login costs
+        cpu.append(time.process_time() - cpu_start)
+    return {"verify_ms": statistics.median(wall) * 1000, "cpu_ms": statistics.median(cpu) * 1000}
+
+
+async def calibrate_argon2(args: argparse.Namespace) -> None:
+    settings = get_settings()
+    cores = os.cpu_count() or 1
+    memory_steps = [mib * 1024 for mib in ARGON2_MEMORY_STEPS_MIB if mib <= args.max_memory_mib]
+    parallelism_steps = [p for p in (1, 2, 4, 8) if p <= max(args.max_parallelism or cores, 1)]
+    logger.info(
+        f"Target: verify <= {args.target_ms:.0f}ms, >= {args.min_logins_per_core:g} logins/s per core "
+        f"({cores} cores, PASSWORD_HASH_WORKERS={settings.PASSWORD_HASH_WORKERS})"
+    )
+    logger.info(f"{'t':>2} {'memory':>8} {'p':>2} {'verify ms':>10} {'cpu ms':>8} {'logins/s/core':>14}")
+
+    candidates = []
+    for parallelism in parallelism_steps:
+        for memory_kib in memory_steps:
+            fitted = False
+            for time_cost in range(1, args.max_time_cost + 1):
+                if memory_kib < ARGON2_MIN_MEMORY_KIB.get(time_cost, ARGON2_MIN_MEMORY_KIB_DEFAULT):
+                    continue
+                result = measure_argon2(time_cost, memory_kib, parallelism, args.samples)
+                logins_per_core = 1000 / result["cpu_ms"] if result["cpu_ms"] else float("inf")
+                fits = result["verify_ms"] <= args.target_ms and logins_per_core >= args.min_logins_per_core
+                logger.info(
+                    f"{time_cost:>2} {memory_kib // 1024:>5}MiB {parallelism:>2} {result['verify_ms']:>10.1f} "
+                    f"{result['cpu_ms']:>8.1f} {logins_per_core:>14.1f}{'  ok' if fits else ''}"
+                )
+                if not fits:
+                    # More passes only cost more
+                    break
+                fitted = True
+                candidates.append((time_cost, memory_kib, parallelism, result))
+            if not fitted:
+                # Neither will more memory
+                break
+
+    if not candidates:
+        logger.error("No parameters meet the target; raise --target-ms or lower --min-logins-per-core")
+        sys.exit(1)
+    # Strongest = most memory-hard work (memory x passes); then the lowest latency
+    time_cost, memory_kib, parallelism, result = max(
+        candidates, key=lambda c: (c[0] * c[1], -c[3]["verify_ms"])
+    )
+    current = (settings.ARGON2_TIME_COST, settings.ARGON2_MEMORY_COST_KIB, settings.ARGON2_PARALLELISM)
+    logger.info(
+        f"Recommended: verify {result['verify_ms']:.0f}ms, {1000 / result['cpu_ms']:.1f} logins/s per core, "
+        f"{settings.PASSWORD_HASH_WORKERS * memory_kib // 1024} MiB with all hashing workers busy"
+    )
+    print(f"ARGON2_TIME_COST={time_cost}")
+    print(f"ARGON2_MEMORY_COST_KIB={memory_kib}")
+    print(f"ARGON2_PARALLELISM={parallelism}")
+    if (time_cost, memory_kib, parallelism) != current:
+        logger.info("Existing hashes are upgraded as users log in (argon2_rehashes_total)")
+
+
+def main(argv=None) -> None:
+    setup_logging()
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser(
+        "build-indexes", help="Create/update MongoDB indexes and seed default roles"
+    )
+    build.set_defaults(handler=build_indexes)
+
+    routing = commands.add_parser(
+        "check-read-routing", help="Show which server each read query class is routed to"
+    )
+    routing.set_defaults(handler=check_read_routing)
+
+    generate = commands.add_parser(
+        "generate-data", help="Bulk-load synthetic users and sessions for scale testing"
+    )
+    generate.add_argument("--users", type=int, default=100_000)
+    generate.add_argument("--sessions", type=int, default=1_000_000)
+    generate.add_argument("--roles", type=weights, default=weights("USER=0.97,ADMIN=0.029,SUPER_ADMIN=0.001"),
+                          help="role mix, e.g. USER=0.97,ADMIN=0.03")
+    generate.add_argument("--session-states", type=weights, default=weights("active=0.3,expired=0.6,revoked=0.1"),
+                          help="session mix of active/expired/revoked")
+    generate.add_argument("--inactive", type=float, default=0.05, help="share of deactivated users")
+    generate.add_argument("--days", type=int, default=365, help="spread created_at over this many days")
+    generate.add_argument("--seed", type=int, default=42)
+    generate.add_argument("--now", type=utc_datetime, default=None,
+                          help="ISO timestamp the generated times are relative to (default: current time)")
+    generate.add_argument("--prefix", default="synth_", help="username and refresh_jti prefix of generated data")
+    generate.add_argument("--password-pool", type=int, default=8, help="distinct argon2 hashes to share")
+    generate.add_argument("--batch-size", type=int, default=5_000)
+    generate.add_argument("--concurrency", type=int, default=4, help="insert_many batches in flight")
+    generate.add_argument("--drop", action="store_true", help="delete previously generated data first")
+    generate.add_argument("--inline-user-agents", action="store_true",
+                          help="store user_agent/device_info in each session (the pre-user_agents layout)")
+    generate.set_defaults(handler=generate_data)
+
+    calibrate = commands.add_parser(
+        "calibrate-argon2", help="Benchmark argon2 costs on this host and recommend ARGON2_* settings"
+    )
+    calibrate.add_argument("--target-ms", type=float, default=250.0, help="max median verify latency")
+    calibrate.add_argument("--min-logins-per-core", type=float, default=4.0)
+    calibrate.add_argument("--max-memory-mib", type=int, default=256, help="per hash")
+    calibrate.add_argument("--max-time-cost", type=int, default=6)
+    calibrate.add_argument("--max-parallelism", type=int, default=None, help="defaults to the core count")
+    calibrate.add_argument("--samples", type=int, default=3, help="verifications per combination")
+    calibrate.set_defaults(handler=calibrate_argon2)
+
+    export = commands.add_parser(
+        "export-user-agents", help="Write the most common session User-Agents as a preload table"
+    )
+    export.add_argument("--top", type=int, default=2_000)
+    export.add_argument("--output", default="user_agents.json")
+    export.set_defaults(handler=export_user_agents)
+
+    storage = commands.add_parser(
+        "storage-report", help="Compare session storage with and without the user_agents collection"
+    )
+    storage.set_defaults(handler=storage_report)
+
+    jwt_key = commands.add_parser(
+        "generate-jwt-key", help="Write a new private key for RS*/ES* token signing"
+    )
+    jwt_key.add_argument("--algorithm", default="ES256", choices=ASYMMETRIC_ALGORITHMS)
+    jwt_key.add_argument("--rsa-bits", type=int, default=2048)
+    jwt_key.add_argument("--output", default="jwt-signing-key.pem", help="refuses to overwrite an existing file")
+    jwt_key.set_defaults(handler=generate_jwt_key)
+
+    args = parser.parse_args(argv)
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Admission control: cap concurrent requests per worker and per route class, queue a few, shed the rest."""
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_QUEUE_WAIT
+
+settings = get_settings()
+
+DEFAULT_CLASS = "api"
+
+
+class Gate:
+    """At most `limit` holders; up to `queue_size` more wait in FIFO order, each for at most its timeout."""
+
+    def __init__(self, name: str, limit: int, queue_size: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._in_flight_gauge = ADMISSION_IN_FLIGHT.labels(name)
+        self._queue_gauge = ADMISSION_QUEUE_DEPTH.labels(name)
+        self._queue_wait = ADMISSION_QUEUE_WAIT.labels(name)
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def queue_full(self) -> bool:
+        return len(self._waiters) >= self.queue_size
+
+    async def acquire(self, timeout: float) -> bool:
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self._in_flight_gauge.set(self.in_flight)
+            return True
+        if self.queue_full or timeout <= 0:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._queue_gauge.set(len(self._waiters))
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except TimeoutError:
+            self._give_back(waiter)
+            return False
+        except asyncio.CancelledError:
+            self._give_back(waiter)
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._queue_gauge.set(len(self._waiters))
+            self._queue_wait.observe(time.monotonic() - start)
+        return True
+
+    def _give_back(self, waiter: asyncio.Future) -> None:
+        # Handed the slot just as we gave up: pass it on
+        if waiter.done() and not waiter.cancelled():
+            self.release()
+
+    def release(self) -> None:
+        # Hand the slot straight to the next live waiter; in_flight stays the same
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+        self._in_flight_gauge.set(self.in_flight)
+
+
+class AdmissionControl:
+    """Each request takes a slot in its route class, then one in the worker-wide total. Requests that
+    find both full wait in a short queue; a full queue, a queue timeout or a lagging event loop sheds them."""
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        class_limits: Dict[str, int],
+        route_classes: Dict[str, str],
+        queue_size: int,
+        queue_timeout: float,
+        max_loop_lag: float,
+    ):
+        self.queue_timeout = queue_timeout
+        self.max_loop_lag = max_loop_lag
+        self.total = Gate("total", max_in_flight, queue_size)
+        self.gates: Dict[str, Gate] = {name: Gate(name, limit, queue_size) for name, limit in class_limits.items()}
+        self.gates.setdefault(DEFAULT_CLASS, Gate(DEFAULT_CLASS, max_in_flight, queue_size))
+        # Longest prefix first
+        self._route_classes: List[Tuple[str, str]] = sorted(
+            route_classes.items(), key=lambda item: len(item[0]), reverse=True
+        )
+
+    def gate_for(self, path: str) -> Gate:
+        for prefix, name in self._route_classes:
+            if path.startswith(prefix):
+                return self.gates.get(name) or self.gates[DEFAULT_CLASS]
+        return self.gates[DEFAULT_CLASS]
+
+    async def admit(self, gate: Gate, loop_lag: float) -> Optional[str]:
+        """None when admitted (call leave() afterwards), else the reason the request is shed."""
+        if loop_lag >= self.max_loop_lag:
+            return "loop_lag"
+        deadline = time.monotonic() + self.queue_timeout
+        if not await gate.acquire(self.queue_timeout):
+            return "queue_full" if gate.queue_full else "queue_timeout"
+        try:
+            admitted = await self.total.acquire(deadline - time.monotonic())
+        except BaseException:
+            # Cancelled while queued (client gone, shutdown): the class slot must not leak
+            gate.release()
+            raise
+        if not admitted:
+            gate.release()
+            return "queue_full" if self.total.queue_full else "queue_timeout"
+        return None
+
+    def leave(self, gate: Gate) -> None:
+        self.total.release()
+        gate.release()
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            gate.name: {"in_flight": gate.in_flight, "queued": gate.queued, "limit": gate.limit}
+            for gate in (self.total, *self.gates.values())
+        }
+
+
+admission = AdmissionControl(
+    max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+    class_limits=settings.ADMISSION_CLASS_LIMITS,
+    route_classes=settings.ADMISSION_ROUTE_CLASSES,
+    queue_size=settings.ADMISSION_QUEUE_SIZE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    max_loop_lag=settings.ADMISSION_MAX_LOOP_LAG_MS / 1000,
+)
@@ -2,40 +2,100 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 import logging
+import time
 from datetime import datetime, timezone
 
 from app.core.config import get_settings
-from app.core.db import init_beanie_models, create_default_roles
+from app.core.db import close_client, create_default_roles, init_beanie_models, pool_size, prewarm_pool
 from app.core.middleware import setup_middleware
 from app.core.exception_handlers import setup_exception_handlers
-from app.core.health import setup_health_endpoints
+from app.core.health import readiness_prober, setup_health_endpoints
+from app.core.jobs import jobs
+from app.core.jwks import setup_jwks_endpoint
+from app.core.metrics import setup_metrics_endpoint, start_metrics_tasks, stop_metrics_tasks
+from app.core.loop_monitor import loop_monitor
+from app.core.rate_limit import rate_limits
 from app.api.v1 import routers
 from app.utils.logging import setup_logging
-
-# Initialize logging
-setup_logging()
+from app.utils.auth import load_keys
+from app.utils.formatter import FastJSONResponse
+from app.utils.password import hash_pool
+from app.utils.user_agent import load_user_agent_table
 
 log = logging.getLogger("app")
 
 
 @asynccontextmanager
 async def lifespan(app_: FastAPI):
+    setup_logging()
     log.info("🚀 Starting up...")
+    if settings.ALGORITHM.startswith("HS") and "SECRET_KEY" not in settings.model_fields_set:
+        log.warning(
+            "SECRET_KEY is not set: using a random per-process key, so tokens fail on other "
+            "workers and after restarts. Set it, or start with `python -m app.server`."
+        )
+    startup_start = time.perf_counter()
+    key_ring = load_keys()
+    if key_ring.kid:
+        log.info(f"Signing tokens with {key_ring.algorithm} key {key_ring.kid} ({len(key_ring.keys)} verification keys)")
     await init_beanie_models()
+    beanie_done = time.perf_counter()
     await create_default_roles()
-    log.info("MongoDB collections initialized")
+    roles_done = time.perf_counter()
+    log.info(
+        f"MongoDB collections initialized (indexes {'synced' if settings.SYNC_INDEXES_ON_STARTUP else 'skipped'}): "
+        f"init_beanie={(beanie_done - startup_start) * 1000:.0f}ms, "
+        f"default_roles={(roles_done - beanie_done) * 1000:.0f}ms"
+    )
+    if settings.MONGO_PREWARM_POOL:
+        warmed = await prewarm_pool()
+        log.info(
+            f"MongoDB pool warmed: {warmed} connections in "
+            f"{(time.perf_counter() - roles_done) * 1000:.0f}ms (maxPoolSize={pool_size()})"
+        )
+    if settings.USER_AGENT_TABLE:
+        try:
+            loaded = load_user_agent_table(settings.USER_AGENT_TABLE)
+            log.info(f"Preloaded {loaded} User-Agents from {settings.USER_AGENT_TABLE}")
+        except (OSError, ValueError) as e:
+            log.warning(f"User-Agent table {settings.USER_AGENT_TABLE} not loaded: {e}")
+    await readiness_prober.probe()
+    readiness_prober.start()
+    jobs.start()
+    rate_limits.start()
+    metrics_tasks = start_metrics_tasks()
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    log.info(f"Startup complete in {(time.perf_counter() - startup_start) * 1000:.0f}ms")
     yield
+    if settings.LOOP_MONITOR_ENABLED:
+        await loop_monitor.stop()
+    await stop_metrics_tasks(metrics_tasks)
+    await readiness_prober.stop()
+    # Pushes the last unsynced counts in mongo mode
+    await rate_limits.stop()
+    # Jobs still need the hashing pool and the database
+    await jobs.drain(settings.JOB_DRAIN_SECONDS)
+    hash_pool.shutdown()
+    close_client()
     log.info("🔌 Shutdown complete")
 
 
 settings = get_settings()
-app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION, lifespan=lifespan)
+app = FastAPI(
+    title=settings.PROJECT_NAME,
+    version=settings.VERSION,
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
 
 
 # Setup core components
 setup_middleware(app)
 setup_exception_handlers(app)
 setup_health_endpoints(app)
+setup_metrics_endpoint(app)
+setup_jwks_endpoint(app)
 
 
 # Include routers
@@ -0,0 +1,111 @@
+"""Stop sending queries while MongoDB is clearly unhealthy."""
+import logging
+import math
+import threading
+import time
+from collections import deque
+
+from app.core.config import get_settings
+from app.core.metrics import MONGO_CIRCUIT_STATE
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+_STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+
+class CircuitBreaker:
+    """Opens once the last `window` seconds hold at least `failure_threshold` failures and they make up
+    at least `failure_ratio` of all commands; after `reset_timeout` one probe request is let through and
+    the first successful command closes it again.
+
+    Successes never wipe the window, they only dilute it: under partial failure (slow queries timing out
+    while cheap lookups succeed) the failures still add up."""
+
+    def __init__(self, failure_threshold: int, window: float, reset_timeout: float, failure_ratio: float = 0.0):
+        self.failure_threshold = failure_threshold
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.failure_ratio = failure_ratio
+        self.state = CLOSED
+        # [second, successes, failures] per second of the window, oldest first
+        self._buckets: deque = deque()
+        self._opened_at = 0.0
+        self._probe_started_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def retry_after(self) -> int:
+        return max(math.ceil(self.reset_timeout), 1)
+
+    def allow_request(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            if self.state == OPEN and now - self._opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+                self._probe_started_at = now
+                return True
+            # A probe that never reported back (no DB call, cancelled) frees the slot after a while
+            if self.state == HALF_OPEN and now - self._probe_started_at >= self.reset_timeout:
+                self._probe_started_at = now
+                return True
+            return self.state == CLOSED
+
+    def _bucket(self, now: float) -> list:
+        second = int(now)
+        buckets = self._buckets
+        while buckets and buckets[0][0] <= second - self.window:
+            buckets.popleft()
+        if not buckets or buckets[-1][0] != second:
+            buckets.append([second, 0, 0])
+        return buckets[-1]
+
+    def record_success(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self.state == CLOSED:
+                self._bucket(now)[1] += 1
+                return
+            if self.state == OPEN:
+                # Commands already in flight when it opened; only the probe may close it
+                return
+            logger.info("MongoDB circuit closed: commands are succeeding again")
+            self._buckets.clear()
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._open(now, "probe request failed")
+                return
+            if self.state == OPEN:
+                return
+            self._bucket(now)[2] += 1
+            successes = sum(b[1] for b in self._buckets)
+            failures = sum(b[2] for b in self._buckets)
+            if failures >= self.failure_threshold and failures >= self.failure_ratio * (successes + failures):
+                self._open(now, f"{failures} of {successes + failures} commands failed in {self.window:.0f}s")
+
+    def _open(self, now: float, reason: str) -> None:
+        self._opened_at = now
+        self._buckets.clear()
+        self._set_state(OPEN)
+        logger.error(f"MongoDB circuit opened ({reason}); rejecting requests for {self.reset_timeout:.0f}s")
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        MONGO_CIRCUIT_STATE.set(_STATE_VALUES[state])
+
+
+db_circuit = CircuitBreaker(
+    failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    window=settings.CIRCUIT_BREAKER_WINDOW_SECONDS,
+    reset_timeout=settings.CIRCUIT_BREAKER_RESET_SECONDS,
+    failure_ratio=settings.CIRCUIT_BREAKER_FAILURE_RATIO,
+)
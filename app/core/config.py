@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 import os
 
 class Settings(BaseSettings):
@@ -10,13 +11,167 @@ class Settings(BaseSettings):
     MONGODB_NAME: str
     
     SECRET_KEY: str = os.urandom(32).hex()
+    # HS256/384/512 sign tokens with SECRET_KEY. RS256/384/512 and ES256/384/512 sign with the PEM private key
+    # in JWT_PRIVATE_KEY_FILE and publish the public keys at /.well-known/jwks.json
     ALGORITHM: str = "HS256"
+    JWT_PRIVATE_KEY_FILE: Optional[str] = None
+    # PEM keys still accepted after a rotation (e.g. the previous signing key), until their tokens expire
+    JWT_VERIFICATION_KEY_FILES: List[str] = []
+    JWKS_CACHE_SECONDS: int = 300
     
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     WORKERS: int = int(os.cpu_count() * 1.4)
+    # Recycle a worker after this many requests (plus random jitter) to bound memory growth; 0 disables
+    WORKER_MAX_REQUESTS: int = 10_000
+    WORKER_MAX_REQUESTS_JITTER: int = 1_000
+    # On SIGTERM, wait this long for in-flight requests before running shutdown
+    GRACEFUL_SHUTDOWN_SECONDS: int = 30
+    KEEP_ALIVE_SECONDS: int = 5
     ENVIRONMENT: str = "devlopment"
     
+    METRICS_ENABLED: bool = True
+    # Shared directory for per-worker snapshots when running several workers
+    METRICS_MULTIPROC_DIR: Optional[str] = None
+    METRICS_FLUSH_INTERVAL_SECONDS: float = 5.0
+    
+    # Connection budget for this host, split across WORKERS unless MONGO_MAX_POOL_SIZE is set
+    MONGO_MAX_CONNECTIONS: int = 200
+    MONGO_MAX_POOL_SIZE: Optional[int] = None
+    MONGO_MIN_POOL_SIZE: int = 2
+    MONGO_MAX_IDLE_TIME_MS: int = 300_000
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = 2_000
+    MONGO_CONNECT_TIMEOUT_MS: int = 5_000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5_000
+    MONGO_SOCKET_TIMEOUT_MS: Optional[int] = None
+    # Wire compression, e.g. ["zstd", "zlib"]; worth it when the database is across a WAN link
+    MONGO_COMPRESSORS: List[str] = []
+    # Open MONGO_MIN_POOL_SIZE connections before serving traffic
+    MONGO_PREWARM_POOL: bool = True
+    
+    # Read preference per query class (primary, primaryPreferred, secondary, secondaryPreferred, nearest).
+    # Only reads issued through db.routed_collection() are routed; auth and session checks use the primary.
+    MONGO_READ_PREFERENCES: Dict[str, str] = {"admin_listing": "secondaryPreferred", "export": "secondaryPreferred"}
+    # Read concern level per query class, e.g. {"export": "majority"}; server default otherwise
+    MONGO_READ_CONCERNS: Dict[str, str] = {}
+    # Skip secondaries lagging more than this (>= 90, or -1 for no limit)
+    MONGO_MAX_STALENESS_SECONDS: int = -1
+    
+    # Per-request deadline, applied to every Mongo call (maxTimeMS + socket timeouts) via pymongo.timeout;
+    # REQUEST_DEADLINES overrides it per path prefix, e.g. {"/api/v1/admin/": 30}
+    REQUEST_DEADLINE_SECONDS: float = 10.0
+    REQUEST_DEADLINES: Dict[str, float] = {}
+    # Reject requests with 503 for CIRCUIT_BREAKER_RESET_SECONDS after this many DB failures (timeouts,
+    # network errors, unreachable server) in the window, if they are at least this share of all commands
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_BREAKER_FAILURE_RATIO: float = 0.2
+    CIRCUIT_BREAKER_WINDOW_SECONDS: float = 10.0
+    CIRCUIT_BREAKER_RESET_SECONDS: float = 5.0
+    
+    MONGO_SLOW_QUERY_MS: float = 100.0
+    # Max Mongo commands per request; QUERY_BUDGETS overrides per route template (e.g. "/api/v1/admin/{user_id}")
+    QUERY_BUDGET_DEFAULT: int = 10
+    QUERY_BUDGETS: Dict[str, int] = {}
+    # Raise instead of warning when a request goes over budget (for test runs)
+    QUERY_BUDGET_STRICT: bool = False
+    QUERY_STATS_HEADER: bool = False
+    
+    # Send Server-Timing on every response; admins can opt in with X-Server-Timing
+    SERVER_TIMING_ENABLED: bool = False
+    
+    # On-demand profiling of single requests by admins
+    PROFILING_ENABLED: bool = False
+    PROFILER: str = "cprofile"  # or "pyinstrument" when installed
+    PROFILE_DIR: str = "logs/profiles"
+    PROFILE_MIN_INTERVAL_SECONDS: float = 60.0
+    
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.25
+    # Log the blocking stack when the loop misses a heartbeat by this much; the same stack is logged at
+    # WARNING at most once per LOOP_STALL_LOG_INTERVAL_SECONDS (repeats go to DEBUG and event_loop_stalls_total)
+    LOOP_STALL_THRESHOLD_MS: float = 200.0
+    LOOP_STALL_LOG_INTERVAL_SECONDS: float = 60.0
+    
+    # Threads hashing/verifying passwords off the event loop (each holds ARGON2_MEMORY_COST_KIB while hashing)
+    PASSWORD_HASH_WORKERS: int = 2
+    # Argon2id cost; `python -m app.cli calibrate-argon2` recommends values for the host.
+    # Existing hashes are upgraded to new values on their owner's next login.
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST_KIB: int = 65536
+    ARGON2_PARALLELISM: int = 4
+    
+    # LRU of parsed User-Agents; headers are truncated to USER_AGENT_MAX_LENGTH before parsing and caching
+    USER_AGENT_CACHE_SIZE: int = 4096
+    USER_AGENT_MAX_LENGTH: int = 500
+    # JSON {user_agent: device_info} preloaded at startup (python -m app.cli export-user-agents)
+    USER_AGENT_TABLE: Optional[str] = None
+    
+    # In-process jobs for post-response work (rehash, device parsing, audit); full queue drops new jobs
+    JOB_WORKERS: int = 2
+    JOB_QUEUE_SIZE: int = 1_000
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_SECONDS: float = 0.5
+    JOB_TIMEOUT_SECONDS: float = 30.0
+    # Time shutdown waits for queued jobs
+    JOB_DRAIN_SECONDS: float = 10.0
+    
+    # Proxies (addresses, CIDR ranges or "*") whose X-Forwarded-For / X-Real-IP give the client IP; the
+    # rightmost untrusted X-Forwarded-For hop is the client. Requests from any other peer use the peer address
+    TRUSTED_PROXIES: List[str] = ["127.0.0.1"]
+    
+    # Sliding-window quotas as (requests, seconds); 0 requests disables one. Per client IP (see
+    # TRUSTED_PROXIES) on everything but /health, /ready and /metrics, then per IP and path prefix
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PER_IP: Tuple[int, float] = (600, 60.0)
+    RATE_LIMIT_ROUTES: Dict[str, Tuple[int, float]] = {
+        "/api/v1/auth/login": (20, 60.0),
+        "/api/v1/auth/register": (10, 60.0),
+        "/api/v1/auth/refresh": (60, 60.0),
+    }
+    # Per authenticated user id, and failed logins per account and client IP (so others cannot lock an account)
+    RATE_LIMIT_PER_USER: Tuple[int, float] = (300, 60.0)
+    RATE_LIMIT_LOGIN_PER_ACCOUNT: Tuple[int, float] = (10, 300.0)
+    # Counters per limiter are spread over shards; the oldest keys go first beyond RATE_LIMIT_MAX_KEYS
+    RATE_LIMIT_SHARDS: int = 64
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    RATE_LIMIT_EVICT_INTERVAL_SECONDS: float = 60.0
+    # "memory" counts per worker (a quota allows up to WORKERS times as much per host);
+    # "mongo" merges all workers' counts every RATE_LIMIT_SYNC_INTERVAL_SECONDS
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_SYNC_INTERVAL_SECONDS: float = 1.0
+    
+    # Concurrent requests per worker, overall and per route class (ADMISSION_ROUTE_CLASSES maps path
+    # prefixes to classes, anything else is "api"). Beyond a limit requests queue, up to QUEUE_SIZE per
+    # class for at most QUEUE_TIMEOUT; the rest get an immediate 503. /health, /ready and /metrics bypass it
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_IN_FLIGHT: int = 200
+    ADMISSION_CLASS_LIMITS: Dict[str, int] = {"auth": 32, "admin": 8, "health": 2, "api": 128}
+    ADMISSION_ROUTE_CLASSES: Dict[str, str] = {
+        "/api/v1/auth/": "auth",
+        "/api/v1/admin/": "admin",
+        "/health/": "health",
+    }
+    ADMISSION_QUEUE_SIZE: int = 32
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 1.0
+    # Shed everything while the event loop lags this much (needs LOOP_MONITOR_ENABLED)
+    ADMISSION_MAX_LOOP_LAG_MS: float = 200.0
+    
+    # Background readiness prober: /ready is answered from its last result
+    READINESS_PROBE_INTERVAL_SECONDS: float = 2.0
+    READINESS_PROBE_TIMEOUT_SECONDS: float = 1.0
+    
+    # False skips index builds at boot; run `python -m app.cli build-indexes` on deploy instead
+    SYNC_INDEXES_ON_STARTUP: bool = True
+    
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    # Server preference; brotli/zstd are used only when installed (compression extra)
+    COMPRESSION_ENCODINGS: List[str] = ["zstd", "br", "gzip"]
+    COMPRESSION_LEVELS: Dict[str, int] = {"gzip": 5, "br": 4, "zstd": 1}
+    COMPRESSION_CONTENT_TYPES: List[str] = ["application/json", "text/", "application/javascript", "image/svg+xml"]
+    # Auth responses are small token payloads, not worth the CPU
+    COMPRESSION_EXCLUDED_PATHS: List[str] = ["/api/v1/auth/"]
+    
     class Config:
         env_file = ".env"
 
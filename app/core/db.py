@@ -1,48 +1,172 @@
-from typing import AsyncGenerator
-from motor.motor_asyncio import AsyncIOMotorClient
-from beanie import init_beanie
+from typing import AsyncGenerator, Dict, Optional, Tuple, Type
+import asyncio
+from datetime import timezone
+import logging
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo import UpdateOne
+from pymongo.read_concern import ReadConcern
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
+from pymongo.errors import BulkWriteError
+from beanie import Document, init_beanie
 from contextlib import asynccontextmanager
 from app.core.config import get_settings
+from app.core.metrics import MONGO_ROUTED_READS
+from app.core.mongo_monitor import MongoPoolListener, command_listener
 from app.models.user import User
 from app.models.role import Role
 from app.models.session import Session
-import pytz
+from app.models.user_agent import UserAgent
+from app.models.rate_limit import RateLimitCounter
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Query classes for routed_collection(); plain Beanie queries (auth, sessions, writes) stay on the primary
+READ_ADMIN_LISTING = "admin_listing"
+READ_EXPORT = "export"
 
 _client: AsyncIOMotorClient = None
 
-async def init_beanie_models():
+
+def pool_size() -> int:
+    if settings.MONGO_MAX_POOL_SIZE:
+        return settings.MONGO_MAX_POOL_SIZE
+    # Every worker process has its own pool; keep the host total under MONGO_MAX_CONNECTIONS
+    return max(settings.MONGO_MAX_CONNECTIONS // max(settings.WORKERS, 1), settings.MONGO_MIN_POOL_SIZE, 1)
+
+
+pool_listener = MongoPoolListener(max_pool_size=pool_size())
+
+
+def client_options() -> dict:
+    options = dict(
+        tz_aware=True,
+        tzinfo=timezone.utc,
+        maxPoolSize=pool_size(),
+        minPoolSize=min(settings.MONGO_MIN_POOL_SIZE, pool_size()),
+        maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+        waitQueueTimeoutMS=settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+        serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        socketTimeoutMS=settings.MONGO_SOCKET_TIMEOUT_MS,
+        event_listeners=[command_listener, pool_listener],
+    )
+    if settings.MONGO_COMPRESSORS:
+        options["compressors"] = settings.MONGO_COMPRESSORS
+    return options
+
+
+def get_client() -> AsyncIOMotorClient:
     global _client
     if _client is None:
-        _client = AsyncIOMotorClient(
-            settings.MONGO_URL,
-            tz_aware=True,
-            tzinfo=pytz.UTC
-            )
+        _client = AsyncIOMotorClient(settings.MONGO_URL, **client_options())
+    return _client
+
+
+async def prewarm_pool() -> int:
+    # Concurrent pings force the pool to open connections now instead of on the first requests
+    size = min(settings.MONGO_MIN_POOL_SIZE, pool_size())
+    if size <= 0:
+        return 0
+    database = get_client()[settings.MONGODB_NAME]
+    await asyncio.gather(*(database.command("ping") for _ in range(size)))
+    return size
+
+
+def close_client() -> None:
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+    _routed_collections.clear()
+
+
+def read_preference_name(query_class: str) -> str:
+    return settings.MONGO_READ_PREFERENCES.get(query_class, "primary")
+
+
+def _read_options(query_class: str) -> dict:
+    name = read_preference_name(query_class)
+    try:
+        mode = read_pref_mode_from_name(name)
+    except ValueError:
+        raise ValueError(f"Unknown read preference {name!r} for query class {query_class!r}") from None
+    options = {
+        "read_preference": make_read_preference(mode, None, settings.MONGO_MAX_STALENESS_SECONDS)
+    }
+    level = settings.MONGO_READ_CONCERNS.get(query_class)
+    if level:
+        options["read_concern"] = ReadConcern(level)
+    return options
+
+
+# Collection methods that send a read; each call counts once in mongo_routed_reads_total
+_READ_METHODS = frozenset({
+    "find", "find_one", "find_raw_batches", "count_documents", "estimated_document_count",
+    "distinct", "aggregate", "aggregate_raw_batches",
+})
+
+
+class RoutedCollection:
+    """A Motor collection with a query class's read options that counts every read issued through it."""
+
+    __slots__ = ("collection", "_reads")
+
+    def __init__(self, collection: AsyncIOMotorCollection, reads):
+        self.collection = collection
+        self._reads = reads
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.collection, name)
+        if name not in _READ_METHODS:
+            return attr
+        reads = self._reads
+
+        def counted(*args, **kwargs):
+            reads.inc()
+            return attr(*args, **kwargs)
+
+        return counted
+
+
+_routed_collections: Dict[Tuple[Type[Document], str], RoutedCollection] = {}
+
+
+def routed_collection(document_model: Type[Document], query_class: str) -> RoutedCollection:
+    """Motor collection of a Beanie model with the read preference/concern of a query class."""
+    key = (document_model, query_class)
+    collection = _routed_collections.get(key)
+    if collection is None:
+        collection = RoutedCollection(
+            document_model.get_motor_collection().with_options(**_read_options(query_class)),
+            MONGO_ROUTED_READS.labels(query_class, read_preference_name(query_class)),
+        )
+        _routed_collections[key] = collection
+    return collection
+
+
+async def init_beanie_models(sync_indexes: Optional[bool] = None):
+    if sync_indexes is None:
+        sync_indexes = settings.SYNC_INDEXES_ON_STARTUP
+    # Fail at boot, not on the first routed read, when a read preference or concern is misspelled
+    for query_class in {*settings.MONGO_READ_PREFERENCES, *settings.MONGO_READ_CONCERNS}:
+        _read_options(query_class)
+    _routed_collections.clear()
     
     await init_beanie(
-        database=_client[settings.MONGODB_NAME],
-        document_models=[Role, User, Session]
+        database=get_client()[settings.MONGODB_NAME],
+        document_models=[Role, User, Session, UserAgent, RateLimitCounter],
+        skip_indexes=not sync_indexes
     )
 
 async def get_database():
-    global _client
-    if _client is None:
-        _client = AsyncIOMotorClient(settings.MONGO_URL)
-
-    return _client[settings.MONGODB_NAME]
+    return get_client()[settings.MONGODB_NAME]
 
 @asynccontextmanager
 async def get_db_client() -> AsyncGenerator[AsyncIOMotorClient, None]:
-    global _client
-    if _client is None:
-        _client = AsyncIOMotorClient(settings.MONGO_URL)
-    
-    try:
-        yield _client
-    finally:
-        pass
+    yield get_client()
 
 async def get_beanie_session() -> AsyncGenerator[None, None]:
     yield
@@ -67,6 +191,23 @@ async def create_default_roles():
             permissions=["*"]
         ),
     ]
-    for role in roles:
-        if not await Role.find_one(Role.name == role.name):
-            await role.insert()
\ No newline at end of file
+    # One idempotent round trip: insert missing roles, never touch existing ones
+    operations = [
+        UpdateOne(
+            {"name": role.name},
+            {"$setOnInsert": role.model_dump(by_alias=True, exclude={"revision_id"})},
+            upsert=True
+        )
+        for role in roles
+    ]
+    try:
+        result = await Role.get_motor_collection().bulk_write(operations, ordered=False)
+        upserted = result.upserted_count
+    except BulkWriteError as e:
+        # Another worker inserted the same role concurrently (unique index on name)
+        if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details["writeErrors"]):
+            raise
+        upserted = e.details["nUpserted"]
+    if upserted:
+        logger.info(f"Created {upserted} default roles")
+    return upserted
\ No newline at end of file
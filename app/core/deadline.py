@@ -0,0 +1,14 @@
+"""Per-request deadline shared by the deadline middleware and code that waits on other services."""
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+# Absolute time.monotonic() value; None outside a request
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def remaining_time() -> Optional[float]:
+    deadline = request_deadline.get()
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
@@ -2,6 +2,11 @@ from fastapi import FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 import logging
+from pymongo.errors import ConnectionFailure, PyMongoError, ServerSelectionTimeoutError
+
+from app.core.circuit_breaker import db_circuit
+from app.core.metrics import REQUEST_DEADLINE_EXCEEDED
+from app.middleware.metrics import route_template
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +22,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
             "code": exc.status_code,
             "message": exc.detail,
             "data": None
-        }
+        },
+        headers=exc.headers,
     )
 
 
@@ -52,7 +58,34 @@ async def general_exception_handler(request: Request, exc: Exception):
     )
 
 
+async def database_exception_handler(request: Request, exc: PyMongoError):
+    unreachable = isinstance(exc, ServerSelectionTimeoutError) or (
+        isinstance(exc, ConnectionFailure) and not exc.timeout
+    )
+    if not (unreachable or exc.timeout):
+        return await general_exception_handler(request, exc)
+
+    if isinstance(exc, ServerSelectionTimeoutError):
+        # No command was sent, so the command listener never saw this one
+        db_circuit.record_failure()
+    if unreachable:
+        logger.error(f"Database unavailable: {exc} - Path: {request.url.path} - Method: {request.method}")
+        return JSONResponse(
+            status_code=503,
+            content={"code": 503, "message": "Database unavailable", "data": None},
+            headers={"Retry-After": str(db_circuit.retry_after)},
+        )
+
+    REQUEST_DEADLINE_EXCEEDED.labels(route_template(request)).inc()
+    logger.warning(f"Database operation timed out: {exc} - Path: {request.url.path} - Method: {request.method}")
+    return JSONResponse(
+        status_code=504,
+        content={"code": 504, "message": "Request timed out", "data": None}
+    )
+
+
 def setup_exception_handlers(app: FastAPI):
     app.add_exception_handler(HTTPException, http_exception_handler)
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    app.add_exception_handler(PyMongoError, database_exception_handler)
     app.add_exception_handler(Exception, general_exception_handler)
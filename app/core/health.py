@@ -1,10 +1,95 @@
-from fastapi import Request, HTTPException
-from app.core.db import get_database
+from fastapi import Depends, Request, HTTPException
+import asyncio
+import logging
+import time
+from typing import Optional
+import pymongo
+
+from app.core.admission import admission
+from app.core.circuit_breaker import OPEN, db_circuit
+from app.core.db import get_database, pool_listener
+from app.core.jobs import jobs
+from app.core.rate_limit import rate_limits
 from app.core.config import get_settings
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import CACHE_REQUESTS
+from app.dependencies import require_admin
+from app.utils.password import hash_pool
 from datetime import datetime, timezone
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
+
+class ReadinessProber:
+    """Pings MongoDB in the background so /ready is answered from memory."""
+
+    def __init__(self, interval: float, timeout: float):
+        self.interval = interval
+        self.timeout = timeout
+        self.ready = False
+        self.latency_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_checked: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_ready(self) -> bool:
+        # A prober that stopped reporting must not keep the worker in rotation
+        fresh = self.last_checked is not None and time.monotonic() - self.last_checked < self.interval * 3
+        return self.ready and fresh and db_circuit.state != OPEN
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self.ready = False
+
+    async def probe(self) -> None:
+        start = time.perf_counter()
+        try:
+            db = await get_database()
+            with pymongo.timeout(self.timeout):
+                await db.command("ping")
+        except Exception as e:
+            if self.ready or self.last_checked is None:
+                logger.warning(f"Readiness probe failed: {e}")
+            self.ready = False
+            self.last_error = str(e)
+        else:
+            if not self.ready and self.last_error:
+                logger.info("Readiness probe recovered")
+            self.ready = True
+            self.latency_ms = (time.perf_counter() - start) * 1000
+            self.last_error = None
+        self.last_checked = time.monotonic()
+
+    async def _run(self) -> None:
+        # lifespan runs the first probe before serving
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.probe()
+
+
+readiness_prober = ReadinessProber(
+    interval=settings.READINESS_PROBE_INTERVAL_SECONDS,
+    timeout=settings.READINESS_PROBE_TIMEOUT_SECONDS,
+)
+
+
+def cache_stats() -> dict:
+    caches = {}
+    for (cache, result), value in CACHE_REQUESTS.snapshot():
+        caches.setdefault(cache, {"hit": 0, "miss": 0})[result] = value
+    for stats in caches.values():
+        lookups = stats["hit"] + stats["miss"]
+        stats["hit_ratio"] = round(stats["hit"] / lookups, 4) if lookups else None
+    return caches
+
+
 async def health_check():
     return {
         "status": "healthy",
@@ -13,16 +98,39 @@ async def health_check():
     }
 
 async def readiness_check():
-    try:
-        db = await get_database()
-        await db.command("ping")
-        return {"status": "ready"}
-    except Exception:
+    if not readiness_prober.is_ready:
         raise HTTPException(status_code=503, detail="Database not ready")
+    return {"status": "ready"}
+
+async def health_details(_=Depends(require_admin)):
+    last_checked = readiness_prober.last_checked
+    return {
+        "status": "ready" if readiness_prober.is_ready else "not_ready",
+        "version": settings.VERSION,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "database": {
+            "ready": readiness_prober.ready,
+            "ping_ms": readiness_prober.latency_ms,
+            "checked_seconds_ago": round(time.monotonic() - last_checked, 3) if last_checked else None,
+            "last_error": readiness_prober.last_error,
+            "circuit": db_circuit.state,
+        },
+        "pool": pool_listener.stats(),
+        "event_loop": {"lag_ms": round(loop_monitor.current_lag * 1000, 3)},
+        "caches": cache_stats(),
+        "password_hashing": {"queue_depth": hash_pool.queue_depth, "workers": hash_pool.workers},
+        "background_jobs": {"queue_depth": jobs.queue_depth, "workers": jobs.workers, "running": jobs.running},
+        "rate_limits": {
+            "backend": rate_limits.backend,
+            "tracked_keys": {name: len(limiter) for name, limiter in rate_limits.limiters.items()},
+        },
+        "admission": admission.stats(),
+    }
 
 def setup_health_endpoints(app):
     app.get("/health")(health_check)
     app.get("/ready")(readiness_check)
+    app.get("/health/details", tags=["admin"])(health_details)
     @app.get("/", tags=["root"])
     def root(request: Request):
         return {
@@ -33,4 +141,4 @@ def setup_health_endpoints(app):
             "health": "/health",
             "ready": "/ready",
             "client_ip": request.client.host,
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,108 @@
+"""In-process background jobs for work that can finish after the response is sent."""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import pymongo
+
+from app.core.config import get_settings
+from app.core.metrics import BACKGROUND_JOBS, BACKGROUND_JOB_DURATION, BACKGROUND_JOB_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+Job = Tuple[str, Callable[..., Awaitable[object]], tuple, dict]
+
+
+class JobRunner:
+    """A bounded queue drained by a few worker tasks. When the queue is full, new jobs are
+    dropped instead of making the request wait: only submit work that can be lost (or is redone later)."""
+
+    def __init__(self, workers: int, max_queue: int, max_attempts: int, retry_backoff: float, timeout: float):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker(), name=f"job-worker-{i}") for i in range(self.workers)]
+
+    def submit(self, name: str, fn: Callable[..., Awaitable[object]], *args, **kwargs) -> bool:
+        if not self.running:
+            BACKGROUND_JOBS.labels(name, "dropped").inc()
+            logger.warning(f"Job runner not started, dropped {name}")
+            return False
+        try:
+            self._queue.put_nowait((name, fn, args, kwargs))
+        except asyncio.QueueFull:
+            BACKGROUND_JOBS.labels(name, "dropped").inc()
+            logger.warning(f"Job queue full ({self.max_queue}), dropped {name}")
+            return False
+        BACKGROUND_JOB_QUEUE_DEPTH.set(self._queue.qsize())
+        return True
+
+    async def drain(self, timeout: float) -> None:
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except TimeoutError:
+            logger.warning(f"Job queue not drained in {timeout:.0f}s, abandoning {self._queue.qsize()} jobs")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+                BACKGROUND_JOB_QUEUE_DEPTH.set(self._queue.qsize())
+
+    async def _run(self, job: Job) -> None:
+        name, fn, args, kwargs = job
+        for attempt in range(1, self.max_attempts + 1):
+            start = time.perf_counter()
+            try:
+                # Jobs run outside any request deadline; bound their Mongo calls separately
+                with pymongo.timeout(self.timeout):
+                    await fn(*args, **kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                BACKGROUND_JOB_DURATION.labels(name).observe(time.perf_counter() - start)
+                if attempt == self.max_attempts:
+                    BACKGROUND_JOBS.labels(name, "failed").inc()
+                    logger.error(f"Job {name} failed after {attempt} attempts: {e}")
+                    return
+                BACKGROUND_JOBS.labels(name, "retried").inc()
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            else:
+                BACKGROUND_JOB_DURATION.labels(name).observe(time.perf_counter() - start)
+                BACKGROUND_JOBS.labels(name, "succeeded").inc()
+                return
+
+
+jobs = JobRunner(
+    workers=settings.JOB_WORKERS,
+    max_queue=settings.JOB_QUEUE_SIZE,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    retry_backoff=settings.JOB_RETRY_BACKOFF_SECONDS,
+    timeout=settings.JOB_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,22 @@
+"""Public token signing keys, for services that verify our JWTs themselves."""
+from fastapi import FastAPI, Request, Response
+
+from app.core.config import get_settings
+from app.utils.auth import key_ring, load_keys
+from app.utils.etag import compute_etag, etag_matches
+
+settings = get_settings()
+
+
+async def jwks_endpoint(request: Request):
+    ring = key_ring if key_ring.loaded else load_keys()
+    # Keys only change on restart: verifiers may cache the set and revalidate it cheaply
+    etag = compute_etag(ring.jwks)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={settings.JWKS_CACHE_SECONDS}"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(ring.jwks, media_type="application/json", headers=headers)
+
+
+def setup_jwks_endpoint(app: FastAPI):
+    app.get("/.well-known/jwks.json", include_in_schema=False)(jwks_endpoint)
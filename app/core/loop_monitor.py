@@ -0,0 +1,122 @@
+"""Event-loop lag monitor with a watchdog thread that logs the stack of blocking calls."""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.metrics import EVENT_LOOP_LAG, EVENT_LOOP_LAG_HISTOGRAM, EVENT_LOOP_STALLS
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Distinct stacks remembered for log deduplication before old ones are dropped
+MAX_STALL_SIGNATURES = 256
+
+
+class EventLoopMonitor:
+    def __init__(self, interval: float, stall_threshold: float, log_interval: float = 0.0):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.log_interval = log_interval
+        self.current_lag = 0.0
+        # Stack signature -> [last logged at WARNING, stalls since]; only touched by the watchdog thread
+        self._logged_stacks: Dict[Tuple, List] = {}
+        self._last_beat = time.monotonic()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._watchdog:
+            await asyncio.to_thread(self._watchdog.join, self.interval * 2)
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - start - self.interval, 0.0)
+            self.current_lag = lag
+            self._last_beat = time.monotonic()
+            EVENT_LOOP_LAG.set(lag)
+            EVENT_LOOP_LAG_HISTOGRAM.observe(lag)
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stopped.wait(self.interval / 2):
+            last_beat = self._last_beat
+            stalled_for = time.monotonic() - last_beat - self.interval
+            # Report each stall once, while the offending call is still on the stack
+            if stalled_for < self.stall_threshold or reported_beat == last_beat:
+                continue
+            reported_beat = last_beat
+            EVENT_LOOP_STALLS.inc()
+            self._report_stall(stalled_for)
+
+    def _report_stall(self, stalled_for: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        summary = traceback.extract_stack(frame) if frame else traceback.StackSummary()
+        task = None
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            pass
+        current = f"{task.get_name()} {task.get_coro()!r}" if task else "<callback>"
+
+        repeats = self._repeats_since_logged(summary)
+        if repeats is None:
+            where = f"{summary[-1].filename}:{summary[-1].lineno}" if summary else "<no frame>"
+            logger.debug(
+                f"Event loop blocked for {stalled_for * 1000:.0f}ms+ in {current} at {where} (stack already logged)"
+            )
+            return
+        stack = "".join(summary.format()) if summary else "<no frame>"
+        seen = f", {repeats} more times since last logged" if repeats else ""
+        logger.warning(
+            f"Event loop blocked for {stalled_for * 1000:.0f}ms+ in {current}{seen}\n{stack}"
+        )
+
+    def _repeats_since_logged(self, summary: traceback.StackSummary) -> Optional[int]:
+        """None when this stack was logged within log_interval, else the stalls it had since it was."""
+        # Call sites, and only the function for the innermost frame: a busy loop moves between its lines
+        signature = tuple((f.filename, f.lineno, f.name) for f in summary[:-1])
+        signature += tuple((f.filename, f.name) for f in summary[-1:])
+        now = time.monotonic()
+        entry = self._logged_stacks.get(signature)
+        if entry is not None and now - entry[0] < self.log_interval:
+            entry[1] += 1
+            return None
+        if entry is None and len(self._logged_stacks) >= MAX_STALL_SIGNATURES:
+            cutoff = now - self.log_interval
+            self._logged_stacks = {sig: e for sig, e in self._logged_stacks.items() if e[0] >= cutoff}
+            if len(self._logged_stacks) >= MAX_STALL_SIGNATURES:
+                self._logged_stacks.clear()
+        repeats = entry[1] if entry is not None else 0
+        self._logged_stacks[signature] = [now, 0]
+        return repeats
+
+
+loop_monitor = EventLoopMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL_SECONDS,
+    stall_threshold=settings.LOOP_STALL_THRESHOLD_MS / 1000,
+    log_interval=settings.LOOP_STALL_LOG_INTERVAL_SECONDS,
+)
@@ -0,0 +1,430 @@
+"""In-process metrics registry exposed at /metrics in Prometheus text format."""
+import asyncio
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "bucket_counts", "sum", "count", "_lock")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.bucket_counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.bucket_counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class _Metric(ABC):
+    type = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional["MetricsRegistry"] = None,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    @abstractmethod
+    def _new_child(self):
+        ...
+
+    def labels(self, *values: str):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels()
+
+    @abstractmethod
+    def snapshot(self) -> List[list]:
+        ...
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def snapshot(self) -> List[list]:
+        return [[list(key), child.value] for key, child in list(self._children.items())]
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, *args, multiprocess_mode: str = "sum", **kwargs):
+        if multiprocess_mode not in ("sum", "max", "min"):
+            raise ValueError(f"Unsupported multiprocess_mode: {multiprocess_mode}")
+        self.multiprocess_mode = multiprocess_mode
+        super().__init__(*args, **kwargs)
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().dec(amount)
+
+    def snapshot(self) -> List[list]:
+        return [[list(key), child.value] for key, child in list(self._children.items())]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        self.upper_bounds = tuple(sorted(float(b) for b in buckets))
+        super().__init__(*args, **kwargs)
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def snapshot(self) -> List[list]:
+        return [
+            [list(key), {"buckets": list(child.bucket_counts), "sum": child.sum, "count": child.count}]
+            for key, child in list(self._children.items())
+        ]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+
+    def snapshot(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "metrics": {name: metric.snapshot() for name, metric in self._metrics.items()},
+        }
+
+    def write_snapshot(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def collect(self, directory: Optional[str] = None) -> str:
+        if not directory:
+            return self._render([self.snapshot()], live_pids=None)
+
+        self.write_snapshot(directory)
+        snapshots = []
+        for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.debug(f"Skipping unreadable metrics snapshot {path}: {e}")
+        live_pids = {s["pid"] for s in snapshots if _pid_alive(s["pid"])}
+        return self._render(snapshots, live_pids)
+
+    def _render(self, snapshots: List[dict], live_pids: Optional[set]) -> str:
+        lines: List[str] = []
+        for name, metric in self._metrics.items():
+            merged: Dict[Tuple[str, ...], object] = {}
+            for snap in snapshots:
+                # Gauges describe the current state of a process, so dead workers drop out
+                if metric.type == "gauge" and live_pids is not None and snap["pid"] not in live_pids:
+                    continue
+                for key, value in snap["metrics"].get(name, []):
+                    _merge_sample(metric, merged, tuple(key), value)
+
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for key, value in sorted(merged.items()):
+                labels = list(zip(metric.labelnames, key))
+                if metric.type == "histogram":
+                    cumulative = 0
+                    for bound, bucket_count in zip(metric.upper_bounds, value["buckets"]):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{_format_labels(labels + [('le', _format_value(bound))])} {cumulative}")
+                    cumulative += value["buckets"][-1]
+                    lines.append(f"{name}_bucket{_format_labels(labels + [('le', '+Inf')])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _merge_sample(metric: _Metric, merged: dict, key: Tuple[str, ...], value) -> None:
+    current = merged.get(key)
+    if current is None:
+        merged[key] = {**value, "buckets": list(value["buckets"])} if metric.type == "histogram" else value
+    elif metric.type == "histogram":
+        current["buckets"] = [a + b for a, b in zip(current["buckets"], value["buckets"])]
+        current["sum"] += value["sum"]
+        current["count"] += value["count"]
+    elif metric.type == "gauge" and metric.multiprocess_mode == "max":
+        merged[key] = max(current, value)
+    elif metric.type == "gauge" and metric.multiprocess_mode == "min":
+        merged[key] = min(current, value)
+    else:
+        merged[key] = current + value
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _format_labels(labels: List[Tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels) + "}"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"]
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being processed"
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency",
+    ["collection", "command"], buckets=FAST_BUCKETS,
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "mongo_command_failures_total", "MongoDB commands that failed", ["collection", "command"]
+)
+MONGO_QUERIES_PER_REQUEST = Histogram(
+    "mongo_queries_per_request", "MongoDB commands issued per HTTP request",
+    ["route"], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+MONGO_POOL_CHECKOUT_WAIT = Histogram(
+    "mongo_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+    ["address"], buckets=FAST_BUCKETS,
+)
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    "mongo_pool_checkout_failures_total", "Connection checkouts that failed", ["address", "reason"]
+)
+MONGO_POOL_CONNECTIONS = Gauge(
+    "mongo_pool_connections", "Open pooled connections", ["address"]
+)
+MONGO_POOL_CHECKED_OUT = Gauge(
+    "mongo_pool_checked_out_connections", "Pooled connections currently in use", ["address"]
+)
+MONGO_POOL_SATURATION = Gauge(
+    "mongo_pool_saturation_ratio", "Checked-out connections / maxPoolSize",
+    ["address"], multiprocess_mode="max",
+)
+MONGO_ROUTED_READS = Counter(
+    "mongo_routed_reads_total", "Reads routed by query class", ["query_class", "read_preference"]
+)
+MONGO_CIRCUIT_STATE = Gauge(
+    "mongo_circuit_state", "MongoDB circuit breaker state (0 closed, 1 open, 2 half-open)",
+    multiprocess_mode="max",
+)
+REQUEST_DEADLINE_EXCEEDED = Counter(
+    "http_request_deadline_exceeded_total", "Requests failed because their deadline passed", ["route"]
+)
+REQUESTS_REJECTED = Counter(
+    "http_requests_rejected_total", "Requests rejected before reaching a handler", ["reason"]
+)
+RATE_LIMITED = Counter(
+    "rate_limited_total", "Requests answered 429 by a rate limit", ["limit"]
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight", "Requests holding an admission slot", ["route_class"]
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth", "Requests waiting for an admission slot", ["route_class"]
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    "admission_queue_wait_seconds", "Time queued requests waited for an admission slot",
+    ["route_class"], buckets=FAST_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups by result (hit/miss)", ["cache", "result"]
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "argon2_duration_seconds", "Argon2 hash/verify latency", ["operation"], buckets=FAST_BUCKETS,
+)
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "argon2_queue_depth", "Argon2 hash/verify jobs submitted to the hashing pool and not finished"
+)
+PASSWORD_REHASHES = Counter(
+    "argon2_rehashes_total", "Password hashes upgraded to the current argon2 parameters at login"
+)
+BACKGROUND_JOBS = Counter(
+    "background_jobs_total", "Background jobs by outcome (succeeded/retried/failed/dropped)", ["job", "result"]
+)
+BACKGROUND_JOB_DURATION = Histogram(
+    "background_job_duration_seconds", "Background job attempt latency", ["job"], buckets=FAST_BUCKETS,
+)
+BACKGROUND_JOB_QUEUE_DEPTH = Gauge(
+    "background_job_queue_depth", "Background jobs waiting for a worker"
+)
+EVENT_LOOP_LAG = Gauge(
+    "event_loop_lag_seconds", "Most recent event loop scheduling delay", multiprocess_mode="max",
+)
+EVENT_LOOP_LAG_HISTOGRAM = Histogram(
+    "event_loop_lag_distribution_seconds", "Event loop scheduling delay samples", buckets=FAST_BUCKETS,
+)
+EVENT_LOOP_STALLS = Counter(
+    "event_loop_stalls_total", "Times the loop was blocked longer than the stall threshold"
+)
+
+
+async def _flush_snapshots(directory: str, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            REGISTRY.write_snapshot(directory)
+        except OSError as e:
+            logger.warning(f"Failed to write metrics snapshot: {e}")
+
+
+def start_metrics_tasks() -> List[asyncio.Task]:
+    if not settings.METRICS_ENABLED:
+        return []
+    tasks = []
+    if settings.METRICS_MULTIPROC_DIR:
+        tasks.append(asyncio.create_task(
+            _flush_snapshots(settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_INTERVAL_SECONDS)
+        ))
+    return tasks
+
+
+async def stop_metrics_tasks(tasks: List[asyncio.Task]) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if settings.METRICS_ENABLED and settings.METRICS_MULTIPROC_DIR:
+        REGISTRY.write_snapshot(settings.METRICS_MULTIPROC_DIR)
+
+
+async def metrics_endpoint():
+    body = REGISTRY.collect(settings.METRICS_MULTIPROC_DIR)
+    return PlainTextResponse(body, media_type=CONTENT_TYPE_LATEST)
+
+
+def setup_metrics_endpoint(app: FastAPI):
+    if settings.METRICS_ENABLED:
+        app.get("/metrics", include_in_schema=False)(metrics_endpoint)
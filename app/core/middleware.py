@@ -1,7 +1,22 @@
 from fastapi.middleware.cors import CORSMiddleware
 from app.middleware.http_logger import HTTPLoggerMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.query_budget import QueryBudgetMiddleware
+from app.middleware.profiler import ProfilingMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.deadline import DeadlineMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.admission import AdmissionMiddleware
+from app.core.config import get_settings
+
+settings = get_settings()
 
 def setup_middleware(app):
+    # Innermost: deadline/circuit-breaker responses still get CORS, logging and metrics
+    app.add_middleware(DeadlineMiddleware)
+    # Outside the deadline: throttled requests are answered before any per-request setup
+    if settings.RATE_LIMIT_ENABLED:
+        app.add_middleware(RateLimitMiddleware)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],  # TODO: Restrict in production
@@ -9,4 +24,21 @@ def setup_middleware(app):
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            levels=settings.COMPRESSION_LEVELS,
+            preference=settings.COMPRESSION_ENCODINGS,
+            content_types=settings.COMPRESSION_CONTENT_TYPES,
+            excluded_paths=settings.COMPRESSION_EXCLUDED_PATHS,
+        )
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(ProfilingMiddleware)
+    app.add_middleware(QueryBudgetMiddleware)
+    # Shed load before the other layers, just inside the access log and request metrics so 503s show up in both
+    if settings.ADMISSION_ENABLED:
+        app.add_middleware(AdmissionMiddleware)
     app.add_middleware(HTTPLoggerMiddleware)
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
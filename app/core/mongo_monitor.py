@@ -0,0 +1,208 @@
+"""pymongo monitoring: command latency, slow-query log, per-request query counts and pool usage."""
+import logging
+import threading
+from collections import Counter as TallyCounter
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import monitoring
+
+from app.core.circuit_breaker import db_circuit
+from app.core.config import get_settings
+from app.core.metrics import (
+    MONGO_COMMAND_DURATION,
+    MONGO_COMMAND_FAILURES,
+    MONGO_POOL_CHECKED_OUT,
+    MONGO_POOL_CHECKOUT_FAILURES,
+    MONGO_POOL_CHECKOUT_WAIT,
+    MONGO_POOL_CONNECTIONS,
+    MONGO_POOL_SATURATION,
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Commands whose first value is not a collection name
+_DATABASE_COMMANDS = {"ping", "hello", "ismaster", "isMaster", "buildInfo", "endSessions", "saslStart", "saslContinue"}
+
+# Failures that say the server is unhealthy, not the query wrong: network errors and timeouts (errtype,
+# for errors raised on the client) and server codes for timeouts, shutdown and primary stepdown
+_UNHEALTHY_ERRTYPES = {"AutoReconnect", "ConnectionFailure", "NetworkTimeout", "NotPrimaryError"}
+_UNHEALTHY_CODES = {6, 7, 50, 89, 91, 189, 262, 9001, 10107, 11600, 11602, 13435, 13436}
+
+
+def is_unhealthy_failure(failure: Any) -> bool:
+    if not isinstance(failure, dict):
+        return False
+    return failure.get("errtype") in _UNHEALTHY_ERRTYPES or failure.get("code") in _UNHEALTHY_CODES
+
+
+class RequestQueryStats:
+    __slots__ = ("count", "by_command", "_lock")
+
+    def __init__(self):
+        self.count = 0
+        self.by_command: TallyCounter = TallyCounter()
+        self._lock = threading.Lock()
+
+    def record(self, collection: str, command_name: str) -> None:
+        with self._lock:
+            self.count += 1
+            self.by_command[f"{command_name}:{collection}" if collection else command_name] += 1
+
+
+# Set per request by QueryBudgetMiddleware; Motor copies the context into its executor threads
+request_query_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def command_collection(command_name: str, command: dict) -> str:
+    if command_name in _DATABASE_COMMANDS:
+        return ""
+    if command_name == "getMore":
+        return str(command.get("collection", ""))
+    target = command.get(command_name)
+    return target if isinstance(target, str) else ""
+
+
+def command_filter(command_name: str, command: dict) -> Any:
+    if command_name in ("find", "count", "distinct", "findAndModify"):
+        return command.get("filter", command.get("query"))
+    if command_name == "aggregate":
+        return command.get("pipeline")
+    if command_name in ("update", "delete"):
+        statements = command.get("updates") or command.get("deletes") or []
+        return [statement.get("q") for statement in statements[:1]]
+    return None
+
+
+def filter_shape(value: Any) -> Any:
+    # Keep keys and operators, drop literal values so logs carry no user data
+    if isinstance(value, dict):
+        return {k: filter_shape(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [filter_shape(v) for v in value[:3]]
+    return "?"
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    def __init__(self):
+        self._pending: Dict[Tuple[object, int], Tuple[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        collection = command_collection(event.command_name, event.command)
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (
+                collection, command_filter(event.command_name, event.command)
+            )
+        stats = request_query_stats.get()
+        if stats is not None:
+            stats.record(collection, event.command_name)
+
+    def _pop_pending(self, event) -> Tuple[str, Any]:
+        with self._lock:
+            return self._pending.pop((event.connection_id, event.request_id), ("", None))
+
+    def _observe(self, event, collection: str, query_filter: Any) -> None:
+        duration_ms = event.duration_micros / 1000
+        MONGO_COMMAND_DURATION.labels(collection, event.command_name).observe(duration_ms / 1000)
+        if duration_ms >= settings.MONGO_SLOW_QUERY_MS:
+            logger.warning(
+                f"Slow Mongo command: {event.command_name} on {collection or event.database_name} "
+                f"took {duration_ms:.1f}ms, filter={filter_shape(query_filter)}"
+            )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        collection, query_filter = self._pop_pending(event)
+        self._observe(event, collection, query_filter)
+        db_circuit.record_success()
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        collection, query_filter = self._pop_pending(event)
+        self._observe(event, collection, query_filter)
+        MONGO_COMMAND_FAILURES.labels(collection, event.command_name).inc()
+        if is_unhealthy_failure(event.failure):
+            db_circuit.record_failure()
+
+
+command_listener = MongoCommandListener()
+
+
+def _address(address) -> str:
+    host, port = address
+    return f"{host}:{port}"
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """Connection counts, checkout wait and saturation per server pool."""
+
+    def __init__(self, max_pool_size: int):
+        self.max_pool_size = max_pool_size
+        self._open: TallyCounter = TallyCounter()
+        self._checked_out: TallyCounter = TallyCounter()
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                address: {
+                    "open": self._open[address],
+                    "checked_out": self._checked_out[address],
+                    "max_pool_size": self.max_pool_size,
+                    "saturation": self._checked_out[address] / self.max_pool_size,
+                }
+                for address in self._open
+            }
+
+    def _update(self, address: str, opened: int = 0, checked_out: int = 0) -> None:
+        with self._lock:
+            self._open[address] += opened
+            self._checked_out[address] += checked_out
+            in_use = self._checked_out[address]
+        if opened:
+            MONGO_POOL_CONNECTIONS.labels(address).inc(opened)
+        if checked_out:
+            MONGO_POOL_CHECKED_OUT.labels(address).inc(checked_out)
+            MONGO_POOL_SATURATION.labels(address).set(in_use / self.max_pool_size)
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        address = _address(event.address)
+        MONGO_POOL_CHECKOUT_WAIT.labels(address).observe(event.duration or 0.0)
+        self._update(address, checked_out=1)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        self._update(_address(event.address), checked_out=-1)
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        address = _address(event.address)
+        MONGO_POOL_CHECKOUT_WAIT.labels(address).observe(event.duration or 0.0)
+        MONGO_POOL_CHECKOUT_FAILURES.labels(address, event.reason).inc()
+        if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+            logger.warning(
+                f"Mongo pool exhausted on {address}: waited {(event.duration or 0.0) * 1000:.0f}ms "
+                f"(maxPoolSize={self.max_pool_size})"
+            )
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        self._update(_address(event.address), opened=1)
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        self._update(_address(event.address), opened=-1)
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        logger.warning(f"Mongo connection pool cleared for {_address(event.address)}")
+
+    def pool_closed(self, event) -> None:
+        pass
@@ -0,0 +1,247 @@
+"""Sliding-window rate limits kept in process memory, optionally shared by all workers through MongoDB."""
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+import pymongo
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from app.core.config import get_settings
+from app.core.metrics import RATE_LIMITED
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Counter entry: [window index, previous window count, current window count, count not yet synced]
+_WINDOW, _PREVIOUS, _CURRENT, _PENDING = range(4)
+
+
+class SlidingWindowLimiter:
+    """`limit` requests per `period` seconds per key. The count is estimated from the current fixed
+    window plus the previous one, weighted by how much of it still overlaps the sliding window.
+
+    Counters are spread over power-of-two shards by hash(key). Only the event loop touches them, so a
+    check is one dict lookup and a few float operations without a lock, and eviction sweeps one shard
+    at a time instead of pausing on every key. Windows follow wall-clock time so workers agree on them.
+    """
+
+    def __init__(self, name: str, limit: int, period: float, shards: int = 64, max_keys: int = 100_000):
+        self.name = name
+        self.limit = limit
+        self.period = period
+        shards = 1 << max(shards - 1, 0).bit_length()
+        self._mask = shards - 1
+        self._shards: List[Dict[str, list]] = [{} for _ in range(shards)]
+        self._max_per_shard = max(max_keys // shards, 1)
+        self._next_shard = 0
+        # Keys with unsynced counts; None unless counts are shared through MongoDB
+        self._dirty: Optional[set] = None
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    @property
+    def shards(self) -> int:
+        return len(self._shards)
+
+    def hit(self, key: str, now: Optional[float] = None, cost: int = 1) -> float:
+        """Count `cost` requests for key (0 only checks). Returns 0 when allowed, else the seconds to wait."""
+        if now is None:
+            now = time.time()
+        position = now / self.period
+        window = int(position)
+        shard = self._shards[hash(key) & self._mask]
+        entry = shard.get(key)
+        if entry is None:
+            if not cost:
+                return 0.0
+            if len(shard) >= self._max_per_shard:
+                # Flooded with keys (e.g. spoofed IPs): forget the oldest one rather than grow
+                del shard[next(iter(shard))]
+            entry = shard[key] = [window, 0, 0, 0]
+        elif entry[_WINDOW] != window:
+            entry[_PREVIOUS] = entry[_CURRENT] if entry[_WINDOW] == window - 1 else 0
+            entry[_CURRENT] = 0
+            entry[_WINDOW] = window
+        elapsed = position - window
+        if entry[_PREVIOUS] * (1 - elapsed) + entry[_CURRENT] >= self.limit:
+            return self._retry_after(entry, elapsed)
+        if cost:
+            entry[_CURRENT] += cost
+            if self._dirty is not None:
+                entry[_PENDING] += cost
+                self._dirty.add(key)
+        return 0.0
+
+    def _retry_after(self, entry: list, elapsed: float) -> float:
+        previous, current = entry[_PREVIOUS], entry[_CURRENT]
+        if current >= self.limit:
+            # Wait for the next window, then until enough of this one has slid out of it
+            needed = 1 - elapsed + 1 - self.limit / current
+        else:
+            needed = 1 - (self.limit - current) / previous - elapsed
+        return max(needed * self.period, 0.001)
+
+    def evict(self, now: Optional[float] = None) -> int:
+        # Sweep the next shard for keys idle in both windows (and with nothing left to sync)
+        window = int((now or time.time()) / self.period)
+        shard = self._shards[self._next_shard]
+        self._next_shard = (self._next_shard + 1) & self._mask
+        stale = [key for key, entry in shard.items() if entry[_WINDOW] < window - 1 and not entry[_PENDING]]
+        for key in stale:
+            del shard[key]
+        return len(stale)
+
+    def entry(self, key: str) -> Optional[list]:
+        return self._shards[hash(key) & self._mask].get(key)
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            shard.clear()
+        if self._dirty is not None:
+            self._dirty.clear()
+
+
+class RateLimits:
+    """The configured limiters plus the task that evicts idle keys and, in "mongo" mode, merges the
+    counts of all workers every sync interval (so quotas hold across workers within one interval)."""
+
+    def __init__(self, backend: str, shards: int, max_keys: int, evict_interval: float, sync_interval: float):
+        if backend not in ("memory", "mongo"):
+            raise ValueError(f"RATE_LIMIT_BACKEND must be 'memory' or 'mongo', got {backend!r}")
+        self.backend = backend
+        self.shards = shards
+        self.max_keys = max_keys
+        self.evict_interval = evict_interval
+        self.sync_interval = sync_interval
+        self.limiters: Dict[str, SlidingWindowLimiter] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, name: str, quota: Tuple[int, float]) -> Optional[SlidingWindowLimiter]:
+        limit, period = quota
+        if limit <= 0:
+            return None
+        limiter = SlidingWindowLimiter(name, limit, period, self.shards, self.max_keys)
+        if self.backend == "mongo":
+            limiter._dirty = set()
+        self.limiters[name] = limiter
+        return limiter
+
+    def get(self, name: str) -> Optional[SlidingWindowLimiter]:
+        return self.limiters.get(name)
+
+    def hit(self, name: str, key: str, cost: int = 1) -> float:
+        limiter = self.limiters.get(name)
+        return limiter.hit(key, cost=cost) if limiter is not None else 0.0
+
+    def start(self) -> None:
+        if self.limiters:
+            self._task = asyncio.create_task(self._maintain(), name="rate-limit-maintenance")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.backend == "mongo":
+            await self.sync()
+
+    async def _maintain(self) -> None:
+        # Every shard of every limiter is swept once per evict_interval
+        tick = min(self.evict_interval / self.shards, self.sync_interval)
+        next_sync = time.time() + self.sync_interval
+        while True:
+            await asyncio.sleep(tick)
+            now = time.time()
+            for limiter in self.limiters.values():
+                limiter.evict(now)
+            if self.backend == "mongo" and now >= next_sync:
+                next_sync = now + self.sync_interval
+                # Outside any request deadline: a slow database must not stall the sweep for long
+                with pymongo.timeout(max(self.sync_interval, 1.0)):
+                    await self.sync()
+
+    async def sync(self) -> None:
+        from app.models.rate_limit import RateLimitCounter
+
+        collection = RateLimitCounter.get_motor_collection()
+        for limiter in self.limiters.values():
+            touched, limiter._dirty = limiter._dirty, set()
+            snapshot = {}
+            for key in touched:
+                entry = limiter.entry(key)
+                if entry is not None:
+                    snapshot[f"{limiter.name}|{key}|{entry[_WINDOW]}"] = (key, entry[_WINDOW], entry[_PENDING])
+                    entry[_PENDING] = 0
+            if not snapshot:
+                continue
+            try:
+                await collection.bulk_write([
+                    UpdateOne(
+                        {"_id": doc_id},
+                        {
+                            "$inc": {"hits": pending},
+                            "$setOnInsert": {"expires_at": datetime.fromtimestamp(
+                                (window + 2) * limiter.period, timezone.utc
+                            )},
+                        },
+                        upsert=True,
+                    )
+                    for doc_id, (key, window, pending) in snapshot.items()
+                ], ordered=False)
+                totals = {
+                    doc["_id"]: doc["hits"]
+                    async for doc in collection.find({"_id": {"$in": list(snapshot)}}, {"hits": 1})
+                }
+            except PyMongoError as e:
+                # Keep enforcing local counts; the unsynced ones go out with the next round
+                for doc_id, (key, window, pending) in snapshot.items():
+                    entry = limiter.entry(key)
+                    if entry is not None:
+                        entry[_PENDING] += pending
+                        limiter._dirty.add(key)
+                logger.warning(f"Rate limit sync failed for {limiter.name}: {e}")
+                continue
+            for doc_id, (key, window, _) in snapshot.items():
+                entry = limiter.entry(key)
+                if entry is not None and entry[_WINDOW] == window:
+                    # All workers' synced requests plus ours counted since the snapshot
+                    entry[_CURRENT] = max(entry[_CURRENT], totals.get(doc_id, 0) + entry[_PENDING])
+
+
+def retry_after_seconds(retry_after: float) -> int:
+    return max(math.ceil(retry_after), 1)
+
+
+def too_many_requests(name: str, retry_after: float) -> HTTPException:
+    RATE_LIMITED.labels(name).inc()
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many requests",
+        headers={"Retry-After": str(retry_after_seconds(retry_after))},
+    )
+
+
+def build_rate_limits() -> RateLimits:
+    limits = RateLimits(
+        backend=settings.RATE_LIMIT_BACKEND,
+        shards=settings.RATE_LIMIT_SHARDS,
+        max_keys=settings.RATE_LIMIT_MAX_KEYS,
+        evict_interval=settings.RATE_LIMIT_EVICT_INTERVAL_SECONDS,
+        sync_interval=settings.RATE_LIMIT_SYNC_INTERVAL_SECONDS,
+    )
+    if settings.RATE_LIMIT_ENABLED:
+        limits.add("ip", settings.RATE_LIMIT_PER_IP)
+        limits.add("user", settings.RATE_LIMIT_PER_USER)
+        limits.add("account", settings.RATE_LIMIT_LOGIN_PER_ACCOUNT)
+        for prefix, quota in settings.RATE_LIMIT_ROUTES.items():
+            limits.add(f"route:{prefix}", quota)
+    return limits
+
+
+rate_limits = build_rate_limits()
@@ -0,0 +1,75 @@
+"""Contextvar-based span timer for the Server-Timing header and access log."""
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+
+class RequestTimings:
+    __slots__ = ("spans", "expose")
+
+    def __init__(self, expose: bool = False):
+        self.spans: Dict[str, float] = {}
+        # False until config or an admin caller allows sending the header back
+        self.expose = expose
+
+    def add(self, name: str, duration: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + duration
+
+    def header_value(self) -> str:
+        return ", ".join(f"{name};dur={duration * 1000:.2f}" for name, duration in self.spans.items())
+
+    def log_value(self) -> str:
+        return " ".join(f"{name}={duration * 1000:.1f}" for name, duration in self.spans.items())
+
+
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+class _Span:
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings: RequestTimings, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str):
+    timings = _request_timings.get()
+    if timings is None:
+        return _NOOP_SPAN
+    return _Span(timings, name)
+
+
+def bind_request_timings(timings: RequestTimings):
+    return _request_timings.set(timings)
+
+
+def reset_request_timings(token) -> None:
+    _request_timings.reset(token)
+
+
+def allow_server_timing() -> None:
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.expose = True
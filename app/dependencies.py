@@ -1,6 +1,7 @@
 from fastapi import Depends, HTTPException, status, Request, Cookie
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
+from pymongo.errors import PyMongoError
 from typing import List, Optional
 import logging
 
@@ -9,7 +10,9 @@ from app.models.user import User
 from app.models.session import Session
 from app.services.session_service import session_service
 from app.core.config import get_settings
+from app.core.rate_limit import rate_limits, too_many_requests
 from app.utils.auth import decode_jwt
+from app.core.timing import span, allow_server_timing
 from beanie.operators import Eq
 
 logger = logging.getLogger(__name__)
@@ -41,7 +44,8 @@ async def get_current_user(
         )
     
     try:
-        payload = decode_jwt(token)
+        with span("jwt"):
+            payload = decode_jwt(token)
         
         token_type = payload.get("type")
         
@@ -68,7 +72,7 @@ async def get_current_user(
             detail="Token has expired. Please login again",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    except jwt.InvalidTokenError as e:
+    except JWTError as e:
         logger.warning(f"Invalid token (source: {token_source}): {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -96,7 +100,14 @@ async def get_current_user(
     
     logger.debug(f"Token claims (source: {token_source}): uid={user_id}, sid={session_id[:8]}...")
     
-    db_session = await session_service.validate_session(session_id)
+    # Before the session and user lookups: a throttled user costs no Mongo round trip
+    retry_after = rate_limits.hit("user", user_id)
+    if retry_after:
+        logger.warning(f"Rate limited user: {user_id}")
+        raise too_many_requests("user", retry_after)
+    
+    with span("session"):
+        db_session = await session_service.validate_session(session_id)
     if not db_session:
         logger.warning(f"Session invalid: {session_id[:8]}... (source: {token_source})")
         raise HTTPException(
@@ -116,7 +127,8 @@ async def get_current_user(
         )
     
     try:
-        user = await User.get(user_id)
+        with span("user"):
+            user = await User.get(user_id)
         
         if not user:
             logger.warning(f"User not found: {user_id} (source: {token_source})")
@@ -134,10 +146,14 @@ async def get_current_user(
                 detail="User account is disabled"
             )
         
-        await user.fetch_link(User.role)
+        with span("role"):
+            await user.fetch_link(User.role)
         
     except HTTPException:
         raise
+    except PyMongoError:
+        # Answered with 503/504 by the database exception handler, not a generic 500
+        raise
     except Exception as e:
         logger.error(f"User lookup error for {user_id}: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -145,6 +161,9 @@ async def get_current_user(
             detail="Failed to retrieve user information"
         )
     
+    if user.role and has_permission(user.role.permissions, ["admin:*"]):
+        allow_server_timing()
+    
     logger.info(
         f"Auth OK: {user.username} "
         f"({user.role.name if user.role else 'no role'}, ID: {user.id[:8]}...) "
@@ -0,0 +1,35 @@
+"""Caps concurrent requests per worker and per route class; excess load gets a fast 503 instead of queueing
+behind the event loop until every request is slow.
+
+Pure ASGI, just inside the access log and request metrics and outside every other layer, so a shed request
+costs a counter check, a small response and its log lines.
+"""
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.admission import AdmissionControl, admission
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import REQUESTS_REJECTED
+from app.middleware.deadline import EXEMPT_PATHS, error_response
+
+
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp, control: AdmissionControl = admission):
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        gate = self.control.gate_for(scope["path"])
+        reason = await self.control.admit(gate, loop_monitor.current_lag)
+        if reason is not None:
+            REQUESTS_REJECTED.labels(f"admission_{reason}").inc()
+            response = error_response(503, "Server overloaded", retry_after=1)
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.control.leave(gate)
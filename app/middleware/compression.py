@@ -0,0 +1,181 @@
+"""Compress responses with zstd, brotli or gzip, honouring size and content-type rules.
+
+Pure ASGI (not BaseHTTPMiddleware) so streaming responses are compressed chunk by chunk.
+"""
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_encoders() -> Dict[str, Callable]:
+    encoders = {"gzip": _GzipEncoder}
+    if brotli is not None:
+        encoders["br"] = _BrotliEncoder
+    if zstandard is not None:
+        encoders["zstd"] = _ZstdEncoder
+    return encoders
+
+
+def choose_encoding(accept_encoding: str, preference: Sequence[str]) -> Optional[str]:
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in preference:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        levels: Optional[Dict[str, int]] = None,
+        preference: Sequence[str] = ("zstd", "br", "gzip"),
+        content_types: Iterable[str] = ("application/json", "text/"),
+        excluded_paths: Iterable[str] = (),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = levels or {}
+        self.encoders = available_encoders()
+        self.preference = [e for e in preference if e in self.encoders]
+        self.content_types = tuple(content_types)
+        self.excluded_paths = tuple(excluded_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.excluded_paths):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.preference)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self._start_message: Optional[Message] = None
+        self._encoder = None
+        self._passthrough = False
+
+    def _eligible(self, headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        if not content_type.startswith(self.middleware.content_types):
+            return False
+        content_length = headers.get("content-length")
+        return content_length is None or int(content_length) >= self.middleware.minimum_size
+
+    def _new_encoder(self):
+        return self.middleware.encoders[self.encoding](self.middleware.levels.get(self.encoding, 6))
+
+    def _mark_encoded(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self._start_message = message
+            self._passthrough = not self._eligible(MutableHeaders(raw=message["headers"]))
+            if self._passthrough:
+                await self._send(message)
+            return
+
+        if message_type != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        headers = MutableHeaders(raw=self._start_message["headers"])
+
+        if self._encoder is None and not more_body:
+            # Whole body in one message: compress once and set an exact Content-Length
+            if len(body) < self.middleware.minimum_size:
+                await self._send(self._start_message)
+                await self._send(message)
+                return
+            encoder = self._new_encoder()
+            compressed = encoder.compress(body) + encoder.finish()
+            self._mark_encoded(headers)
+            headers["Content-Length"] = str(len(compressed))
+            await self._send(self._start_message)
+            await self._send({"type": "http.response.body", "body": compressed})
+            return
+
+        if self._encoder is None:
+            # Streaming: length is unknown up front, flush each chunk as it is produced
+            self._encoder = self._new_encoder()
+            self._mark_encoded(headers)
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            await self._send(self._start_message)
+
+        chunk = self._encoder.compress(body) if body else b""
+        if not more_body:
+            chunk += self._encoder.finish()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
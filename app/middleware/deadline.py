@@ -0,0 +1,71 @@
+"""Give each request a deadline that bounds every Mongo call, and fail fast while the DB is down."""
+from fastapi import Request
+from fastapi.responses import JSONResponse
+import asyncio
+import logging
+import time
+import pymongo
+from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Callable
+
+from app.core.circuit_breaker import db_circuit
+from app.core.config import get_settings
+from app.core.deadline import request_deadline
+from app.core.metrics import REQUEST_DEADLINE_EXCEEDED, REQUESTS_REJECTED
+from app.middleware.metrics import route_template
+
+log = logging.getLogger("app.http")
+settings = get_settings()
+
+# Served from memory without touching MongoDB
+EXEMPT_PATHS = ("/health", "/ready", "/metrics")
+# Mongo calls time out first so the database handler can tell 503 from 504; this catches the rest
+BACKSTOP_GRACE_SECONDS = 0.25
+
+
+def error_response(status_code: int, message: str, retry_after: int = 0) -> JSONResponse:
+    headers = {"Retry-After": str(retry_after)} if retry_after else None
+    return JSONResponse(
+        status_code=status_code,
+        content={"code": status_code, "message": message, "data": None},
+        headers=headers,
+    )
+
+
+class DeadlineMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app):
+        super().__init__(app)
+        # The deadline is needed before routing runs, so budgets are keyed by path prefix, longest first
+        self._budgets = sorted(settings.REQUEST_DEADLINES.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def budget_for(self, path: str) -> float:
+        for prefix, budget in self._budgets:
+            if path.startswith(prefix):
+                return budget
+        return settings.REQUEST_DEADLINE_SECONDS
+
+    async def dispatch(self, request: Request, call_next: Callable):
+        if request.url.path in EXEMPT_PATHS:
+            return await call_next(request)
+
+        if not db_circuit.allow_request():
+            REQUESTS_REJECTED.labels("circuit_open").inc()
+            return error_response(503, "Database unavailable", retry_after=db_circuit.retry_after)
+
+        budget = self.budget_for(request.url.path)
+        token = request_deadline.set(time.monotonic() + budget)
+        try:
+            # pymongo.timeout is contextvar based: Motor copies it into its executor threads, so every
+            # command gets maxTimeMS and socket/server-selection timeouts from the remaining budget
+            with pymongo.timeout(budget):
+                async with asyncio.timeout(budget + BACKSTOP_GRACE_SECONDS) as timeout:
+                    return await call_next(request)
+        except TimeoutError:
+            if not timeout.expired():
+                raise
+            route = route_template(request)
+            REQUEST_DEADLINE_EXCEEDED.labels(route).inc()
+            log.warning(f"Deadline of {budget:.1f}s exceeded: {request.method} {route}")
+            return error_response(504, "Request timed out")
+        finally:
+            request_deadline.reset(token)
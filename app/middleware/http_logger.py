@@ -5,19 +5,42 @@ import time
 from starlette.middleware.base import BaseHTTPMiddleware
 from typing import Callable
 
+from app.core.config import get_settings
+from app.core.timing import RequestTimings, bind_request_timings, reset_request_timings
+
 log = logging.getLogger("app.http")
+settings = get_settings()
+
+# Lets an admin ask for a Server-Timing breakdown when it is disabled globally
+SERVER_TIMING_OPT_IN_HEADER = "X-Server-Timing"
 
 class HTTPLoggerMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next: Callable):
         start_time = time.time()
         client_ip = request.client.host
-        
+
         log.info(f"← {client_ip} {request.method} {request.url.path} ({request.url.query})")
-        
-        response = await call_next(request)
+
+        timings = None
+        if settings.SERVER_TIMING_ENABLED or SERVER_TIMING_OPT_IN_HEADER in request.headers:
+            timings = RequestTimings(expose=settings.SERVER_TIMING_ENABLED)
+            token = bind_request_timings(timings)
+            try:
+                response = await call_next(request)
+            finally:
+                reset_request_timings(token)
+        else:
+            response = await call_next(request)
         duration = (time.time() - start_time) * 1000
-        
+
+        spans = ""
+        if timings is not None:
+            timings.add("total", duration / 1000)
+            spans = f" [{timings.log_value()}]"
+            if timings.expose:
+                response.headers["Server-Timing"] = timings.header_value()
+
         log.info(f"→ {client_ip} {request.method} {request.url.path} {response.status_code} "
-                f"{duration:.0f}ms")
-        
+                f"{duration:.0f}ms{spans}")
+
         return response
@@ -0,0 +1,48 @@
+"""Record request count, latency and in-flight requests per route template."""
+from fastapi import Request
+import time
+from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Callable
+
+from app.core.metrics import HTTP_IN_FLIGHT, HTTP_REQUESTS, HTTP_REQUEST_DURATION
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(request: Request) -> str:
+    # Label by template (/api/v1/admin/{user_id}), never by raw path, to bound cardinality
+    route = request.scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if not path_format:
+        return UNMATCHED_ROUTE
+    return _route_prefix(request.scope["path"], route) + path_format
+
+
+def _route_prefix(path: str, route) -> str:
+    # A route from an included router only knows its own path (/admin/{user_id}); the include prefix,
+    # mount path and root_path are whatever comes before the part of the path it matches
+    path_regex = getattr(route, "path_regex", None)
+    if path_regex is None:
+        return ""
+    start = 0
+    while start >= 0:
+        if path_regex.match(path[start:]):
+            return path[:start]
+        start = path.find("/", start + 1)
+    return ""
+
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: Callable):
+        start_time = time.perf_counter()
+        status_code = 500
+        HTTP_IN_FLIGHT.inc()
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            labels = (request.method, route_template(request), str(status_code))
+            HTTP_REQUESTS.labels(*labels).inc()
+            HTTP_REQUEST_DURATION.labels(*labels).observe(time.perf_counter() - start_time)
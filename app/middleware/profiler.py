@@ -0,0 +1,161 @@
+"""Profile a single request on demand for admins (X-Profile header or ?__profile=1)."""
+from abc import ABC, abstractmethod
+from fastapi import HTTPException, Request
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import JWTError
+from pymongo.errors import PyMongoError
+import asyncio
+import cProfile
+import logging
+import os
+import pymongo
+import time
+import uuid
+from datetime import datetime, timezone
+from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Callable, Optional
+
+from app.core.config import get_settings
+from app.dependencies import get_current_user, has_permission
+from app.utils.auth import decode_jwt
+
+log = logging.getLogger("app.http")
+settings = get_settings()
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_QUERY_PARAM = "__profile"
+
+
+class _Profiler(ABC):
+    extension = ""
+
+    @abstractmethod
+    def start(self) -> None:
+        ...
+
+    @abstractmethod
+    def stop(self) -> None:
+        ...
+
+    @abstractmethod
+    def save(self, path: str) -> None:
+        ...
+
+
+class _CProfiler(_Profiler):
+    extension = "pstats"
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self) -> None:
+        self._profile.enable()
+
+    def stop(self) -> None:
+        self._profile.disable()
+
+    def save(self, path: str) -> None:
+        self._profile.dump_stats(path)
+
+
+class _SamplingProfiler(_Profiler):
+    extension = "txt"
+
+    def __init__(self):
+        from pyinstrument import Profiler
+        self._profiler = Profiler(async_mode="enabled")
+
+    def start(self) -> None:
+        self._profiler.start()
+
+    def stop(self) -> None:
+        self._profiler.stop()
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            f.write(self._profiler.output_text(unicode=True, show_all=True))
+
+
+def _new_profiler() -> _Profiler:
+    if settings.PROFILER == "pyinstrument":
+        try:
+            return _SamplingProfiler()
+        except ImportError:
+            log.warning("pyinstrument is not installed, falling back to cProfile")
+    return _CProfiler()
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app):
+        super().__init__(app)
+        # One profile at a time per worker: cProfile hooks the whole event loop thread
+        self._lock = asyncio.Lock()
+        self._last_profile_at = 0.0
+
+    async def dispatch(self, request: Request, call_next: Callable):
+        if not (PROFILE_HEADER in request.headers or request.query_params.get(PROFILE_QUERY_PARAM)):
+            return await call_next(request)
+
+        # Rate limit before the token check so the flag cannot be used to add DB load
+        now = time.monotonic()
+        if self._lock.locked() or now - self._last_profile_at < settings.PROFILE_MIN_INTERVAL_SECONDS:
+            response = await call_next(request)
+            response.headers["X-Profile-Status"] = "rate-limited"
+            return response
+
+        credentials = self._bearer_credentials(request)
+        if credentials is None or not self._valid_access_token(credentials.credentials):
+            return await call_next(request)
+        # Reserve the slot before the user lookup: whoever sends the flag, it costs at most one
+        # extra auth pass per interval
+        self._last_profile_at = now
+        if not await self._is_admin(credentials):
+            return await call_next(request)
+
+        async with self._lock:
+            profiler = _new_profiler()
+            profiler.start()
+            try:
+                response = await call_next(request)
+            finally:
+                profiler.stop()
+
+            profile_id = (
+                f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{request.method}-"
+                f"{request.url.path.strip('/').replace('/', '_') or 'root'}-{uuid.uuid4().hex[:8]}"
+            )
+            path = os.path.join(settings.PROFILE_DIR, f"{profile_id}.{profiler.extension}")
+            os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+            await asyncio.to_thread(profiler.save, path)
+
+        log.info(f"Profile stored: {path} ({request.method} {request.url.path})")
+        response.headers["X-Profile-Status"] = "stored"
+        response.headers["X-Profile-Id"] = os.path.basename(path)
+        return response
+
+    @staticmethod
+    def _valid_access_token(token: str) -> bool:
+        # Signature and expiry only, no database
+        try:
+            return decode_jwt(token).get("type") == "access"
+        except JWTError:
+            return False
+
+    async def _is_admin(self, credentials: HTTPAuthorizationCredentials) -> bool:
+        # Runs outside DeadlineMiddleware: bound the session/user lookups ourselves
+        try:
+            with pymongo.timeout(settings.REQUEST_DEADLINE_SECONDS):
+                user = await get_current_user(credentials=credentials, refresh_token=None, _=None)
+        except HTTPException:
+            return False
+        except PyMongoError as e:
+            log.warning(f"Profiling skipped, admin check failed: {e}")
+            return False
+        return bool(user.role) and has_permission(user.role.permissions, ["admin:*"])
+
+    @staticmethod
+    def _bearer_credentials(request: Request) -> Optional[HTTPAuthorizationCredentials]:
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        return HTTPAuthorizationCredentials(scheme=scheme, credentials=token)
@@ -0,0 +1,56 @@
+"""Count Mongo commands per request and flag routes that exceed their query budget."""
+from fastapi import Request
+from fastapi.responses import JSONResponse
+import logging
+from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Callable
+
+from app.core.config import get_settings
+from app.core.metrics import MONGO_QUERIES_PER_REQUEST
+from app.core.mongo_monitor import RequestQueryStats, request_query_stats
+from app.middleware.metrics import UNMATCHED_ROUTE, route_template
+
+log = logging.getLogger("app.http")
+settings = get_settings()
+
+
+class QueryBudgetMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: Callable):
+        stats = RequestQueryStats()
+        token = request_query_stats.set(stats)
+        try:
+            response = await call_next(request)
+        finally:
+            request_query_stats.reset(token)
+
+        route = route_template(request)
+        if route != UNMATCHED_ROUTE:
+            MONGO_QUERIES_PER_REQUEST.labels(route).observe(stats.count)
+
+        budget = settings.QUERY_BUDGETS.get(route, settings.QUERY_BUDGET_DEFAULT)
+        if stats.count > budget:
+            message = (
+                f"Query budget exceeded: {request.method} {route} issued {stats.count} "
+                f"Mongo commands (budget {budget}): {dict(stats.by_command)}"
+            )
+            if settings.QUERY_BUDGET_STRICT:
+                # Answered here: an exception raised this far out would only reach the generic 500 handler
+                log.error(message)
+                return JSONResponse(
+                    status_code=500,
+                    content={
+                        "code": 500,
+                        "message": "Query budget exceeded",
+                        "data": {
+                            "route": f"{request.method} {route}",
+                            "budget": budget,
+                            "queries": stats.count,
+                            "by_command": dict(stats.by_command),
+                        },
+                    },
+                )
+            log.warning(message)
+
+        if settings.QUERY_STATS_HEADER:
+            response.headers["X-DB-Queries"] = str(stats.count)
+        return response
@@ -0,0 +1,55 @@
+"""Per client IP and per route quotas, checked before routing so throttled requests never reach argon2 or Mongo.
+
+Pure ASGI (not BaseHTTPMiddleware): an allowed request costs one or two in-memory counter checks.
+"""
+import time
+from typing import List, Tuple
+
+from starlette.requests import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.metrics import RATE_LIMITED
+from app.core.rate_limit import RateLimits, SlidingWindowLimiter, rate_limits, retry_after_seconds
+from app.middleware.deadline import EXEMPT_PATHS, error_response
+from app.utils.user_agent import get_client_ip
+
+
+class RateLimitMiddleware:
+    def __init__(self, app: ASGIApp, limits: RateLimits = rate_limits):
+        self.app = app
+        self._ip = limits.get("ip")
+        # Longest prefix first, like request deadlines
+        self._routes: List[Tuple[str, SlidingWindowLimiter]] = sorted(
+            ((name[len("route:"):], limiter) for name, limiter in limits.limiters.items() if name.startswith("route:")),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+
+    def limiters_for(self, path: str) -> List[SlidingWindowLimiter]:
+        # The route quota is the tighter one: check it first so a throttled login does not use up the IP quota
+        limiters = []
+        for prefix, limiter in self._routes:
+            if path.startswith(prefix):
+                limiters.append(limiter)
+                break
+        if self._ip is not None:
+            limiters.append(self._ip)
+        return limiters
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        limiters = self.limiters_for(scope["path"])
+        if limiters:
+            client_ip = get_client_ip(Request(scope))
+            now = time.time()
+            for limiter in limiters:
+                retry_after = limiter.hit(client_ip, now)
+                if retry_after:
+                    RATE_LIMITED.labels(limiter.name).inc()
+                    response = error_response(429, "Too many requests", retry_after_seconds(retry_after))
+                    await response(scope, receive, send)
+                    return
+        await self.app(scope, receive, send)
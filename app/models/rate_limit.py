@@ -0,0 +1,17 @@
+from beanie import Document
+from pydantic import Field
+from datetime import datetime
+from pymongo import ASCENDING, IndexModel
+
+
+class RateLimitCounter(Document):
+    # "<limit>|<key>|<window index>": requests counted by all workers in one window (RATE_LIMIT_BACKEND=mongo)
+    id: str
+    hits: int = Field(default=0)
+    expires_at: datetime
+    
+    class Settings:
+        name = "rate_limits"
+        indexes = [
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+        ]
@@ -2,6 +2,7 @@ from beanie import Document
 from pydantic import Field
 from datetime import datetime, timezone
 from typing import List, Optional
+from pymongo import ASCENDING, IndexModel
 import uuid
 
 
@@ -16,3 +17,6 @@ class Role(Document):
     
     class Settings:
         name = "roles"
+        indexes = [
+            IndexModel([("name", ASCENDING)], unique=True, name="name_unique"),
+        ]
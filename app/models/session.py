@@ -8,8 +8,11 @@ class Session(Document):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_id: str = Field(..., index=True)
     refresh_jti: str = Field(..., unique=True, index=True)  # Store as plain text
-    device_info: Optional[str] = Field(max_length=255, default=None)
+    # Key into the user_agents collection; resolved only when sessions are listed
+    ua_id: Optional[str] = Field(max_length=16, default=None)
     ip_address: Optional[str] = Field(max_length=45, default=None)
+    # Stored inline by sessions created before ua_id; filled from user_agents on listing, never saved
+    device_info: Optional[str] = Field(max_length=255, default=None)
     user_agent: Optional[str] = Field(max_length=500, default=None)
     expires_at: datetime = Field(..., index=True)
     is_active: bool = Field(default=True, index=True)
@@ -18,6 +21,8 @@ class Session(Document):
     
     class Settings:
         name = "sessions"
+        # Unset optional fields take no space in millions of session documents
+        keep_nulls = False
 
     
     def is_expired(self) -> bool:
@@ -27,12 +32,11 @@ class Session(Document):
         return self.is_active and not self.is_expired()
     
     async def update_last_activity(self):
-        self.last_activity = datetime.now(timezone.utc)
-        await self.save()
+        # $set of the one field: cheaper than a full replace and never writes resolved UA strings back
+        await self.set({Session.last_activity: datetime.now(timezone.utc)})
     
     async def revoke(self):
-        self.is_active = False
-        await self.save()
+        await self.set({Session.is_active: False})
     
     @classmethod
     async def find_by_jti(cls, jti: str) -> Optional["Session"]:
@@ -1,13 +1,20 @@
 from beanie import Document, Link, before_event, Insert, Replace
 from pydantic import Field
 from datetime import datetime, timezone
-from typing import Optional
-from argon2 import PasswordHasher
-from argon2.exceptions import VerifyMismatchError
+from typing import Awaitable, Optional
+from pymongo import ASCENDING, IndexModel
 from .role import Role
+from app.core.jobs import jobs
+from app.core.metrics import PASSWORD_REHASHES
+from app.utils import password as pw
+import asyncio
+import logging
 import uuid
 
-ph = PasswordHasher()
+logger = logging.getLogger(__name__)
+
+LISTING_INDEX = "created_at_id_updated_at"
+LISTING_SORT = [("created_at", ASCENDING), ("_id", ASCENDING)]
 
 class User(Document):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -19,43 +26,73 @@ class User(Document):
     role: Link[Role] = Field(...)
     is_active: bool = Field(default=True, index=True)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    # Bumped on every profile-visible change; drives ETags. None until the first update.
+    updated_at: Optional[datetime] = Field(default=None)
     
     class Settings:
         name = "users"
+        indexes = [
+            # Listing order; also covers the (_id, updated_at) version query for ETags
+            IndexModel(
+                [("created_at", ASCENDING), ("_id", ASCENDING), ("updated_at", ASCENDING)],
+                name=LISTING_INDEX,
+            ),
+        ]
+    
+    @property
+    def version_stamp(self) -> datetime:
+        return self.updated_at or self.created_at
     
     @before_event(Insert, Replace)
     async def hash_password(self):
         if self.password:
-            self.password = ph.hash(self.password)
+            self.password = await pw.hash_password_async(self.password)
     
     def verify_password(self, plain_password: str) -> bool:
-        try:
-            ph.verify(self.password, plain_password)
-            return True
-        except VerifyMismatchError:
-            return False
+        return pw.verify_password(self.password, plain_password)
     
     async def verify_and_rehash_password(self, plain_password: str) -> bool:
-        try:
-            ph.verify(self.password, plain_password)
-            
-            if ph.check_needs_rehash(self.password):
-                print(f"Rehashing password for user {self.username}")
-                self.password = ph.hash(plain_password)
-                await self.save()
-            
-            return True
-        except VerifyMismatchError:
+        if not await pw.verify_password_async(self.password, plain_password):
             return False
+        
+        if pw.needs_rehash(self.password):
+            # Off the login path. The plaintext goes to this one hash-pool call only; the queued (and retried)
+            # job just stores the result. A dropped or failed upgrade is simply retried at the next login
+            new_hash = asyncio.ensure_future(pw.hash_password_async(plain_password))
+            if not jobs.submit("password_rehash", self.store_rehashed_password, self.password, new_hash):
+                new_hash.cancel()
+        
+        return True
+    
+    async def store_rehashed_password(self, current_hash: str, new_hash: Awaitable[str]) -> None:
+        new_hash = await new_hash
+        # Conditional on the old hash so a password changed in the meantime is never overwritten
+        result = await self.get_motor_collection().update_one(
+            {"_id": self.id, "password": current_hash}, {"$set": {"password": new_hash}}
+        )
+        if result.modified_count:
+            PASSWORD_REHASHES.inc()
+            logger.info(f"Rehashed password for user {self.username}")
     
     async def deactivate(self):
         self.is_active = False
+        self.updated_at = datetime.now(timezone.utc)
         await self.save()
     
     @classmethod
     async def find_by_email(cls, email: str) -> Optional["User"]:
         return await cls.find_one(cls.email == email)
     
+    @classmethod
+    async def listing_versions(cls, skip: int, limit: int, collection=None) -> list:
+        # Covered by LISTING_INDEX: returns (_id, updated_at) pairs without loading documents
+        if collection is None:
+            collection = cls.get_motor_collection()
+        cursor = collection.find(
+            {}, {"_id": 1, "updated_at": 1}, sort=LISTING_SORT, skip=skip, limit=limit
+        )
+        return [(doc["_id"], doc.get("updated_at")) async for doc in cursor]
+    
     @classmethod
     async def get_active_users(cls):
         return await cls.find(cls.is_active == True).to_list()
\ No newline at end of file
@@ -0,0 +1,15 @@
+from beanie import Document
+from pydantic import Field
+from datetime import datetime, timezone
+from typing import Optional
+
+
+class UserAgent(Document):
+    # user_agent_id() of the (truncated) header: sessions store this short id instead of the strings
+    id: str
+    user_agent: str = Field(..., max_length=500)
+    device_info: Optional[str] = Field(max_length=255, default=None)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    
+    class Settings:
+        name = "user_agents"
@@ -9,6 +9,11 @@ class UserBase(BaseModel):
     full_name: Optional[str]
     role: Optional[str] = Field("USER")
 
+    @classmethod
+    def from_document(cls, user):
+        # Trusted internal object (role already fetched): copy fields, skip re-validation
+        return cls.model_construct(**{name: getattr(user, name) for name in cls.model_fields})
+
 class UserCreate(UserBase):
     password: str
 
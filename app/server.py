@@ -0,0 +1,75 @@
+"""Production entry point: python -m app.server
+
+Starts Settings.WORKERS uvicorn workers on uvloop/httptools with one signing key
+shared by all of them, graceful drain on SIGTERM and periodic worker recycling.
+"""
+import importlib.util
+import logging
+import os
+import secrets
+import shutil
+import sys
+import tempfile
+from typing import Optional
+
+import uvicorn
+
+from app.core.config import get_settings
+
+logger = logging.getLogger("app.server")
+
+
+def _available(module: str, fallback: str = "auto") -> str:
+    return module if importlib.util.find_spec(module) is not None else fallback
+
+
+def ensure_shared_secret_key(settings) -> None:
+    # The Settings default is random per process: with several workers a token signed by
+    # one worker would be rejected by the others, so the parent fixes the key for all of them.
+    # RS*/ES* keys come from JWT_PRIVATE_KEY_FILE, which every worker reads.
+    if "SECRET_KEY" in settings.model_fields_set or not settings.ALGORITHM.startswith("HS"):
+        return
+    if settings.ENVIRONMENT == "production":
+        sys.exit("SECRET_KEY must be set in production (e.g. `openssl rand -hex 32`)")
+    os.environ["SECRET_KEY"] = secrets.token_hex(32)
+    logger.warning("SECRET_KEY is not set: generated one for this run; tokens will not survive a restart")
+
+
+def ensure_metrics_dir(settings, workers: int) -> Optional[str]:
+    # Let /metrics aggregate all workers instead of whichever one answers the scrape
+    if workers > 1 and settings.METRICS_ENABLED and not settings.METRICS_MULTIPROC_DIR:
+        directory = tempfile.mkdtemp(prefix="fastapi-metrics-")
+        os.environ["METRICS_MULTIPROC_DIR"] = directory
+        return directory
+    return None
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    settings = get_settings()
+    workers = max(settings.WORKERS, 1)
+    ensure_shared_secret_key(settings)
+    metrics_dir = ensure_metrics_dir(settings, workers)
+
+    try:
+        uvicorn.run(
+            "app.main:app",
+            host=settings.HOST,
+            port=settings.PORT,
+            workers=workers,
+            loop=_available("uvloop"),
+            http=_available("httptools"),
+            proxy_headers=True,
+            forwarded_allow_ips=settings.TRUSTED_PROXIES,
+            limit_max_requests=settings.WORKER_MAX_REQUESTS or None,
+            limit_max_requests_jitter=settings.WORKER_MAX_REQUESTS_JITTER,
+            timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_SECONDS,
+            timeout_keep_alive=settings.KEEP_ALIVE_SECONDS,
+        )
+    finally:
+        if metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
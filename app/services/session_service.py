@@ -3,15 +3,30 @@ from typing import Optional, List, Dict
 import uuid
 import logging
 from fastapi import Request, Response, HTTPException, status
+from beanie.operators import In
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
 
 from app.utils.auth import generate_jwt
-from app.utils.user_agent import parse_user_agent, get_client_ip
+from app.utils.user_agent import (
+    describe_user_agent_async,
+    get_client_ip,
+    truncate_user_agent,
+    ua_records,
+    user_agent_id,
+)
 from app.core.config import get_settings
 from app.models.user import User
 from app.utils.auth import decode_jwt
 from app.models.session import Session
+from app.models.user_agent import UserAgent
+from app.core.jobs import jobs
+from app.core.timing import span
+from app.schemas.auth import TokenData, TokenRefreshResponse, TokenResponse
+from app.schemas.user import UserResponse
 
 logger = logging.getLogger(__name__)
+audit_logger = logging.getLogger("app.audit")
 settings = get_settings()
 
 ACCESS_TOKEN_EXPIRE_MINUTES = 15
@@ -25,84 +40,147 @@ class SessionService:
         user: User, 
         request: Request, 
         response: Response
-    ) -> Dict[str, str]:
+    ) -> TokenResponse:
 
         session_id = str(uuid.uuid4())
         refresh_jti = str(uuid.uuid4())
         expires_at = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
         
-        access_token = SessionService._create_access_token(
-            {
-                "uid": str(user.id),
-                "sid": session_id,
-                "type": "access"
-            },
-            timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        )
+        with span("token"):
+            access_token = SessionService._create_access_token(
+                {
+                    "uid": str(user.id),
+                    "sid": session_id,
+                    "type": "access"
+                },
+                timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+            )
 
-        refresh_token = SessionService._create_access_token(
-            {
-                "uid": str(user.id),
-                "sid": session_id,
-                "jti": refresh_jti,
-                "type": "refresh"
-            },
-            timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-        )
+            refresh_token = SessionService._create_access_token(
+                {
+                    "uid": str(user.id),
+                    "sid": session_id,
+                    "jti": refresh_jti,
+                    "type": "refresh"
+                },
+                timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+            )
         
-        device_info = parse_user_agent(request)
         ip_address = get_client_ip(request)
+        user_agent = request.headers.get("User-Agent")
+        ua_id = None
+        ua_record = None
+        if user_agent:
+            user_agent = truncate_user_agent(user_agent)
+            ua_id = user_agent_id(user_agent)
+            # The raw string is stored before any session points at it; only the parse is deferred
+            ua_record = ua_records.get(ua_id)
+            if ua_record is None:
+                with span("user_agent.upsert"):
+                    ua_record = await SessionService._store_user_agent(ua_id, user_agent)
         
         db_session = Session(
             id=session_id,
             user_id=str(user.id),
             refresh_jti=refresh_jti,
-            device_info=device_info,
             ip_address=ip_address,
-            user_agent=request.headers.get("User-Agent"),
+            ua_id=ua_id,
             expires_at=expires_at,
             is_active=True
         )
-        await db_session.insert()
+        with span("session.insert"):
+            await db_session.insert()
         
         # Set refresh token in httpOnly cookie
         SessionService._set_refresh_token_cookie(response, refresh_token)
         
-        logger.info(
-            f"Session created: user={user.username}, "
+        # Nothing on the login path reads device_info; a lost job is redone when sessions are listed
+        if ua_record is not None and ua_record[1] is None:
+            jobs.submit("user_agent_parse", SessionService._parse_user_agent, ua_id, user_agent)
+        jobs.submit("audit", SessionService._audit_login, user.username, str(user.id), session_id, ip_address)
+        
+        return TokenResponse.model_construct(
+            token=TokenData.model_construct(
+                access_token=access_token,
+                token_type="bearer",
+                expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+            ),
+            user=UserResponse.from_document(user)
+        )
+    
+    @staticmethod
+    async def _store_user_agent(ua_id: str, user_agent: str) -> tuple:
+        """Insert the User-Agent row if missing: one round trip per new User-Agent per worker."""
+        try:
+            # Several workers may see the same new User-Agent at once: the first insert wins
+            result = await UserAgent.get_motor_collection().find_one_and_update(
+                {"_id": ua_id},
+                {"$setOnInsert": {
+                    "user_agent": user_agent,
+                    "device_info": None,
+                    "created_at": datetime.now(timezone.utc),
+                }},
+                projection={"device_info": True},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            device_info = result.get("device_info") if result else None
+        except DuplicateKeyError:
+            device_info = None
+        record = (user_agent, device_info)
+        ua_records.put(ua_id, record)
+        return record
+    
+    @staticmethod
+    async def _parse_user_agent(ua_id: str, user_agent: str) -> str:
+        device_info = (await describe_user_agent_async(user_agent))[:255]
+        await UserAgent.get_motor_collection().update_one(
+            {"_id": ua_id, "device_info": None},
+            {"$set": {"device_info": device_info}},
+        )
+        ua_records.put(ua_id, (user_agent, device_info))
+        return device_info
+    
+    @staticmethod
+    async def _resolve_user_agents(sessions: List[Session]) -> None:
+        # Fill user_agent/device_info in memory from ua_id; sessions only ever $set other fields, so they are not written back
+        missing = {s.ua_id for s in sessions if s.ua_id and ua_records.get(s.ua_id) is None}
+        if missing:
+            for record in await UserAgent.find(In(UserAgent.id, list(missing))).to_list():
+                ua_records.put(record.id, (record.user_agent, record.device_info))
+        for s in sessions:
+            record = ua_records.get(s.ua_id) if s.ua_id else None
+            if record:
+                s.user_agent, s.device_info = record
+                if s.device_info is None:
+                    # Its parse job was lost: parse now (cached) and persist it again in the background
+                    s.device_info = (await describe_user_agent_async(s.user_agent))[:255]
+                    jobs.submit("user_agent_parse", SessionService._parse_user_agent, s.ua_id, s.user_agent)
+    
+    @staticmethod
+    async def _audit_login(username: str, user_id: str, session_id: str, ip_address: str) -> None:
+        audit_logger.info(
+            f"Login SUCCESS: {username} (ID: {user_id}), "
             f"session={session_id[:8]}..., ip={ip_address}"
         )
-        
-        return {
-            "token": {
-                "access_token": access_token,
-                "token_type": "bearer",
-                "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-            },
-            "user": {
-                "id": str(user.id),
-                "username": user.username,
-                "email": user.email,
-                "full_name": user.full_name,
-                "role": user.role,
-                "is_active": user.is_active,
-                "created_at": user.created_at
-            }
-        }
     
     @staticmethod
     async def validate_session(session_id: str) -> Optional[Session]:
         try:
-            session = await Session.get(session_id)
+            with span("session.get"):
+                session = await Session.get(session_id)
             
             if session and session.is_valid():
-                await session.update_last_activity()
+                with span("session.touch"):
+                    await session.update_last_activity()
                 logger.debug(f"Session validated: {session_id[:8]}...")
                 return session
             else:
                 logger.debug(f"Session invalid or expired: {session_id[:8]}...")
                 return None
             
+        except PyMongoError:
+            raise
         except Exception as e:
             logger.error(f"Session validation error for {session_id[:8]}...: {e}")
             return None
@@ -112,7 +190,7 @@ class SessionService:
         refresh_token: str, 
         current_user: User,
         request: Request,
-    ) -> Optional[Dict[str, str]]:
+    ) -> Optional[TokenRefreshResponse]:
         try:
             
             payload = decode_jwt(refresh_token)
@@ -128,7 +206,8 @@ class SessionService:
                 logger.warning(f"Missing required fields in refresh token")
                 return None
             
-            session = await Session.find_valid_by_jti(jti)
+            with span("session.get"):
+                session = await Session.find_valid_by_jti(jti)
             
             if not session:
                 logger.warning(f"Invalid or expired session refresh attempt from {get_client_ip(request)}")
@@ -157,14 +236,16 @@ class SessionService:
             
             logger.info(f"Session refreshed: user={current_user.username}, session={session.id[:8]}...")
             
-            return {
-                "token":{
-                    "access_token": new_access_token,
-                    "token_type": "bearer",
-                    "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60
-                }
-            }
+            return TokenRefreshResponse.model_construct(
+                token=TokenData.model_construct(
+                    access_token=new_access_token,
+                    token_type="bearer",
+                    expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60
+                )
+            )
             
+        except PyMongoError:
+            raise
         except Exception as e:
             logger.error(f"Session refresh error: {e}")
             return None
@@ -183,6 +264,8 @@ class SessionService:
             logger.debug(f"Session not found or already revoked: {session_id[:8]}...")
             return False
             
+        except PyMongoError:
+            raise
         except Exception as e:
             logger.error(f"Session revocation error for {session_id[:8]}...: {e}")
             return False
@@ -199,6 +282,8 @@ class SessionService:
             
             return count
             
+        except PyMongoError:
+            raise
         except Exception as e:
             logger.error(f"Error revoking sessions for user {user_id}: {e}")
             return 0
@@ -207,12 +292,15 @@ class SessionService:
     async def get_user_sessions(user_id: str) -> List[Session]:
         try:
             sessions = await Session.find_active_by_user(user_id)
+            await SessionService._resolve_user_agents(sessions)
             
             sessions.sort(key=lambda s: s.last_activity, reverse=True)
             
             logger.debug(f"Found {len(sessions)} active sessions for user: {user_id}")
             return sessions
             
+        except PyMongoError:
+            raise
         except Exception as e:
             logger.error(f"Error fetching sessions for user {user_id}: {e}")
             return []
@@ -224,6 +312,8 @@ class SessionService:
             if deleted_count > 0:
                 logger.info(f"Cleaned up {deleted_count} expired sessions")
             return deleted_count
+        except PyMongoError:
+            raise
         except Exception as e:
             logger.error(f"Error cleaning up expired sessions: {e}")
             return 0
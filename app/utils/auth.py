@@ -1,4 +1,26 @@
-from jose import jwt
+"""JWT signing and verification.
+
+HS* algorithms sign with SECRET_KEY. RS*/ES* sign with the private key in JWT_PRIVATE_KEY_FILE and put its
+key id (kid) in every token, so other services can verify tokens with the public keys served at
+/.well-known/jwks.json instead of calling back into this API.
+"""
+import base64
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple
+
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    NoEncryption,
+    PrivateFormat,
+    load_pem_private_key,
+    load_pem_public_key,
+)
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+from jose.utils import base64url_decode
+
 from app.core.config import get_settings
 
 settings = get_settings()
@@ -6,8 +28,149 @@ settings = get_settings()
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 
+ASYMMETRIC_ALGORITHMS = ("RS256", "RS384", "RS512", "ES256", "ES384", "ES512")
+EC_ALGORITHMS = {"secp256r1": "ES256", "secp384r1": "ES384", "secp521r1": "ES512"}
+# Token header segments remembered with their key; each key signs with a single header
+HEADER_CACHE_SIZE = 64
+
+
+def key_algorithm(public_key, rsa_algorithm: str = "RS256") -> str:
+    if isinstance(public_key, rsa.RSAPublicKey):
+        return rsa_algorithm
+    if isinstance(public_key, ec.EllipticCurvePublicKey) and public_key.curve.name in EC_ALGORITHMS:
+        return EC_ALGORITHMS[public_key.curve.name]
+    # Ed25519 and friends included: python-jose has no EdDSA
+    raise ValueError(f"Unsupported JWT key type: {type(public_key).__name__}")
+
+
+def key_id(public_jwk: dict) -> str:
+    # RFC 7638 thumbprint: every worker derives the same kid, and a retired key keeps its kid
+    members = ("e", "kty", "n") if public_jwk["kty"] == "RSA" else ("crv", "kty", "x", "y")
+    canonical = json.dumps({name: public_jwk[name] for name in members}, separators=(",", ":"), sort_keys=True)
+    return base64.urlsafe_b64encode(hashlib.sha256(canonical.encode()).digest()).rstrip(b"=").decode()
+
+
+def generate_private_key_pem(algorithm: str, rsa_bits: int = 2048) -> bytes:
+    if algorithm.startswith("RS"):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=rsa_bits)
+    elif algorithm in ASYMMETRIC_ALGORITHMS:
+        curve = {"ES256": ec.SECP256R1, "ES384": ec.SECP384R1, "ES512": ec.SECP521R1}[algorithm]
+        private_key = ec.generate_private_key(curve())
+    else:
+        raise ValueError(f"Not an asymmetric JWT algorithm: {algorithm}")
+    return private_key.private_bytes(Encoding.PEM, PrivateFormat.PKCS8, NoEncryption())
+
+
+def load_public_pem(pem: bytes):
+    # A public key, or the public half of a private one (e.g. the previous signing key)
+    if b"PRIVATE KEY" in pem:
+        return load_pem_private_key(pem, password=None).public_key()
+    return load_pem_public_key(pem)
+
+
+class KeyRing:
+    """The signing key and every key tokens may be verified with, by kid. Keys are parsed once: jose
+    re-parses a key passed as text on every call, about 50 ms for an RSA private key."""
+
+    def __init__(self):
+        self.algorithm = ALGORITHM
+        self.kid: Optional[str] = None
+        self.signing_key: Optional[Key] = None
+        self.keys: Dict[Optional[str], Tuple[Key, str]] = {}
+        self.jwks: bytes = b'{"keys":[]}'
+        self._headers: Dict[str, Tuple[Key, str]] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self.signing_key is not None
+
+    def load(
+        self,
+        algorithm: str,
+        secret_key: str,
+        private_key_pem: Optional[bytes] = None,
+        verification_pems: Optional[List[bytes]] = None,
+    ) -> None:
+        keys: Dict[Optional[str], Tuple[Key, str]] = {}
+        public_jwks = []
+        if algorithm in ASYMMETRIC_ALGORITHMS:
+            if not private_key_pem:
+                raise ValueError(f"JWT_PRIVATE_KEY_FILE is required for {algorithm}")
+            private_key = load_pem_private_key(private_key_pem, password=None)
+            if key_algorithm(private_key.public_key(), algorithm) != algorithm:
+                raise ValueError(f"JWT_PRIVATE_KEY_FILE does not hold a {algorithm} key")
+            signing_key = jwk.construct(private_key, algorithm)
+            public_keys = [(signing_key.public_key(), algorithm)]
+            rsa_algorithm = algorithm if algorithm.startswith("RS") else "RS256"
+            for pem in verification_pems or ():
+                public_key = load_public_pem(pem)
+                other_algorithm = key_algorithm(public_key, rsa_algorithm)
+                public_keys.append((jwk.construct(public_key, other_algorithm), other_algorithm))
+            for public_key, key_alg in public_keys:
+                public_jwk = public_key.to_dict()
+                kid = key_id(public_jwk)
+                keys[kid] = (public_key, key_alg)
+                public_jwks.append({**public_jwk, "kid": kid, "use": "sig"})
+            kid = public_jwks[0]["kid"]
+        elif algorithm.startswith("HS"):
+            # Nothing to publish; tokens carry no kid
+            signing_key = jwk.construct(secret_key, algorithm)
+            keys[None] = (signing_key, algorithm)
+            kid = None
+        else:
+            raise ValueError(f"Unsupported JWT algorithm: {algorithm}")
+
+        self.algorithm, self.kid, self.signing_key, self.keys = algorithm, kid, signing_key, keys
+        self.jwks = json.dumps({"keys": public_jwks}, separators=(",", ":")).encode()
+        self._headers = {}
+
+    def key_for(self, token: str) -> Tuple[Key, str]:
+        # Tokens signed by one key share their header segment: cache it to skip decoding the header
+        header_segment = token.split(".", 1)[0]
+        found = self._headers.get(header_segment)
+        if found is not None:
+            return found
+        try:
+            kid = json.loads(base64url_decode(header_segment.encode())).get("kid")
+        except (ValueError, TypeError, AttributeError, UnicodeError):
+            raise JWTError("Invalid token header")
+        found = self.keys.get(kid) if kid is None or isinstance(kid, str) else None
+        if found is None:
+            raise JWTError(f"Unknown signing key: {kid}")
+        if len(self._headers) < HEADER_CACHE_SIZE:
+            self._headers[header_segment] = found
+        return found
+
+    def encode(self, data: dict) -> str:
+        headers = {"kid": self.kid} if self.kid else None
+        return jwt.encode(data, self.signing_key, algorithm=self.algorithm, headers=headers)
+
+    def decode(self, token: str) -> dict:
+        key, algorithm = self.key_for(token)
+        return jwt.decode(token, key, algorithms=[algorithm])
+
+
+def read_key_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def load_keys() -> KeyRing:
+    """Load the configured keys into key_ring; called once at startup (and on first use outside the app)."""
+    key_ring.load(
+        settings.ALGORITHM,
+        SECRET_KEY,
+        read_key_file(settings.JWT_PRIVATE_KEY_FILE) if settings.JWT_PRIVATE_KEY_FILE else None,
+        [read_key_file(path) for path in settings.JWT_VERIFICATION_KEY_FILES],
+    )
+    return key_ring
+
+
+key_ring = KeyRing()
+
+
 def decode_jwt(data):
-    return jwt.decode(data, SECRET_KEY, algorithms=[ALGORITHM])
+    return (key_ring if key_ring.loaded else load_keys()).decode(data)
 
 def generate_jwt(data):
-    return jwt.encode(data, SECRET_KEY, algorithm=ALGORITHM)
\ No newline at end of file
+    return (key_ring if key_ring.loaded else load_keys()).encode(data)
@@ -1,5 +1,10 @@
-from typing import TypeVar, Generic, Optional
+from typing import Any, TypeVar, Generic, Optional
+from fastapi import Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
+import orjson
+
+from app.core.timing import span
 
 T = TypeVar('T')
 
@@ -11,4 +16,36 @@ class ApiResponse(BaseModel, Generic[T]):
 class ErrorResponse(BaseModel):
     code: int
     message: str
-    details: Optional[dict] = None
\ No newline at end of file
+    details: Optional[dict] = None
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        # Pydantic models are encoded straight to JSON bytes by pydantic-core,
+        # everything else (already jsonable content from FastAPI) by orjson
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content, by_alias=True)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def api_response(
+    data: Optional[BaseModel] = None,
+    message: str = "success",
+    code: int = 0,
+    *,
+    status_code: int = 200,
+    response: Optional[Response] = None,
+) -> FastJSONResponse:
+    """Build the ApiResponse envelope once and serialize it directly.
+
+    `data` must already be a response schema instance (not a Beanie document):
+    returning a Response bypasses FastAPI's response_model validation, which
+    stays declared on the route for the OpenAPI docs only. Pass the injected
+    `response` to keep headers such as cookies set on it.
+    """
+    envelope = ApiResponse.model_construct(code=code, message=message, data=data)
+    with span("serialize"):
+        result = FastJSONResponse(envelope, status_code=status_code)
+    if response is not None:
+        result.headers.raw.extend(response.headers.raw)
+    return result
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from app.core.config import get_settings
+from app.core.metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_QUEUE_DEPTH
+
+settings = get_settings()
+
+
+@lru_cache(maxsize=1)
+def get_password_hasher():
+    # argon2 is imported on first use so app startup does not pay for it
+    from argon2 import PasswordHasher
+    return PasswordHasher(
+        time_cost=settings.ARGON2_TIME_COST,
+        memory_cost=settings.ARGON2_MEMORY_COST_KIB,
+        parallelism=settings.ARGON2_PARALLELISM,
+    )
+
+
+def hash_password(plain_password: str) -> str:
+    with PASSWORD_HASH_DURATION.labels("hash").time():
+        return get_password_hasher().hash(plain_password)
+
+
+def verify_password(password_hash: str, plain_password: str) -> bool:
+    from argon2.exceptions import VerifyMismatchError
+    try:
+        with PASSWORD_HASH_DURATION.labels("verify").time():
+            return get_password_hasher().verify(password_hash, plain_password)
+    except VerifyMismatchError:
+        return False
+
+
+def needs_rehash(password_hash: str) -> bool:
+    return get_password_hasher().check_needs_rehash(password_hash)
+
+
+class _HashPool:
+    """Runs argon2 off the event loop; argon2-cffi releases the GIL, so workers hash in parallel."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def queue_depth(self) -> int:
+        # Submitted but not finished, including the ones being hashed right now
+        return self._pending
+
+    def _executor_or_create(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="argon2")
+        return self._executor
+
+    def _track(self, delta: int) -> None:
+        with self._lock:
+            self._pending += delta
+            PASSWORD_HASH_QUEUE_DEPTH.set(self._pending)
+
+    async def run(self, fn, *args):
+        self._track(1)
+        try:
+            future = self._executor_or_create().submit(fn, *args)
+        except BaseException:
+            self._track(-1)
+            raise
+        # Counted until the thread is done with it: a cancelled caller (disconnect, deadline) does not stop
+        # a hash that has started, and overload is exactly when that happens
+        future.add_done_callback(lambda _: self._track(-1))
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hash_pool = _HashPool(workers=settings.PASSWORD_HASH_WORKERS)
+
+
+async def hash_password_async(plain_password: str) -> str:
+    return await hash_pool.run(hash_password, plain_password)
+
+
+async def verify_password_async(password_hash: str, plain_password: str) -> bool:
+    return await hash_pool.run(verify_password, password_hash, plain_password)
@@ -1,14 +1,119 @@
-from user_agents import parse
 from fastapi import Request
+from collections import OrderedDict
+import asyncio
+import hashlib
+import ipaddress
+import json
 import logging
+import threading
+from typing import Dict, Generic, Iterable, Optional, TypeVar
+
+from app.core.config import get_settings
+from app.core.metrics import CACHE_REQUESTS
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+V = TypeVar("V")
+
+
+class UserAgentCache(Generic[V]):
+    """Bounded LRU keyed by User-Agent (or its id); traffic repeats a few thousand strings."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, V]" = OrderedDict()
+        # Filled from the event loop and from job threads
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[V]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: V) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def load(self, table: Dict[str, str]) -> int:
+        for user_agent, device_info in list(table.items())[:self.max_size]:
+            self.put(truncate_user_agent(user_agent), device_info)
+        return min(len(table), self.max_size)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# raw User-Agent -> device_info
+ua_cache: UserAgentCache[str] = UserAgentCache(settings.USER_AGENT_CACHE_SIZE)
+# user_agent_id -> (user_agent, device_info) of rows known to exist in the user_agents collection
+ua_records: UserAgentCache[tuple] = UserAgentCache(settings.USER_AGENT_CACHE_SIZE)
+
+
+def truncate_user_agent(user_agent_str: str) -> str:
+    # Real User-Agents are a few hundred characters; longer headers must not grow the cache or the regexes' input
+    return user_agent_str[:settings.USER_AGENT_MAX_LENGTH]
+
+
+def user_agent_id(user_agent_str: str) -> str:
+    # 64-bit hash as 16 hex chars: collisions need ~4 billion distinct User-Agents
+    return hashlib.blake2b(user_agent_str.encode(), digest_size=8).hexdigest()
+
+
+def load_user_agent_table(path: str) -> int:
+    """Preload the cache from a JSON {user_agent: device_info} table (python -m app.cli export-user-agents)."""
+    with open(path) as f:
+        return ua_cache.load(json.load(f))
 
 
 def parse_user_agent(request: Request) -> str:
-    user_agent_str = request.headers.get("User-Agent", "Unknown")
-    
+    return describe_user_agent(request.headers.get("User-Agent", "Unknown"))
+
+
+def describe_user_agent(user_agent_str: str) -> str:
+    user_agent_str = truncate_user_agent(user_agent_str)
+    device_info = _cached(user_agent_str)
+    if device_info is None:
+        device_info = _parse_and_cache(user_agent_str)
+    return device_info
+
+
+async def describe_user_agent_async(user_agent_str: str) -> str:
+    user_agent_str = truncate_user_agent(user_agent_str)
+    device_info = _cached(user_agent_str)
+    if device_info is None:
+        # Regex-heavy (and imports user_agents on first use): keep misses off the event loop
+        device_info = await asyncio.to_thread(_parse_and_cache, user_agent_str)
+    return device_info
+
+
+def _cached(user_agent_str: str) -> Optional[str]:
+    device_info = ua_cache.get(user_agent_str)
+    CACHE_REQUESTS.labels("user_agent", "miss" if device_info is None else "hit").inc()
+    return device_info
+
+
+def _parse_and_cache(user_agent_str: str) -> str:
+    device_info = _parse_user_agent(user_agent_str)
+    ua_cache.put(user_agent_str, device_info)
+    return device_info
+
+
+def _parse_user_agent(user_agent_str: str) -> str:
     try:
+        # user_agents compiles its regex tables on import (~300ms); load on first login
+        from user_agents import parse
         ua = parse(user_agent_str)
         parts = []
         
@@ -37,13 +142,55 @@ def parse_user_agent(request: Request) -> str:
         return user_agent_str
 
 
+class TrustedProxies:
+    """Peers whose X-Forwarded-For / X-Real-IP are believed: addresses, CIDR ranges, or "*" for any."""
+
+    def __init__(self, entries: Iterable[str]):
+        entries = [entry.strip() for entry in entries if entry.strip()]
+        self.any = "*" in entries
+        self.hosts = set()
+        self.networks = []
+        for entry in entries:
+            if entry == "*":
+                continue
+            if "/" in entry:
+                self.networks.append(ipaddress.ip_network(entry, strict=False))
+            else:
+                self.hosts.add(entry)
+
+    def __contains__(self, host: str) -> bool:
+        if self.any or host in self.hosts:
+            return True
+        if not self.networks:
+            return False
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return False
+        return any(address in network for network in self.networks)
+
+
+trusted_proxies = TrustedProxies(settings.TRUSTED_PROXIES)
+
+
 def get_client_ip(request: Request) -> str:
+    peer = getattr(request.client, "host", None)
+    if peer is None or peer not in trusted_proxies:
+        # Anyone can send the headers; only a trusted proxy's word counts
+        return peer or "unknown"
+
     forwarded = request.headers.get("X-Forwarded-For")
     if forwarded:
-        return forwarded.split(",")[0].strip()
-    
+        # Each proxy appends the address it saw: the rightmost hop we don't trust is the client,
+        # whatever the client itself put further left
+        hops = [hop.strip() for hop in forwarded.split(",")]
+        for hop in reversed(hops):
+            if hop and hop not in trusted_proxies:
+                return hop
+        return hops[0] or peer
+
     real_ip = request.headers.get("X-Real-IP")
     if real_ip:
-        return real_ip
-    
-    return getattr(request.client, "host", "unknown")
+        return real_ip.strip()
+
+    return peer
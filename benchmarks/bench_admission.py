@@ -0,0 +1,143 @@
+"""Latency under a traffic spike with and without admission control.
+
+    python -m benchmarks.bench_admission
+    python -m benchmarks.bench_admission --rate 6000 --seconds 3 --max-in-flight 32
+
+Requests arrive open-loop at --rate per second for --seconds against a bare
+ASGI app standing in for the API: some CPU on the event loop, then a query
+on a pool of --pool connections taking --query-ms each, so capacity is about
+pool / query time. Above that, without admission control every request
+waits in the pool queue and latency grows for as long as the spike lasts;
+with it, requests beyond --max-in-flight (plus a short queue) get a 503
+straight away and the admitted ones keep their normal latency. A /health
+probe runs alongside to show it is never shed.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import benchmarks.harness  # noqa: F401  (environment defaults)
+
+from app.core.admission import AdmissionControl
+from app.middleware.admission import AdmissionMiddleware
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def make_app(pool_size: int, query_seconds: float, cpu_seconds: float):
+    pool = asyncio.Semaphore(pool_size)
+
+    async def app(scope, receive, send):
+        if scope["path"] != "/health":
+            deadline = time.perf_counter() + cpu_seconds
+            while time.perf_counter() < deadline:
+                pass
+            async with pool:
+                await asyncio.sleep(query_seconds)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    return app
+
+
+async def call(app, path: str) -> tuple:
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": [], "client": ("10.0.0.7", 51234)}
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return status, time.perf_counter() - start
+
+
+async def spike(app, rate: float, seconds: float) -> Dict[str, list]:
+    results: Dict[str, list] = {"ok": [], "shed": [], "health": []}
+    tasks = []
+
+    async def request(path: str, bucket: str) -> None:
+        status, elapsed = await call(app, path)
+        results[bucket if status == 200 else "shed"].append(elapsed)
+
+    async def probe() -> None:
+        while True:
+            status, elapsed = await call(app, "/health")
+            results["health"].append(elapsed if status == 200 else float("inf"))
+            await asyncio.sleep(0.05)
+
+    prober = asyncio.create_task(probe())
+    start = time.perf_counter()
+    sent = 0
+    while (elapsed := time.perf_counter() - start) < seconds:
+        due = int(elapsed * rate)
+        for _ in range(due - sent):
+            tasks.append(asyncio.create_task(request("/api/v1/user/", "ok")))
+        sent = due
+        await asyncio.sleep(0.001)
+    await asyncio.gather(*tasks)
+    prober.cancel()
+    await asyncio.gather(prober, return_exceptions=True)
+    return results
+
+
+def report(label: str, results: Dict[str, list], seconds: float, slo: float) -> None:
+    ok, shed, health = results["ok"], results["shed"], results["health"]
+    print(f"\n== {label}")
+    print(f"{'':<10} {'count':>8} {'p50 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for name, samples in (("200", ok), ("503", shed), ("/health", health)):
+        if samples:
+            print(f"{name:<10} {len(samples):>8} {percentile(samples, 50) * 1000:>10.1f} "
+                  f"{percentile(samples, 99) * 1000:>10.1f} {max(samples) * 1000:>10.1f}")
+    if ok:
+        within = sum(1 for elapsed in ok if elapsed <= slo)
+        print(f"goodput {within / seconds:,.0f} req/s answered 200 within {slo * 1000:.0f} ms, "
+              f"mean 200 latency {statistics.mean(ok) * 1000:.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=4000, help="arrivals per second during the spike")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--pool", type=int, default=10, help="simulated database connections")
+    parser.add_argument("--query-ms", type=float, default=5.0)
+    parser.add_argument("--cpu-ms", type=float, default=0.1, help="event loop CPU per request")
+    parser.add_argument("--max-in-flight", type=int, default=20)
+    parser.add_argument("--queue-size", type=int, default=20)
+    parser.add_argument("--queue-timeout", type=float, default=0.1)
+    parser.add_argument("--slo-ms", type=float, default=100.0, help="latency counted as goodput")
+    args = parser.parse_args()
+
+    capacity = args.pool / (args.query_ms / 1000)
+    print(f"spike of {args.rate:,.0f} req/s for {args.seconds}s against ~{capacity:,.0f} req/s of capacity")
+    for admission_on in (False, True):
+        app = make_app(args.pool, args.query_ms / 1000, args.cpu_ms / 1000)
+        label = "no admission control"
+        if admission_on:
+            control = AdmissionControl(
+                max_in_flight=args.max_in_flight,
+                class_limits={},
+                route_classes={},
+                queue_size=args.queue_size,
+                queue_timeout=args.queue_timeout,
+                max_loop_lag=float("inf"),
+            )
+            app = AdmissionMiddleware(app, control)
+            label = f"admission control, {args.max_in_flight} in flight + {args.queue_size} queued"
+        report(label, asyncio.run(spike(app, args.rate, args.seconds)), args.seconds, args.slo_ms / 1000)
+
+
+if __name__ == "__main__":
+    main()
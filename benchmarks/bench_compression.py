@@ -0,0 +1,50 @@
+"""Bandwidth saved vs CPU spent per encoder/level on admin listing payloads.
+
+    python -m benchmarks.bench_compression
+
+brotli and zstd rows only appear when the compression extra is installed.
+"""
+import asyncio
+
+from benchmarks.bench_serialization import PAGE_SIZES, fast_render, make_user
+from benchmarks.harness import bench, init_models
+from app.middleware.compression import available_encoders
+from app.schemas.admin import ListUsers, Pagination
+from app.schemas.user import UserResponse
+
+LEVELS = {"gzip": (1, 5, 9), "br": (1, 4, 6), "zstd": (1, 3, 9)}
+
+
+def listing_payload(size: int) -> bytes:
+    users = [UserResponse.from_document(make_user(i)) for i in range(size)]
+    pagination = Pagination.model_construct(
+        total_items=1000, total_pages=1000 // size, current_page=1,
+        page_size=size, has_next=True, has_previous=False,
+    )
+    return fast_render(ListUsers.model_construct(users=users, pagination=pagination))
+
+
+def main():
+    asyncio.run(init_models())
+    encoders = available_encoders()
+    print(f"{'payload':<16} {'encoding':<10} {'bytes':>9} {'ratio':>7} {'us/resp':>9} {'MB/s':>8}")
+    for size in PAGE_SIZES:
+        payload = listing_payload(size)
+        print(f"{f'users={size}':<16} {'identity':<10} {len(payload):>9,} {1.0:>7.2f} {0:>9.1f} {'-':>8}")
+        for name, encoder_class in encoders.items():
+            for level in LEVELS[name]:
+                def encode():
+                    encoder = encoder_class(level)
+                    return encoder.compress(payload) + encoder.finish()
+                compressed = encode()
+                result = bench(f"{name}-{level}", encode, min_time=0.1, repeat=3)
+                seconds = 1 / result.ops_per_sec
+                print(
+                    f"{'':<16} {f'{name}-{level}':<10} {len(compressed):>9,} "
+                    f"{len(payload) / len(compressed):>7.2f} {seconds * 1e6:>9.1f} "
+                    f"{len(payload) / seconds / 1e6:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
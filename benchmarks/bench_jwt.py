@@ -0,0 +1,75 @@
+"""JWT signing and verification throughput per algorithm.
+
+    python -m benchmarks.bench_jwt
+    python -m benchmarks.bench_jwt --algorithms ES256 RS256 --rsa-bits 3072
+
+Each algorithm signs and verifies an access-token payload through KeyRing,
+with its keys parsed once as the app does at startup. The "PEM per call"
+rows pass the key as text, as jose.jwt did before KeyRing: the key is
+parsed again on every call. Verification is what other services pay per
+request once they check tokens against /.well-known/jwks.json themselves.
+"""
+import argparse
+import time
+
+from benchmarks.harness import bench, print_results
+
+from jose import jwt
+
+from app.utils.auth import ASYMMETRIC_ALGORITHMS, KeyRing, generate_private_key_pem
+
+SECRET = "bench-" + "0" * 58
+PAYLOAD = {
+    "uid": "19f1f403-2749-42b6-87fd-db46d184320f",
+    "sid": "0f6b1c4e-8d5a-4f7e-9a61-3c2b7d9e1f05",
+    "type": "access",
+    "exp": 4102444800,
+}
+
+
+def bench_algorithm(algorithm: str, rsa_bits: int) -> None:
+    ring = KeyRing()
+    if algorithm in ASYMMETRIC_ALGORITHMS:
+        pem = generate_private_key_pem(algorithm, rsa_bits)
+        ring.load(algorithm, "", pem)
+        signing_text = pem.decode()
+        verifying_text = ring.keys[ring.kid][0].to_pem().decode()
+    else:
+        ring.load(algorithm, SECRET)
+        signing_text = verifying_text = SECRET
+    token = ring.encode(PAYLOAD)
+    label = f"{algorithm} ({rsa_bits}-bit)" if algorithm.startswith("RS") else algorithm
+
+    print_results(f"{label}, {len(token)}-byte token", [
+        bench("sign", lambda: ring.encode(PAYLOAD)),
+        bench("verify", lambda: ring.decode(token)),
+        bench("sign, PEM per call", lambda: jwt.encode(PAYLOAD, signing_text, algorithm=algorithm)),
+        bench("verify, PEM per call", lambda: jwt.decode(token, verifying_text, algorithms=[algorithm])),
+    ])
+
+
+def bench_startup(algorithms, rsa_bits: int) -> None:
+    # Signing key plus one retired key for verification
+    print("\n== key loading at startup")
+    for algorithm in algorithms:
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            continue
+        pem = generate_private_key_pem(algorithm, rsa_bits)
+        start = time.perf_counter()
+        KeyRing().load(algorithm, "", pem, [pem])
+        print(f"{algorithm:<8} {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--algorithms", nargs="+", default=["HS256", "RS256", "ES256", "ES384"])
+    parser.add_argument("--rsa-bits", type=int, default=2048)
+    args = parser.parse_args()
+
+    for algorithm in args.algorithms:
+        bench_algorithm(algorithm, args.rsa_bits)
+    bench_startup(args.algorithms, args.rsa_bits)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Cost of the sliding-window rate limiter: per check, per eviction sweep and per request in the middleware.
+
+    python -m benchmarks.bench_rate_limit
+    python -m benchmarks.bench_rate_limit --keys 1000000
+
+Checks are timed with a fixed clock so every call takes the same path (no
+window rollover). "new key" inserts into a limiter already holding --keys
+keys, evicting the oldest once full. The middleware rows time a request
+through a bare ASGI app with and without RateLimitMiddleware; the difference
+is what the limiter adds to every request, client IP lookup included.
+"""
+import argparse
+import asyncio
+import itertools
+import time
+
+from benchmarks.harness import bench, print_results
+
+from app.core.rate_limit import RateLimits, SlidingWindowLimiter
+from app.middleware.rate_limit import RateLimitMiddleware
+
+NOW = 1_700_000_000.0
+
+
+def filled(keys: int, shards: int) -> SlidingWindowLimiter:
+    limiter = SlidingWindowLimiter("bench", limit=1_000_000_000, period=60.0, shards=shards, max_keys=keys)
+    for i in range(keys):
+        limiter.hit(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", NOW)
+    return limiter
+
+
+def bench_checks(keys: int, shards: int) -> None:
+    limiter = filled(keys, shards)
+    rejecting = SlidingWindowLimiter("bench", limit=5, period=60.0, shards=shards)
+    for _ in range(5):
+        rejecting.hit("10.0.0.1", NOW)
+    fresh = (f"172.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in itertools.count())
+
+    print_results(f"hit(), {keys:,} keys in {limiter.shards} shards", [
+        bench("allowed (existing key)", lambda: limiter.hit("10.0.0.7", NOW)),
+        bench("rejected (over quota)", lambda: rejecting.hit("10.0.0.1", NOW)),
+        bench("check only (cost=0)", lambda: limiter.hit("10.0.0.7", NOW, cost=0)),
+        bench("new key", lambda: limiter.hit(next(fresh), NOW)),
+        bench("allowed, clock read per call", lambda: limiter.hit("10.0.0.7")),
+    ])
+
+
+def bench_eviction(keys: int, shards: int) -> None:
+    limiter = filled(keys, shards)
+    later = NOW + 3 * 60
+    pauses = []
+    for _ in range(limiter.shards):
+        start = time.perf_counter()
+        limiter.evict(later)
+        pauses.append(time.perf_counter() - start)
+    print(f"\n== eviction of {keys:,} idle keys, one shard per tick")
+    print(f"longest pause {max(pauses) * 1000:.3f} ms, all shards {sum(pauses) * 1000:.1f} ms, "
+          f"{len(limiter):,} keys left")
+
+
+def bench_middleware(shards: int) -> None:
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    limits = RateLimits("memory", shards, 100_000, 60.0, 1.0)
+    limits.add("ip", (1_000_000_000, 60.0))
+    limits.add("route:/api/v1/auth/login", (1_000_000_000, 60.0))
+    limited = RateLimitMiddleware(endpoint, limits)
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    def scope(path: str) -> dict:
+        return {
+            "type": "http", "method": "POST", "path": path, "client": ("10.0.0.7", 51234),
+            "headers": [(b"x-forwarded-for", b"203.0.113.9, 10.0.0.1"), (b"user-agent", b"bench")],
+        }
+
+    loop = asyncio.new_event_loop()
+    login, profile = scope("/api/v1/auth/login"), scope("/api/v1/user/")
+    try:
+        print_results("ASGI request (bare app) with and without RateLimitMiddleware", [
+            bench("no middleware", lambda: loop.run_until_complete(endpoint(login, receive, send))),
+            bench("/user/ (IP quota)", lambda: loop.run_until_complete(limited(profile, receive, send))),
+            bench("/auth/login (route + IP quotas)", lambda: loop.run_until_complete(limited(login, receive, send))),
+        ])
+    finally:
+        loop.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=100_000, help="keys already tracked by the limiter")
+    parser.add_argument("--shards", type=int, default=64)
+    args = parser.parse_args()
+
+    bench_checks(args.keys, args.shards)
+    bench_eviction(args.keys, args.shards)
+    bench_middleware(args.shards)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Compare the legacy response_model path with api_response().
+
+    python -m benchmarks.bench_serialization
+
+The legacy path approximates what FastAPI does when an endpoint returns an
+ApiResponse with a response_model: validate the envelope again against
+ApiResponse[T], serialize to jsonable python and json.dumps it.
+Documents are built in memory; Beanie is initialised against mongomock-motor
+(pip install -e .[bench]) or MONGO_URL but no queries are issued.
+"""
+import asyncio
+import json
+import uuid
+from datetime import datetime, timezone
+
+from benchmarks.harness import bench, init_models, print_results
+from pydantic import TypeAdapter
+
+from app.models.role import Role
+from app.models.user import User as UserModel
+from app.schemas.admin import ListUsers, Pagination
+from app.schemas.auth import TokenData, TokenResponse
+from app.schemas.user import User, UserResponse
+from app.utils.formatter import ApiResponse, FastJSONResponse
+
+PAGE_SIZES = (10, 50, 100)
+
+ROLE = Role.model_construct(
+    id=str(uuid.uuid4()),
+    name="USER",
+    description="Regular user with self-service capabilities",
+    permissions=["user:*"],
+    is_active=True,
+    created_at=datetime.now(timezone.utc),
+)
+
+
+def make_user(i: int) -> UserModel:
+    return UserModel.model_construct(
+        id=str(uuid.uuid4()),
+        username=f"user{i}",
+        email=f"user{i}@example.com",
+        full_name=f"User {i}",
+        password="$argon2id$v=19$m=65536,t=3,p=4$c29tZXNhbHQ$hash",
+        role=ROLE,
+        is_active=True,
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+def legacy_render(envelope: ApiResponse, adapter: TypeAdapter) -> bytes:
+    validated = adapter.validate_python(envelope, from_attributes=True)
+    jsonable = adapter.dump_python(validated, mode="json", by_alias=True)
+    return json.dumps(jsonable, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_render(data) -> bytes:
+    return FastJSONResponse(ApiResponse.model_construct(code=0, message="success", data=data)).body
+
+
+def main():
+    asyncio.run(init_models())
+    user = make_user(0)
+    results = []
+
+    profile_adapter = TypeAdapter(ApiResponse[User])
+    results.append(bench("/user/ legacy", lambda: legacy_render(
+        ApiResponse(code=0, message="success", data=user), profile_adapter)))
+    results.append(bench("/user/ api_response", lambda: fast_render(User.from_document(user))))
+
+    token = TokenData(access_token="x" * 220, expires_in=900)
+    login_adapter = TypeAdapter(ApiResponse[TokenResponse])
+    login_dict = {"token": token.model_dump(), "user": {
+        "id": user.id, "username": user.username, "email": user.email, "full_name": user.full_name,
+        "role": user.role, "is_active": user.is_active, "created_at": user.created_at,
+    }}
+    results.append(bench("/auth/login legacy", lambda: legacy_render(
+        ApiResponse(code=0, message="Login successful", data=login_dict), login_adapter)))
+    results.append(bench("/auth/login api_response", lambda: fast_render(
+        TokenResponse.model_construct(token=token, user=UserResponse.from_document(user)))))
+
+    list_adapter = TypeAdapter(ApiResponse[ListUsers])
+    for size in PAGE_SIZES:
+        users = [make_user(i) for i in range(size)]
+        pagination = {"total_items": 1000, "total_pages": 1000 // size, "current_page": 1,
+                      "page_size": size, "has_next": True, "has_previous": False}
+
+        def legacy_list():
+            users_data = [{
+                "id": u.id, "username": u.username, "email": u.email, "full_name": u.full_name,
+                "role": u.role, "is_active": u.is_active, "created_at": u.created_at,
+            } for u in users]
+            return legacy_render(ApiResponse(code=0, message="success", data={
+                "users": users_data, "pagination": pagination}), list_adapter)
+
+        def fast_list():
+            return fast_render(ListUsers.model_construct(
+                users=[UserResponse.from_document(u) for u in users],
+                pagination=Pagination.model_construct(**pagination),
+            ))
+
+        assert json.loads(legacy_list()) == json.loads(fast_list())
+        results.append(bench(f"/admin/users size={size} legacy", legacy_list))
+        results.append(bench(f"/admin/users size={size} api_response", fast_list))
+
+    print_results("ApiResponse serialization", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""User-Agent classification with the LRU cache on and off.
+
+    python -m benchmarks.bench_user_agent
+    python -m benchmarks.bench_user_agent --distinct 5000 --logins 1000
+
+The UAs are realistic strings drawn with a Zipf distribution (a few very
+common browsers and a long tail), like real login traffic. Part 1 times
+describe_user_agent alone. Part 2 measures process CPU per login through the
+ASGI app, including the background job that parses device_info. argon2 runs
+at its minimum cost there so the hash does not hide the rest of the login.
+Note that ua-parser keeps its own small internal cache, which also applies
+with our cache off.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import statistics
+import time
+from typing import List
+
+os.environ.setdefault("MONGODB_NAME", "bench_user_agent")
+os.environ.setdefault("SECRET_KEY", "bench-" + "0" * 58)
+os.environ.update(ARGON2_TIME_COST="1", ARGON2_MEMORY_COST_KIB="8", ARGON2_PARALLELISM="1")
+os.environ["LOOP_MONITOR_ENABLED"] = "false"
+# Every virtual client shares one IP: the per-IP login quota would turn the run into 429s
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from benchmarks.harness import mongomock_client
+
+from app.core.metrics import CACHE_REQUESTS
+from app.utils.user_agent import describe_user_agent, ua_cache
+
+PASSWORD = "bench-password"
+
+
+def user_agents(distinct: int, seed: int) -> List[str]:
+    templates = itertools.cycle([
+        lambda major, minor: f"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                             f"Chrome/{major}.0.{minor * 7}.{minor} Safari/537.36",
+        lambda major, minor: f"Mozilla/5.0 (Linux; Android {major % 6 + 9}; SM-S9{minor % 30}B) AppleWebKit/537.36 "
+                             f"(KHTML, like Gecko) Chrome/{major}.0.{minor * 11}.{minor} Mobile Safari/537.36",
+        lambda major, minor: f"Mozilla/5.0 (iPhone; CPU iPhone OS {major % 8 + 12}_{minor % 8} like Mac OS X) "
+                             f"AppleWebKit/605.1.15 (KHTML, like Gecko) Version/{major % 8 + 12}.{minor % 8} "
+                             f"Mobile/15E{minor}48 Safari/604.1",
+        lambda major, minor: f"Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:{major}.{minor}) Gecko/20100101 "
+                             f"Firefox/{major}.{minor}",
+        lambda major, minor: f"Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_{minor % 8}) AppleWebKit/537.36 "
+                             f"(KHTML, like Gecko) Chrome/{major}.0.{minor * 5}.{minor} Safari/537.36 Edg/{major}.0.{minor}",
+    ])
+    agents = list(dict.fromkeys(
+        next(templates)(major, minor) for major in range(90, 130) for minor in range(1, 200)
+    ))[:distinct]
+    random.Random(seed).shuffle(agents)
+    return agents
+
+
+def zipf_stream(agents: List[str], n: int, seed: int, exponent: float = 1.1) -> List[str]:
+    weights = [1 / rank ** exponent for rank in range(1, len(agents) + 1)]
+    return random.Random(seed).choices(agents, weights, k=n)
+
+
+def cache_counts() -> dict:
+    return {result: value for (cache, result), value in CACHE_REQUESTS.snapshot() if cache == "user_agent"}
+
+
+def hit_ratio(before: dict, after: dict) -> float:
+    hits = after.get("hit", 0) - before.get("hit", 0)
+    misses = after.get("miss", 0) - before.get("miss", 0)
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+def set_cache(enabled: bool, size: int) -> None:
+    ua_cache.clear()
+    ua_cache.max_size = size if enabled else 0
+
+
+def bench_describe(stream: List[str], size: int) -> None:
+    print(f"\n== describe_user_agent, {len(stream):,} lookups over {len(set(stream)):,} distinct UAs")
+    describe_user_agent(stream[0])  # import user_agents outside the timing
+    for enabled in (False, True):
+        set_cache(enabled, size)
+        before = cache_counts()
+        start = time.perf_counter()
+        for user_agent in stream:
+            describe_user_agent(user_agent)
+        elapsed = time.perf_counter() - start
+        print(f"cache {'on ' if enabled else 'off'}  {elapsed / len(stream) * 1e6:>9.1f} us/op  "
+              f"hit ratio {hit_ratio(before, cache_counts()):.1%}")
+
+
+async def bench_logins(stream: List[str], warmup: List[str], size: int, users: int, rounds: int) -> None:
+    import httpx
+    import logging
+    from app.core import db
+    from app.core.jobs import jobs
+    from app.main import app
+    from app.models.session import Session
+
+    db._client = mongomock_client()
+    print(f"\n== POST /auth/login, {len(stream):,} logins x {rounds} rounds (argon2 at minimum cost)")
+    async with app.router.lifespan_context(app):
+        for name in ("app", "app.http", "app.audit", "httpx"):
+            logging.getLogger(name).setLevel(logging.WARNING)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for i in range(users):
+                await client.post("/api/v1/auth/register", json={
+                    "username": f"bench{i}", "email": f"bench{i}@example.com", "full_name": None, "password": PASSWORD,
+                })
+            samples = {False: [], True: []}
+            # Alternate modes so drift (data growth, CPU frequency) hits both equally
+            for _ in range(rounds):
+                for enabled in (False, True):
+                    set_cache(enabled, size)
+                    for user_agent in warmup if enabled else ():
+                        describe_user_agent(user_agent)  # steady state: a running worker's cache is warm
+                    await Session.delete_all()
+                    before = cache_counts()
+                    cpu_start = time.process_time()
+                    for i, user_agent in enumerate(stream):
+                        response = await client.post(
+                            "/api/v1/auth/login",
+                            json={"email": f"bench{i % users}@example.com", "password": PASSWORD},
+                            headers={"User-Agent": user_agent},
+                        )
+                        response.raise_for_status()
+                    # device_info is parsed by a background job: wait for it so its CPU is counted
+                    await jobs.drain(60)
+                    samples[enabled].append(((time.process_time() - cpu_start) / len(stream), hit_ratio(before, cache_counts())))
+                    jobs.start()
+    for enabled, results in samples.items():
+        cpu = statistics.median(result[0] for result in results)
+        ratio = statistics.median(result[1] for result in results)
+        print(f"cache {'on ' if enabled else 'off'}  {cpu * 1000:>7.3f} ms CPU/login (median)  hit ratio {ratio:.1%}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--distinct", type=int, default=3_000, help="distinct User-Agent strings")
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--logins", type=int, default=500)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--cache-size", type=int, default=ua_cache.max_size)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    agents = user_agents(args.distinct, args.seed)
+    bench_describe(zipf_stream(agents, args.lookups, args.seed), args.cache_size)
+    asyncio.run(bench_logins(
+        zipf_stream(agents, args.logins, args.seed + 1), zipf_stream(agents, args.lookups, args.seed + 2),
+        args.cache_size, args.users, args.rounds,
+    ))
+
+
+if __name__ == "__main__":
+    main()
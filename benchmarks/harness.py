@@ -0,0 +1,186 @@
+"""Small, dependency-free timing harness shared by the benchmark scripts."""
+import functools
+import gc
+import inspect
+import os
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, List, Tuple
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_NAME", "benchmark")
+
+
+@dataclass
+class BenchResult:
+    name: str
+    ops_per_sec: float
+    mean_us: float
+    stdev_us: float
+    runs: int
+
+    def row(self) -> str:
+        return (
+            f"{self.name:<48} {self.ops_per_sec:>12,.0f} ops/s "
+            f"{self.mean_us:>10.2f} us/op  ±{self.stdev_us:.2f}"
+        )
+
+
+def _calibrate(fn: Callable[[], object], min_time: float) -> int:
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - start >= min_time:
+            return loops
+        loops *= 2
+
+
+def bench(name: str, fn: Callable[[], object], *, min_time: float = 0.2, repeat: int = 5) -> BenchResult:
+    fn()  # warm-up: imports, caches, lazy initialisation
+    loops = _calibrate(fn, min_time)
+    samples: List[float] = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            samples.append((time.perf_counter() - start) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    best = min(samples)
+    return BenchResult(
+        name=name,
+        ops_per_sec=1 / best,
+        mean_us=statistics.mean(samples) * 1e6,
+        stdev_us=(statistics.stdev(samples) if len(samples) > 1 else 0.0) * 1e6,
+        runs=loops * repeat,
+    )
+
+
+def measure_allocations(fn: Callable[[], object], calls: int = 100) -> Tuple[int, float]:
+    """Peak bytes allocated by one call, and bytes still held per call after `calls` calls."""
+    fn()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        gc.collect()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        for _ in range(calls - 1):
+            fn()
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return peak - base, (current - base) / calls
+
+
+def print_results(title: str, results: List[BenchResult]) -> None:
+    print(f"\n== {title}")
+    for result in results:
+        print(result.row())
+
+
+# Collection calls that cost one round trip on a real server
+_ROUND_TRIP_METHODS = (
+    "aggregate", "bulk_write", "count_documents", "delete_many", "delete_one", "distinct", "find",
+    "find_one", "find_one_and_delete", "find_one_and_replace", "find_one_and_update",
+    "insert_many", "insert_one", "replace_one", "update_many", "update_one",
+)
+_mongomock_patched = False
+
+
+def _count_round_trip(method_name: str, original):
+    # mongomock emits no command events, so feed the per-request query stats ourselves
+    from app.core.mongo_monitor import request_query_stats
+
+    def record(collection) -> None:
+        stats = request_query_stats.get()
+        if stats is not None:
+            stats.record(collection.name, method_name)
+
+    if inspect.iscoroutinefunction(original):
+        @functools.wraps(original)
+        async def wrapper(self, *args, **kwargs):
+            record(self)
+            return await original(self, *args, **kwargs)
+    else:
+        @functools.wraps(original)
+        def wrapper(self, *args, **kwargs):
+            record(self)
+            return original(self, *args, **kwargs)
+    return wrapper
+
+
+def _patch_mongomock() -> None:
+    global _mongomock_patched
+    if _mongomock_patched:
+        return
+    import mongomock.collection
+    from mongomock_motor import AsyncMongoMockCollection
+
+    # pymongo 4.9+ passes sort= to bulk updates, which mongomock does not accept
+    add_update = mongomock.collection.BulkOperationBuilder.add_update
+
+    def add_update_without_sort(self, *args, sort=None, **kwargs):
+        return add_update(self, *args, **kwargs)
+
+    mongomock.collection.BulkOperationBuilder.add_update = add_update_without_sort
+
+    # mongomock re-slices the whole result list for every document: quadratic on large scans
+    def next_without_slicing(self):
+        results = self._compute_results()
+        end = len(results) if not self._limit else min(len(results), self._skip + abs(self._limit))
+        index = self._skip + self._emitted
+        if index >= end:
+            raise StopIteration()
+        self._emitted += 1
+        return results[index]
+
+    mongomock.collection.Cursor.__next__ = next_without_slicing
+    # Read preferences and concerns mean nothing to a single in-memory store
+    AsyncMongoMockCollection.with_options = lambda self, **kwargs: self
+    for name in _ROUND_TRIP_METHODS:
+        setattr(AsyncMongoMockCollection, name, _count_round_trip(name, getattr(AsyncMongoMockCollection, name)))
+    _mongomock_patched = True
+
+
+def mongomock_client():
+    """An in-memory Motor stand-in (mongomock-motor), or None when the bench extra is missing."""
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        return None
+    _patch_mongomock()
+    return AsyncMongoMockClient(tz_aware=True)
+
+
+async def init_models(use_mongomock: bool = True) -> None:
+    """Initialise Beanie against mongomock-motor when installed, else the configured MONGO_URL."""
+    from beanie import init_beanie
+    from app.models.role import Role
+    from app.models.session import Session
+    from app.models.user import User
+    from app.models.user_agent import UserAgent
+    from app.models.rate_limit import RateLimitCounter
+
+    client = mongomock_client() if use_mongomock else None
+    if client is None:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(os.environ["MONGO_URL"], tz_aware=True)
+    await init_beanie(
+        database=client[os.environ["MONGODB_NAME"]],
+        document_models=[Role, User, Session, UserAgent, RateLimitCounter],
+        skip_indexes=True,
+    )
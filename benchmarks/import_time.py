@@ -0,0 +1,106 @@
+"""Import-time profile of the app package, with a budget check for CI.
+
+    python -m benchmarks.import_time                 # slowest modules (-X importtime)
+    python -m benchmarks.import_time --check         # fail if over budget
+
+--check imports app.main in fresh interpreters and fails when the median wall
+time exceeds --budget-ms or when a module that should load lazily was imported.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from benchmarks import harness  # noqa: F401  (sets MONGO_URL/MONGODB_NAME for the children)
+
+TARGET = "app.main"
+# Shared with tests/test_import_time.py; raise it on slow CI runners
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", 1500))
+# Heavy dependencies that must only be imported on first use
+LAZY_MODULES = ("user_agents", "argon2", "pytz")
+
+_MEASURE = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {target}\n"
+    "elapsed = (time.perf_counter() - start) * 1000\n"
+    "print(elapsed)\n"
+    "print(','.join(sorted(sys.modules)))\n"
+)
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, check=True)
+
+
+def import_profile(target: str) -> List[Tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) rows from -X importtime."""
+    result = _run(["-X", "importtime", "-c", f"import {target}"])
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(target: str, runs: int) -> Tuple[List[float], set]:
+    timings = []
+    modules: set = set()
+    for _ in range(runs):
+        elapsed, loaded = _run(["-c", _MEASURE.format(target=target)]).stdout.splitlines()
+        timings.append(float(elapsed))
+        modules = set(loaded.split(","))
+    return timings, modules
+
+
+def print_profile(rows: List[Tuple[str, int, int]], top: int) -> None:
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+    packages: Dict[str, int] = {}
+    for name, self_us, _ in rows:
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + self_us
+    print(f"\n{'self ms':>14}  top-level package")
+    for root, self_us in sorted(packages.items(), key=lambda p: p[1], reverse=True)[:top]:
+        print(f"{self_us / 1000:>14.1f}  {root}")
+
+
+def check(target: str, budget_ms: float, runs: int) -> int:
+    timings, modules = measure(target, runs)
+    median = statistics.median(timings)
+    failures = []
+    if median > budget_ms:
+        failures.append(f"import {target} took {median:.0f}ms (budget {budget_ms:.0f}ms)")
+    eager = [m for m in LAZY_MODULES if m in modules]
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+
+    print(f"import {target}: median {median:.0f}ms over {runs} runs "
+          f"(min {min(timings):.0f}ms, budget {budget_ms:.0f}ms)")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_time")
+    parser.add_argument("--target", default=TARGET)
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--check", action="store_true", help="exit non-zero when over budget")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(check(args.target, args.budget_ms, args.runs))
+    print_profile(import_profile(args.target), args.top)
+
+
+if __name__ == "__main__":
+    main()
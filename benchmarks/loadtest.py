@@ -0,0 +1,292 @@
+"""End-to-end load test of the Postman flows: register, login, profile, refresh, admin listing, logout.
+
+    python -m benchmarks.loadtest                                # in-process ASGI, mongomock-motor
+    python -m benchmarks.loadtest --transport uvicorn            # real HTTP through a local uvicorn
+    python -m benchmarks.loadtest --mongod                       # use MONGO_URL instead of mongomock
+    python -m benchmarks.loadtest --url http://localhost:8000    # an already running server
+    python -m benchmarks.loadtest --save-baseline benchmarks/baseline.json
+    python -m benchmarks.loadtest --baseline benchmarks/baseline.json   # exit 1 on regression
+
+Every virtual user registers, logs in, reads its profile, refreshes its token,
+lists users (ADMIN users only) and logs out. Report: req/s and p50/p95/p99
+latency per endpoint, plus Mongo round trips per request from X-DB-Queries.
+With mongomock, each collection call counts as one round trip.
+
+Baselines depend on the machine and the options, so record one on the machine
+that runs the comparison; the meta block says how it was produced. Latency and
+throughput may drift by --tolerance. Any increase in round trips or any
+unexpected status fails the run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+os.environ.setdefault("MONGODB_NAME", "loadtest")
+os.environ.setdefault("SECRET_KEY", "loadtest-" + "0" * 55)
+os.environ["QUERY_STATS_HEADER"] = "true"
+# Every virtual client shares one IP: the per-IP login quota would turn the run into 429s
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+# mongomock and the argon2 threads stall the loop for long stretches; shedding on lag would skew the run
+os.environ.setdefault("ADMISSION_MAX_LOOP_LAG_MS", "inf")
+
+import httpx
+
+from benchmarks.harness import mongomock_client
+
+API = "/api/v1"
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+PASSWORD = "loadtest-password"
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.db_queries: Dict[str, List[int]] = defaultdict(list)
+        self.errors: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, expected: int = 200, **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[name].append(time.perf_counter() - start)
+        if "x-db-queries" in response.headers:
+            self.db_queries[name].append(int(response.headers["x-db-queries"]))
+        if response.status_code != expected:
+            self.errors[name][response.status_code] += 1
+        return response
+
+
+async def user_flow(client: httpx.AsyncClient, rec: Recorder, run_id: str, i: int, args) -> None:
+    username = f"load{run_id}u{i}"
+    role = "ADMIN" if i % args.admin_every == 0 else "USER"
+    await rec.call(client, "POST /auth/register", "POST", f"{API}/auth/register", expected=201, json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "full_name": f"Load User {i}",
+        "password": PASSWORD,
+        "role": role,
+    })
+    response = await rec.call(client, "POST /auth/login", "POST", f"{API}/auth/login", json={
+        "email": f"{username}@example.com",
+        "password": PASSWORD,
+    })
+    if response.status_code != 200:
+        return
+    token = response.json()["data"]["token"]["access_token"]
+    client.headers["Authorization"] = f"Bearer {token}"
+
+    for _ in range(args.profile_reads):
+        await rec.call(client, "GET /user/", "GET", f"{API}/user/")
+    response = await rec.call(client, "POST /auth/refresh", "POST", f"{API}/auth/refresh")
+    if response.status_code == 200:
+        client.headers["Authorization"] = f"Bearer {response.json()['data']['token']['access_token']}"
+    if role == "ADMIN":
+        for page in range(1, args.listing_pages + 1):
+            await rec.call(client, "GET /admin/users", "GET", f"{API}/admin/users", params={"page": page, "size": 20})
+    await rec.call(client, "POST /auth/logout", "POST", f"{API}/auth/logout")
+
+
+async def drive(make_client, args) -> tuple:
+    rec = Recorder()
+    run_id = uuid.uuid4().hex[:8]
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            # One client per virtual user: its own cookie jar carries the refresh token
+            async with make_client() as client:
+                await user_flow(client, rec, run_id, i, args)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.users)))
+    return rec, time.perf_counter() - start
+
+
+def _quiet_app_logs() -> None:
+    import logging
+    for name in ("app", "app.http", "httpx", "uvicorn", "uvicorn.access"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+
+def _use_stand_in(args) -> None:
+    if args.mongod:
+        return
+    client = mongomock_client()
+    if client is None:
+        sys.exit("mongomock-motor is not installed (pip install -e .[bench]); use --mongod with MONGO_URL")
+    from app.core import db
+    db._client = client
+
+
+async def run_asgi(args) -> tuple:
+    _use_stand_in(args)
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        if not args.verbose:
+            _quiet_app_logs()
+        transport = httpx.ASGITransport(app=app)
+        return await drive(lambda: httpx.AsyncClient(
+            transport=transport, base_url="http://loadtest", headers={"User-Agent": USER_AGENT},
+        ), args)
+
+
+async def run_uvicorn(args) -> tuple:
+    import uvicorn
+    _use_stand_in(args)
+    from app.main import app
+
+    # Same process and loop as the clients: client CPU counts against the server, so compare like with like
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", lifespan="on")
+    server = uvicorn.Server(config)
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        if serving.done():
+            serving.result()
+        await asyncio.sleep(0.01)
+    if not args.verbose:
+        _quiet_app_logs()
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        return await drive(lambda: httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", headers={"User-Agent": USER_AGENT},
+        ), args)
+    finally:
+        server.should_exit = True
+        await serving
+
+
+async def run_remote(args) -> tuple:
+    return await drive(lambda: httpx.AsyncClient(base_url=args.url, headers={"User-Agent": USER_AGENT}), args)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    index = min(int(round(q * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(rec: Recorder, elapsed: float) -> Dict[str, dict]:
+    endpoints = {}
+    for name, samples in rec.latencies.items():
+        ordered = sorted(samples)
+        queries = rec.db_queries.get(name)
+        endpoints[name] = {
+            "count": len(samples),
+            "rps": round(len(samples) / elapsed, 2),
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+            "db_queries": round(statistics.mean(queries), 2) if queries else None,
+        }
+    return endpoints
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_meta(args) -> dict:
+    return {
+        "transport": "remote" if args.url else args.transport,
+        "backend": "remote" if args.url else ("mongod" if args.mongod else "mongomock"),
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "profile_reads": args.profile_reads,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "commit": git_commit(),
+    }
+
+
+def print_report(endpoints: Dict[str, dict], elapsed: float, rec: Recorder) -> None:
+    total = sum(e["count"] for e in endpoints.values())
+    print(f"\n== {total} requests in {elapsed:.2f}s ({total / elapsed:,.1f} req/s)")
+    print(f"{'endpoint':<22} {'count':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'db rt':>6}")
+    for name, e in endpoints.items():
+        queries = "-" if e["db_queries"] is None else f"{e['db_queries']:.2f}"
+        print(
+            f"{name:<22} {e['count']:>6} {e['rps']:>9,.1f} {e['p50_ms']:>9.2f} "
+            f"{e['p95_ms']:>9.2f} {e['p99_ms']:>9.2f} {queries:>6}"
+        )
+    for name, statuses in rec.errors.items():
+        print(f"!! {name}: unexpected statuses {dict(statuses)}")
+
+
+def compare(endpoints: Dict[str, dict], baseline: dict, meta: dict, tolerance: float) -> List[str]:
+    for key in ("transport", "backend", "users", "concurrency", "profile_reads"):
+        if baseline["meta"].get(key) != meta[key]:
+            print(f"warning: baseline {key}={baseline['meta'].get(key)!r} but this run used {meta[key]!r}")
+
+    failures = []
+    for name, base in baseline["endpoints"].items():
+        current = endpoints.get(name)
+        if current is None:
+            failures.append(f"{name}: missing from this run")
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            failures.append(f"{name}: p95 {current['p95_ms']:.2f}ms vs baseline {base['p95_ms']:.2f}ms")
+        if current["rps"] < base["rps"] * (1 - tolerance):
+            failures.append(f"{name}: {current['rps']:.1f} req/s vs baseline {base['rps']:.1f} req/s")
+        # Round trips are deterministic: any increase is a real regression, not noise
+        if base.get("db_queries") is not None and current["db_queries"] is not None \
+                and current["db_queries"] > base["db_queries"] + 0.01:
+            failures.append(f"{name}: {current['db_queries']:.2f} round trips vs baseline {base['db_queries']:.2f}")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transport", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--url", help="load an already running server instead of starting the app")
+    parser.add_argument("--mongod", action="store_true", help="use MONGO_URL instead of mongomock-motor")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--profile-reads", type=int, default=5)
+    parser.add_argument("--listing-pages", type=int, default=2)
+    parser.add_argument("--admin-every", type=int, default=5, help="every Nth virtual user registers as ADMIN")
+    parser.add_argument("--baseline", help="compare with this baseline JSON and exit 1 on regression")
+    parser.add_argument("--save-baseline", help="write this run's results as a baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95/throughput drift (0.25 = 25%%)")
+    parser.add_argument("--verbose", action="store_true", help="keep the app's request logs")
+    args = parser.parse_args()
+
+    runner = run_remote if args.url else (run_uvicorn if args.transport == "uvicorn" else run_asgi)
+    rec, elapsed = asyncio.run(runner(args))
+    endpoints = summarize(rec, elapsed)
+    meta = run_meta(args)
+    print_report(endpoints, elapsed, rec)
+
+    failed = bool(rec.errors)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"meta": meta, "endpoints": endpoints}, f, indent=2)
+        print(f"\nBaseline written to {args.save_baseline}")
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            print(f"\nNo baseline at {args.baseline}; record one with --save-baseline")
+        else:
+            with open(args.baseline) as f:
+                failures = compare(endpoints, json.load(f), meta, args.tolerance)
+            for failure in failures:
+                print(f"REGRESSION {failure}")
+            if not failures:
+                print(f"\nWithin {args.tolerance:.0%} of baseline {args.baseline}")
+            failed = failed or bool(failures)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
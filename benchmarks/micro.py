@@ -0,0 +1,180 @@
+"""Micro-benchmarks for the auth hot path: JWT, permissions, request parsing, rate limits, argon2, ApiResponse.
+
+    python -m benchmarks.micro                         # ops/s and allocations
+    python -m benchmarks.micro -k jwt -k permission    # only benchmarks whose name contains a filter
+    python -m benchmarks.micro --record                # append results to the history file
+    python -m benchmarks.micro --history               # show the recorded runs per commit
+
+Allocations come from tracemalloc, which runs separately from the timing
+loops so it does not slow them down. "peak" is the memory one call allocates
+at most. "held" is the memory per call still allocated after 100 calls: it
+should be zero unless something caches or leaks.
+Records hold the git commit and machine; compare runs from the same machine.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+os.environ.setdefault("SECRET_KEY", "micro-" + "0" * 58)
+
+from starlette.requests import Request
+
+from benchmarks.bench_serialization import make_user
+from benchmarks.harness import BenchResult, bench, init_models, measure_allocations
+
+from app.core.rate_limit import SlidingWindowLimiter
+from app.dependencies import has_permission
+from app.schemas.user import User
+from app.services.session_service import SessionService
+from app.utils.auth import decode_jwt, generate_jwt
+from app.utils.formatter import ApiResponse, api_response
+from app.utils.password import get_password_hasher
+from app.utils.user_agent import get_client_ip, parse_user_agent
+
+HISTORY_FILE = os.path.join(os.path.dirname(__file__), "micro_history.jsonl")
+
+DESKTOP_UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+MOBILE_UA = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Mobile/15E148 Safari/604.1"
+USER_PERMISSIONS = ["user:*", "profile:read", "profile:write", "sessions:read"]
+
+
+def make_request(headers: Dict[str, str], client: Tuple[str, int] = ("10.0.0.7", 51234)) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": client,
+    })
+
+
+def cases() -> List[Tuple[str, Callable[[], object]]]:
+    asyncio.run(init_models())
+    user = make_user(0)
+    payload = {"uid": user.id, "sid": "0f6b1c4e-8d5a-4f7e-9a61-3c2b7d9e1f05", "type": "access"}
+    token = SessionService._create_access_token(payload)
+    hasher = get_password_hasher()
+    password_hash = hasher.hash("correct horse battery staple")
+    desktop = make_request({"User-Agent": DESKTOP_UA})
+    mobile = make_request({"User-Agent": MOBILE_UA})
+    forwarded = make_request({"X-Forwarded-For": "203.0.113.9, 10.0.0.1"}, client=("127.0.0.1", 51234))
+    direct = make_request({})
+    limiter = SlidingWindowLimiter("micro", limit=1_000_000_000, period=60.0)
+    exhausted = SlidingWindowLimiter("micro", limit=1, period=3600.0)
+    exhausted.hit("10.0.0.7")
+
+    return [
+        ("jwt generate_jwt", lambda: generate_jwt(payload)),
+        ("jwt decode_jwt", lambda: decode_jwt(token)),
+        ("jwt _create_access_token", lambda: SessionService._create_access_token(payload)),
+        ("jwt _create_access_token 7d", lambda: SessionService._create_access_token(payload, timedelta(days=7))),
+        ("permission exact", lambda: has_permission(USER_PERMISSIONS, ["profile:read"])),
+        ("permission namespace wildcard", lambda: has_permission(USER_PERMISSIONS, ["user:update", "user:read"])),
+        ("permission superuser", lambda: has_permission(["*"], ["admin:*"])),
+        ("permission denied", lambda: has_permission(USER_PERMISSIONS, ["admin:read"])),
+        ("request parse_user_agent desktop", lambda: parse_user_agent(desktop)),
+        ("request parse_user_agent mobile", lambda: parse_user_agent(mobile)),
+        ("request get_client_ip forwarded", lambda: get_client_ip(forwarded)),
+        ("request get_client_ip direct", lambda: get_client_ip(direct)),
+        ("ratelimit hit allowed", lambda: limiter.hit("10.0.0.7")),
+        ("ratelimit hit rejected", lambda: exhausted.hit("10.0.0.7")),
+        ("argon2 hash", lambda: hasher.hash("correct horse battery staple")),
+        ("argon2 verify", lambda: hasher.verify(password_hash, "correct horse battery staple")),
+        ("response ApiResponse validated", lambda: ApiResponse(data=User.from_document(user)).model_dump_json()),
+        ("response api_response", lambda: api_response(User.from_document(user)).body),
+    ]
+
+
+def git_revision() -> Tuple[Optional[str], bool]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return commit.stdout.strip(), bool(status.stdout.strip())
+
+
+def load_history(path: str) -> List[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def print_row(result: BenchResult, peak: int, held: float, previous: Optional[dict]) -> None:
+    delta = ""
+    if previous:
+        change = result.ops_per_sec / previous["ops_per_sec"] - 1
+        delta = f"  {change:+6.1%} vs {previous['_commit']}"
+    print(f"{result.row()}  peak {peak:>8,} B  held {held:>7,.1f} B{delta}")
+
+
+def show_history(records: List[dict], filters: List[str]) -> None:
+    names = sorted({name for record in records for name in record["results"]})
+    for name in names:
+        if filters and not any(f in name for f in filters):
+            continue
+        print(f"\n== {name}")
+        for record in records:
+            result = record["results"].get(name)
+            if result:
+                dirty = "+" if record["dirty"] else " "
+                print(f"  {record['commit']}{dirty} {record['timestamp']}  {result['ops_per_sec']:>12,.0f} ops/s"
+                      f"  peak {result['peak_bytes']:>8,} B")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="filters", action="append", default=[], help="run benchmarks whose name contains this")
+    parser.add_argument("--record", action="store_true", help="append this run to the history file")
+    parser.add_argument("--history", action="store_true", help="print recorded runs instead of benchmarking")
+    parser.add_argument("--history-file", default=HISTORY_FILE)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing sample")
+    args = parser.parse_args()
+
+    records = load_history(args.history_file)
+    if args.history:
+        show_history(records, args.filters)
+        return
+
+    commit, dirty = git_revision()
+    # Compare with the latest run recorded on this machine for another revision
+    previous = {}
+    for record in records:
+        if record["machine"] == platform.node() and (record["commit"], record["dirty"]) != (commit, dirty):
+            previous = {name: dict(result, _commit=record["commit"]) for name, result in record["results"].items()}
+
+    hasher = get_password_hasher()
+    print(f"argon2 parameters: time_cost={hasher.time_cost} memory_cost={hasher.memory_cost} KiB "
+          f"parallelism={hasher.parallelism}")
+    results = {}
+    for name, fn in cases():
+        if args.filters and not any(f in name for f in args.filters):
+            continue
+        # argon2 allocates its memory_cost in C, outside tracemalloc; a few calls are enough
+        result = bench(name, fn, min_time=args.min_time)
+        peak, held = measure_allocations(fn, calls=5 if name.startswith("argon2") else 100)
+        print_row(result, peak, held, previous.get(name))
+        results[name] = {"ops_per_sec": round(result.ops_per_sec, 1), "peak_bytes": peak, "held_bytes": round(held, 1)}
+
+    if args.record:
+        with open(args.history_file, "a") as f:
+            f.write(json.dumps({
+                "commit": commit,
+                "dirty": dirty,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "machine": platform.node(),
+                "python": platform.python_version(),
+                "results": results,
+            }) + "\n")
+        print(f"\nRecorded in {args.history_file}")
+
+
+if __name__ == "__main__":
+    main()
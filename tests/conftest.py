@@ -0,0 +1,5 @@
+import os
+
+# Settings require these at import time; the tests below never connect
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_NAME", "test")
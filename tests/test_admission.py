@@ -0,0 +1,69 @@
+import asyncio
+
+from app.core.admission import AdmissionControl
+
+
+def make_control(max_in_flight: int = 1) -> AdmissionControl:
+    return AdmissionControl(
+        max_in_flight=max_in_flight,
+        class_limits={"api": 4},
+        route_classes={},
+        queue_size=4,
+        queue_timeout=5.0,
+        max_loop_lag=1.0,
+    )
+
+
+def test_cancelled_while_queued_on_total_releases_class_slot():
+    async def scenario():
+        control = make_control()
+        gate = control.gate_for("/api/v1/user/")
+        assert await control.admit(gate, 0.0) is None
+
+        # Takes a class slot, then waits for the worker-wide one
+        queued = asyncio.create_task(control.admit(gate, 0.0))
+        await asyncio.sleep(0)
+        assert gate.in_flight == 2 and control.total.queued == 1
+
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        assert gate.in_flight == 1
+        assert control.total.queued == 0
+
+        control.leave(gate)
+        assert gate.in_flight == 0
+        assert control.total.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_slot_handed_to_next_waiter():
+    async def scenario():
+        control = make_control()
+        gate = control.gate_for("/api/v1/user/")
+        assert await control.admit(gate, 0.0) is None
+        queued = asyncio.create_task(control.admit(gate, 0.0))
+        await asyncio.sleep(0)
+
+        control.leave(gate)
+        assert await queued is None
+        assert control.total.in_flight == 1
+        control.leave(gate)
+        assert gate.in_flight == 0 and control.total.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_sheds_on_loop_lag_and_full_queue():
+    async def scenario():
+        control = make_control()
+        gate = control.gate_for("/")
+        assert await control.admit(gate, 2.0) == "loop_lag"
+        assert gate.in_flight == 0
+
+        control.total.queue_size = 0
+        assert await control.admit(gate, 0.0) is None
+        assert await control.admit(gate, 0.0) == "queue_full"
+        assert gate.in_flight == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from pymongo import monitoring
+
+from app.core.circuit_breaker import CLOSED, OPEN, CircuitBreaker
+from app.core.mongo_monitor import MongoCommandListener, is_unhealthy_failure
+
+
+def make_breaker() -> CircuitBreaker:
+    return CircuitBreaker(failure_threshold=5, window=10.0, reset_timeout=5.0, failure_ratio=0.2)
+
+
+def test_successes_do_not_reset_failures():
+    breaker = make_breaker()
+    # Slow queries time out while cheap ones keep succeeding
+    for _ in range(5):
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_success()
+    assert breaker.state == OPEN
+
+
+def test_stays_closed_below_failure_ratio():
+    breaker = make_breaker()
+    for _ in range(5):
+        breaker.record_failure()
+        for _ in range(9):
+            breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_unhealthy_failures():
+    assert is_unhealthy_failure({"errmsg": "timed out", "errtype": "NetworkTimeout"})
+    assert is_unhealthy_failure({"ok": 0, "code": 50, "errmsg": "operation exceeded time limit"})
+    assert not is_unhealthy_failure({"ok": 0, "code": 11000, "errmsg": "E11000 duplicate key error"})
+    assert not is_unhealthy_failure(None)
+
+
+def test_listener_records_network_failures(monkeypatch):
+    breaker = make_breaker()
+    monkeypatch.setattr("app.core.mongo_monitor.db_circuit", breaker)
+    listener = MongoCommandListener()
+    failure = {"errmsg": "connection reset", "errtype": "AutoReconnect"}
+    for request_id in range(5):
+        listener.failed(monitoring.CommandFailedEvent(
+            timedelta(milliseconds=10), failure, "find", request_id, ("localhost", 27017), 1, database_name="app"
+        ))
+    assert breaker.state == OPEN
@@ -0,0 +1,42 @@
+from typing import Dict
+
+import pytest
+from fastapi import Request
+
+from app.utils import user_agent
+from app.utils.user_agent import TrustedProxies, get_client_ip
+
+
+def make_request(headers: Dict[str, str], peer: str) -> Request:
+    return Request({
+        "type": "http",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": (peer, 51234),
+    })
+
+
+@pytest.fixture(autouse=True)
+def proxies(monkeypatch):
+    monkeypatch.setattr(user_agent, "trusted_proxies", TrustedProxies(["127.0.0.1", "10.0.0.0/8"]))
+
+
+def test_untrusted_peer_headers_ignored():
+    request = make_request({"X-Forwarded-For": "1.2.3.4", "X-Real-IP": "5.6.7.8"}, "203.0.113.9")
+    assert get_client_ip(request) == "203.0.113.9"
+
+
+def test_rightmost_untrusted_hop():
+    # The client sent its own spoofed X-Forwarded-For; the proxies appended the real address
+    request = make_request({"X-Forwarded-For": "1.2.3.4, 203.0.113.9, 10.1.2.3"}, "127.0.0.1")
+    assert get_client_ip(request) == "203.0.113.9"
+
+
+def test_real_ip_from_trusted_proxy():
+    assert get_client_ip(make_request({"X-Real-IP": "203.0.113.9"}, "10.0.0.5")) == "203.0.113.9"
+    assert get_client_ip(make_request({}, "10.0.0.5")) == "10.0.0.5"
+
+
+def test_trust_any():
+    proxies = TrustedProxies(["*"])
+    assert "198.51.100.1" in proxies and "unknown-host" in proxies
+    assert "198.51.100.1" not in TrustedProxies(["10.0.0.0/8"])
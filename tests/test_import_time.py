@@ -0,0 +1,6 @@
+from benchmarks.import_time import IMPORT_BUDGET_MS, TARGET, check
+
+
+def test_app_imports_within_budget(capsys):
+    # Median of fresh interpreters; also fails when a lazily imported dependency loads at startup
+    assert check(TARGET, IMPORT_BUDGET_MS, runs=3) == 0, capsys.readouterr().out
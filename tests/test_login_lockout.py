@@ -0,0 +1,39 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.harness import mongomock_client
+from app.core import db
+from app.utils import user_agent
+from app.utils.user_agent import TrustedProxies
+
+CREDENTIALS = {"email": "victim@example.com", "password": "correct-horse"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(db, "_client", mongomock_client())
+    # Each request names its client IP through the test client, acting as the proxy
+    monkeypatch.setattr(user_agent, "trusted_proxies", TrustedProxies(["testclient"]))
+    from app.main import app
+    with TestClient(app) as client:
+        client.post("/api/v1/auth/register", json={
+            "username": "victim", "full_name": "Victim", **CREDENTIALS,
+        })
+        yield client
+
+
+def login(client: TestClient, ip: str, password: str) -> int:
+    response = client.post(
+        "/api/v1/auth/login",
+        json={**CREDENTIALS, "password": password},
+        headers={"X-Forwarded-For": ip},
+    )
+    return response.status_code
+
+
+def test_failed_logins_lock_out_only_the_guessing_ip(client):
+    attacker, owner = "198.51.100.20", "203.0.113.5"
+    statuses = [login(client, attacker, "wrong") for _ in range(10)]
+    assert statuses == [401] * 10
+    assert login(client, attacker, CREDENTIALS["password"]) == 429
+    assert login(client, owner, CREDENTIALS["password"]) == 200
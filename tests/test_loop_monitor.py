@@ -0,0 +1,25 @@
+import asyncio
+import logging
+import time
+
+from app.core.loop_monitor import EventLoopMonitor
+
+
+def test_same_stack_logged_once_per_interval(caplog):
+    async def scenario():
+        monitor = EventLoopMonitor(interval=0.02, stall_threshold=0.05, log_interval=60.0)
+        monitor.start()
+        try:
+            for _ in range(3):
+                await asyncio.sleep(0.1)
+                time.sleep(0.2)
+            await asyncio.sleep(0.1)
+        finally:
+            await monitor.stop()
+
+    with caplog.at_level(logging.DEBUG, logger="app.core.loop_monitor"):
+        asyncio.run(scenario())
+    warnings = [r for r in caplog.records if r.levelno == logging.WARNING]
+    repeats = [r for r in caplog.records if r.levelno == logging.DEBUG and "already logged" in r.getMessage()]
+    assert len(warnings) == 1 and "time.sleep(0.2)" in warnings[0].getMessage()
+    assert len(repeats) == 2
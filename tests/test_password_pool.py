@@ -0,0 +1,35 @@
+import asyncio
+import threading
+
+from app.utils.password import _HashPool
+
+
+def test_cancelled_caller_counted_until_hash_finishes():
+    async def scenario():
+        pool = _HashPool(workers=1)
+        started, release = threading.Event(), threading.Event()
+
+        def slow_hash():
+            started.set()
+            release.wait(5)
+
+        running = asyncio.create_task(pool.run(slow_hash))
+        queued = asyncio.create_task(pool.run(slow_hash))
+        await asyncio.to_thread(started.wait, 5)
+        assert pool.queue_depth == 2
+
+        running.cancel()
+        queued.cancel()
+        await asyncio.gather(running, queued, return_exceptions=True)
+        # The queued call never started and is gone; the running one still holds its thread
+        assert pool.queue_depth == 1
+
+        release.set()
+        for _ in range(100):
+            if pool.queue_depth == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert pool.queue_depth == 0
+        pool.shutdown()
+
+    asyncio.run(scenario())
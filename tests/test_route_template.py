@@ -0,0 +1,34 @@
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.middleware.metrics import UNMATCHED_ROUTE, route_template
+
+
+def make_app() -> FastAPI:
+    router = APIRouter(prefix="/admin")
+
+    @router.get("/{user_id}")
+    async def get_user(user_id: str, request: Request):
+        return route_template(request)
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    sub_app = FastAPI()
+    sub_app.include_router(router)
+    app.mount("/internal", sub_app)
+
+    @app.middleware("http")
+    async def label_unmatched(request: Request, call_next):
+        response = await call_next(request)
+        if response.status_code == 404:
+            response.headers["X-Route"] = route_template(request)
+        return response
+
+    return app
+
+
+def test_label_includes_router_prefix():
+    client = TestClient(make_app())
+    assert client.get("/api/v1/admin/42").json() == "/api/v1/admin/{user_id}"
+    assert client.get("/internal/admin/42").json() == "/internal/admin/{user_id}"
+    assert client.get("/api/v1/nope/42").headers["X-Route"] == UNMATCHED_ROUTE
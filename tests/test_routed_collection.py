@@ -0,0 +1,26 @@
+from app.core.db import RoutedCollection
+from app.core.metrics import Counter, MetricsRegistry
+
+
+class FakeCollection:
+    name = "users"
+
+    def find(self, *args, **kwargs):
+        return "cursor"
+
+    def count_documents(self, *args, **kwargs):
+        return 3
+
+    def insert_one(self, *args, **kwargs):
+        return None
+
+
+def test_counts_each_read():
+    reads = Counter("routed_reads_test", "test", registry=MetricsRegistry())
+    collection = RoutedCollection(FakeCollection(), reads)
+    assert collection.count_documents({}) == 3
+    assert collection.find({}) == "cursor"
+    collection.find({}, limit=1)
+    collection.insert_one({})
+    assert collection.name == "users"
+    assert reads.snapshot()[0][-1] == 3